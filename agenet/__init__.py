@@ -1,18 +1,94 @@
 """API reference for the functions exported by agenet."""
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __all__ = [
+    "Channel",
+    "Nakagami",
+    "Rayleigh",
+    "ResultCache",
+    "ResultWriter",
+    "Rician",
     "aaoi_fn",
     "block_error",
+    "block_error_tab",
     "block_error_th",
     "ev_sim",
+    "ev_sim_adaptive",
+    "ev_sim_cv",
+    "ev_sim_is",
+    "get_channel",
+    "merge_shards",
     "multi_param_ev_sim",
+    "multi_param_th",
+    "save_shard",
     "sim",
     "snr",
     "snr_avg",
 ]
 
+# Submodule where each exported name is defined. Submodules are only imported
+# when one of their names is first accessed (PEP 562), so that importing agenet
+# does not load NumPy, SciPy or pandas until they are actually needed.
+_exports = {
+    "Channel": "channels",
+    "Nakagami": "channels",
+    "Rayleigh": "channels",
+    "ResultCache": "cache",
+    "ResultWriter": "writer",
+    "Rician": "channels",
+    "aaoi_fn": "aaoi",
+    "block_error": "blkerr",
+    "block_error_tab": "blkerr",
+    "block_error_th": "blkerr",
+    "ev_sim": "simulation",
+    "ev_sim_adaptive": "simulation",
+    "ev_sim_cv": "simulation",
+    "ev_sim_is": "simulation",
+    "get_channel": "channels",
+    "merge_shards": "shards",
+    "multi_param_ev_sim": "simulation",
+    "multi_param_th": "simulation",
+    "save_shard": "shards",
+    "sim": "simulation",
+    "snr": "snratio",
+    "snr_avg": "snratio",
+}
+
+if TYPE_CHECKING:
+    from agenet.aaoi import aaoi_fn
+    from agenet.blkerr import block_error, block_error_tab, block_error_th
+    from agenet.cache import ResultCache
+    from agenet.channels import Channel, Nakagami, Rayleigh, Rician, get_channel
+    from agenet.shards import merge_shards, save_shard
+    from agenet.simulation import (
+        ev_sim,
+        ev_sim_adaptive,
+        ev_sim_cv,
+        ev_sim_is,
+        multi_param_ev_sim,
+        multi_param_th,
+        sim,
+    )
+    from agenet.snratio import snr, snr_avg
+    from agenet.writer import ResultWriter
+
+
+def __getattr__(name: str) -> Any:
+    """Import the submodule defining an exported name on first access."""
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f"{__name__}.{_exports[name]}"), name)
+
+    # Cache the name so that this function is not invoked again for it
+    globals()[name] = value
+    return value
+
 
-from agenet.aaoi import aaoi_fn
-from agenet.blkerr import block_error, block_error_th
-from agenet.simulation import ev_sim, multi_param_ev_sim, sim
-from agenet.snratio import snr, snr_avg
+def __dir__() -> list[str]:
+    """List the module attributes, including those not yet imported."""
+    return sorted({*globals(), *__all__})
@@ -1,35 +1,75 @@
 """Functions for calculating the block error."""
 
+from __future__ import annotations
+
 import math
+from functools import lru_cache
+from typing import NamedTuple, cast, overload
 
+import numpy as np
 import scipy.special as sp
+from numpy.typing import ArrayLike, NDArray
+
+
+@overload
+def _qfunc(x: float) -> float: ...
 
 
-def _qfunc(x: float) -> float:
+@overload
+def _qfunc(x: ArrayLike) -> NDArray: ...
+
+
+def _qfunc(x: float | ArrayLike) -> float | NDArray:
     """The Q-function gives the tail probability of the std.
 
     Args:
-      x: The value at which to evaluate the Q-function.
+      x: The value at which to evaluate the Q-function, or an array of such
+        values.
 
     Returns:
-      The value of the Q-function for the given x.
+      The value of the Q-function for the given x, or an array with the value
+        for each element of x. Negative values of x yield 1.
     """
-    if x < 0:
-        return 1
-    return 0.5 - 0.5 * sp.erf(x / math.sqrt(2))
+    if np.isscalar(x):
+        if cast(float, x) < 0:
+            return 1
+        return 0.5 - 0.5 * sp.erf(cast(float, x) / math.sqrt(2))
+
+    # Use the complementary error function for arrays, which is accurate far
+    # into the tail
+    x = np.asarray(x, dtype=float)
+    return np.where(x < 0, 1.0, 0.5 * sp.erfc(x / math.sqrt(2)))
 
 
-def block_error(snr: float, n: int, k: int) -> float:
+@overload
+def block_error(snr: float, n: int, k: int) -> float: ...
+
+
+@overload
+def block_error(snr: ArrayLike, n: ArrayLike, k: ArrayLike) -> NDArray: ...
+
+
+def block_error(
+    snr: float | ArrayLike, n: int | ArrayLike, k: int | ArrayLike
+) -> float | NDArray:
     """Calculate the Block Error Rate for the given instantaneous SNR, n, k.
 
+    Arguments can also be arrays, which are broadcast against each other, in
+    which case the Block Error Rate is calculated element-wise.
+
     Args:
       snr: Instantaneous signal-to-noise ratio.
       n: Total number of bits.
       k: Number of information bits.
 
     Returns:
-      The Block Error Rate.
+      The Block Error Rate, or an array with the Block Error Rate for each
+        element of the broadcast arguments.
     """
+    if not (np.isscalar(snr) and np.isscalar(n) and np.isscalar(k)):
+        return _block_error_arr(np.asarray(snr), np.asarray(n), np.asarray(k))
+
+    snr, n, k = cast(float, snr), cast(int, n), cast(int, k)
     c = math.log2(1 + snr)
     v = 0.5 * ((1 - (1 / ((1 + snr) ** 2))) * ((math.log2(math.exp(1))) ** 2))
 
@@ -41,17 +81,228 @@ def block_error(snr: float, n: int, k: int) -> float:
     return err
 
 
-def block_error_th(snr_avg: float, n: int, k: int) -> float:
+def _block_error_arr(snr: NDArray, n: NDArray, k: NDArray) -> NDArray:
+    """Array version of `block_error()`."""
+    c = np.log2(1 + snr)
+    v = 0.5 * ((1 - (1 / ((1 + snr) ** 2))) * ((math.log2(math.exp(1))) ** 2))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = ((n * c) - k) / np.sqrt(n * v)
+
+    # Assume the worst-case scenario where the dispersion is zero
+    return np.where(v == 0, 1.0, _qfunc(x))
+
+
+def _block_error_arg(log_snr: float, n: int, k: int) -> float:
+    """Argument of the Q-function in `block_error()` for the given log-SNR.
+
+    This is accurate for very small SNRs, where `block_error()` considers the
+    dispersion to be zero, so that it can be used to search for SNR limits.
+    """
+    c = math.log1p(math.exp(log_snr)) / math.log(2)
+    v = 0.5 * -math.expm1(-2 * math.log1p(math.exp(log_snr))) * math.log2(math.e) ** 2
+    return ((n * c) - k) / math.sqrt(n * v)
+
+
+@lru_cache(maxsize=64)
+def _block_error_range(n: int, k: int) -> tuple[float, float] | None:
+    """Get the range of log-SNRs where the Block Error Rate is between 0 and 1.
+
+    Below the SNR threshold, where the Q-function argument is negative, the
+    Block Error Rate is 1, and above the upper limit, where the Q-function
+    underflows, it is 0.
+
+    Returns:
+      The lower and upper limits of the range, or `None` if they can't be found
+        for the given `n` and `k`.
+    """
+    from scipy.optimize import brentq
+
+    if n <= 0 or k <= 0:
+        return None
+    try:
+        lo = brentq(_block_error_arg, -700, 700, args=(n, k), xtol=1e-14)
+        hi = brentq(lambda s: _block_error_arg(s, n, k) - 40, lo, 700)
+    except ValueError:
+        return None
+
+    # Make sure that the lower limit is at or above the SNR threshold
+    while _block_error_arr(np.exp(lo), np.asarray(n), np.asarray(k)) > 0.5:
+        lo = math.nextafter(lo, math.inf)
+
+    return lo, hi
+
+
+class _BlerTable(NamedTuple):
+    """Table of Block Error Rates on a uniform log-SNR grid."""
+
+    log_snr_min: float
+    """Log-SNR of the first grid point, the threshold below which the Block
+    Error Rate is 1."""
+
+    log_snr_step: float
+    """Distance between consecutive grid points in log-SNR."""
+
+    values: NDArray
+    """Block Error Rate at each grid point, zero at the last one and beyond."""
+
+    slopes: NDArray
+    """Difference between the Block Error Rates of consecutive grid points, and
+    zero after the last one."""
+
+
+_BLER_TABLE_SIZE_MAX = 1 << 22
+"""Maximum number of grid points of a Block Error Rate table."""
+
+
+@lru_cache(maxsize=64)
+def _bler_table(n: int, k: int, tol: float) -> _BlerTable | None:
+    """Build a table of Block Error Rates for linear interpolation in log-SNR.
+
+    The table spans the SNRs for which the Block Error Rate is strictly between
+    0 and 1 (see `_block_error_range()`). The grid
+    is refined until the interpolation error, measured at the midpoints between
+    grid points, is at most half of `tol`. The most recently used tables are
+    cached.
+
+    Returns:
+      The table, or `None` if it can't be built for the given `n` and `k`, or if
+      it can't meet `tol` within `_BLER_TABLE_SIZE_MAX` grid points.
+    """
+    log_snr_range = _block_error_range(n, k)
+    if log_snr_range is None:
+        return None
+    lo, hi = log_snr_range
+
+    def exact(log_snrs: NDArray) -> NDArray:
+        return _block_error_arr(np.exp(log_snrs), np.asarray(n), np.asarray(k))
+
+    num_points = 257
+    while True:
+        log_snrs = np.linspace(lo, hi, num_points)
+        values = exact(log_snrs)
+        midpoints = (log_snrs[:-1] + log_snrs[1:]) / 2
+        interp_error = np.max(np.abs((values[:-1] + values[1:]) / 2 - exact(midpoints)))
+        if interp_error <= tol / 2:
+            break
+        if num_points >= _BLER_TABLE_SIZE_MAX:
+            return None
+        num_points = 2 * num_points - 1
+
+    values[-1] = 0.0
+    return _BlerTable(
+        log_snr_min=lo,
+        log_snr_step=(hi - lo) / (num_points - 1),
+        values=values,
+        slopes=np.append(np.diff(values), 0.0),
+    )
+
+
+@overload
+def block_error_tab(snr: float, n: int, k: int, tol: float = 1e-6) -> float: ...
+
+
+@overload
+def block_error_tab(
+    snr: ArrayLike, n: ArrayLike, k: ArrayLike, tol: float = 1e-6
+) -> NDArray: ...
+
+
+def block_error_tab(
+    snr: float | ArrayLike, n: int | ArrayLike, k: int | ArrayLike, tol: float = 1e-6
+) -> float | NDArray:
+    """Calculate the Block Error Rate by interpolation in a precomputed table.
+
+    This is a faster alternative to `block_error()` for many SNRs with the same
+    `n` and `k`. For each pair of `n` and `k`, a table of Block Error Rates is
+    built on a uniform log-SNR grid, fine enough for the absolute interpolation
+    error to be within `tol`, and the tables are kept in a bounded LRU cache.
+    Within the range of the table, the Block Error Rate is linearly interpolated
+    in log-SNR. Outside of it, the exact Block Error Rate is constant: one below
+    the SNR threshold, and zero above the SNR where the Q-function underflows.
+    For invalid SNRs (zero, negative or NaN), if `n` or `k` are arrays, and if
+    `tol` is too small to be met by a table of bounded size, the Block Error
+    Rate is calculated exactly with `block_error()`.
+
+    Args:
+      snr: Instantaneous signal-to-noise ratio, or array of such ratios.
+      n: Total number of bits.
+      k: Number of information bits.
+      tol: Maximum absolute interpolation error.
+
+    Returns:
+      The Block Error Rate, or an array with the Block Error Rate for each SNR.
+    """
+    if not tol > 0:
+        raise ValueError(f"`tol` ({tol}) must be greater than 0")
+    if not (np.isscalar(n) and np.isscalar(k)):
+        return block_error(snr, n, k)
+
+    n, k = cast(int, n), cast(int, k)
+    table = _bler_table(int(n), int(k), float(tol))
+    if table is None:
+        return block_error(snr, n, k)
+
+    snr_arr = np.asarray(snr, dtype=float)
+    shape = snr_arr.shape
+    snr_arr = snr_arr.reshape(-1)
+    last = len(table.values) - 1
+
+    # Position of each SNR in the grid, computed in place to avoid temporaries
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pos = np.log(snr_arr)
+    pos -= table.log_snr_min
+    pos /= table.log_snr_step
+    below = pos < 0
+
+    # Linear interpolation between the grid points around each SNR, where SNRs
+    # above the table get its last value, i.e. zero, and SNRs below it get one
+    np.fmax(pos, 0, out=pos)
+    np.fmin(pos, last, out=pos)
+    idx = pos.astype(np.intp)
+    pos -= idx
+    pos *= table.slopes.take(idx)
+    pos += table.values.take(idx)
+    err = pos
+    err[below] = 1.0
+
+    # Exact Block Error Rate for invalid SNRs
+    invalid = ~(snr_arr > 0)
+    if invalid.any():
+        err[invalid] = _block_error_arr(snr_arr[invalid], np.asarray(n), np.asarray(k))
+
+    return float(err[0]) if np.isscalar(snr) else err.reshape(shape)
+
+
+@overload
+def block_error_th(snr_avg: float, n: int, k: int) -> float: ...
+
+
+@overload
+def block_error_th(snr_avg: ArrayLike, n: ArrayLike, k: ArrayLike) -> NDArray: ...
+
+
+def block_error_th(
+    snr_avg: float | ArrayLike, n: int | ArrayLike, k: int | ArrayLike
+) -> float | NDArray:
     """Calculate the theoretical Block Error Rate for the given average SNR, n, k.
 
+    Arguments can also be arrays, which are broadcast against each other, in
+    which case the theoretical Block Error Rate is calculated element-wise.
+
     Args:
       snr_avg: Average Signal-to-noise ratio.
       n: Total number of bits.
       k: Number of information bits.
 
     Returns:
-      The theoretical Block Error Rate.
+      The theoretical Block Error Rate, or an array with the theoretical Block
+        Error Rate for each element of the broadcast arguments.
     """
+    if not (np.isscalar(snr_avg) and np.isscalar(n) and np.isscalar(k)):
+        return _block_error_th_arr(np.asarray(snr_avg), np.asarray(n), np.asarray(k))
+
+    snr_avg, n, k = cast(float, snr_avg), cast(int, n), cast(int, k)
     try:
         beta = 1 / (2 * math.pi * math.sqrt((2 ** (2 * k / n)) - 1))
     except ArithmeticError:
@@ -69,3 +320,52 @@ def block_error_th(snr_avg: float, n: int, k: int) -> float:
         )
     )
     return err_th
+
+
+def _block_error_th_bounds(
+    n: NDArray, k: NDArray
+) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+    """Get the parameters of the linear approximation of the Block Error Rate.
+
+    Around the SNR threshold `2 ** (k / n) - 1`, the Block Error Rate is
+    approximated by a line with slope `-beta * sqrt(n)`, which is 1 below
+    `phi_bas` and 0 above `delta`.
+
+    Args:
+      n: Array of total number of bits.
+      k: Array of number of information bits.
+
+    Returns:
+      A tuple containing arrays with `beta`, `phi_bas`, `delta`, and whether
+        `beta` can't be calculated, in which case the scalar version of
+        `block_error_th()` assumes the worst-case scenario.
+    """
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        pow_2k_n = 2.0 ** (2 * k / n)
+        den = 2 * math.pi * np.sqrt(pow_2k_n - 1)
+        beta = 1 / den
+
+        sim_phi = (2.0 ** (k / n)) - 1
+        phi_bas = sim_phi - (1 / (2 * beta * np.sqrt(n)))
+        delta = sim_phi + (1 / (2 * beta * np.sqrt(n)))
+
+    beta_error = (n == 0) | ~np.isfinite(pow_2k_n) | (den == 0)
+    return beta, phi_bas, delta, beta_error
+
+
+def _block_error_th_arr(snr_avg: NDArray, n: NDArray, k: NDArray) -> NDArray:
+    """Array version of `block_error_th()`."""
+    beta, phi_bas, delta, beta_error = _block_error_th_bounds(n, k)
+
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        err_th = 1 - (
+            (beta * np.sqrt(n) * snr_avg)
+            * (
+                np.exp(-1 * phi_bas * (1 / snr_avg))
+                - np.exp(-1 * delta * (1 / snr_avg))
+            )
+        )
+
+    # Assume the worst-case scenario where beta can't be calculated, i.e. where
+    # the scalar version raises an arithmetic error
+    return np.where(beta_error, 1.0, err_th)
@@ -0,0 +1,168 @@
+"""Persistent on-disk cache for the results of parameter combinations."""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of simulation results.
+
+    Each entry is a JSON file containing the row of results for a parameter
+    combination, and is identified by a hash of the canonicalized parameter
+    combination, the number of runs, the seed, the simulation options and the
+    package version. When the total size of the entries exceeds `max_size`, the
+    least recently used entries are evicted.
+
+    Args:
+      directory: Folder where the cache entries are stored (created if it
+        doesn't exist).
+      max_size: Maximum total size of the cache entries in bytes.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_size: int = 2**30):
+        """Create a new cache in the given folder."""
+        if max_size <= 0:
+            raise ValueError(f"`max_size` ({max_size}) must be greater than 0")
+
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Keep track of the total size of the entries
+        self._size = sum(f.stat().st_size for f in self._entries())
+
+    def _entries(self) -> list[Path]:
+        """Get the files of the existing cache entries."""
+        return list(self.directory.glob("*.json"))
+
+    def _path(self, key: str) -> Path:
+        """Get the file of the cache entry with the given key."""
+        return self.directory / f"{key}.json"
+
+    @staticmethod
+    def key(
+        combo: NamedTuple,
+        num_runs: int,
+        seed: int,
+        sim_opts: Mapping[str, Any],
+    ) -> str:
+        """Get the cache key for the results of a parameter combination.
+
+        Relay parameters which default to the source node parameters are
+        resolved, and numbers are normalized, so that equivalent parameter
+        combinations share the same key.
+
+        Args:
+          combo: Parameter combination.
+          num_runs: Number of simulation runs.
+          seed: Seed used for simulating the parameter combination.
+          sim_opts: Additional simulation options (e.g. the engine).
+
+        Returns:
+          The cache key, an hexadecimal SHA-256 digest.
+        """
+        params = combo._asdict()
+        for param in ("num_bits", "info_bits", "power", "distance", "N0"):
+            if params[f"{param}_2"] is None:
+                params[f"{param}_2"] = params[param]
+
+        canonical = {
+            "combo": {
+                p: int(v) if p.startswith(("num_", "info_")) else float(v)
+                for p, v in params.items()
+            },
+            "num_runs": int(num_runs),
+            "seed": int(seed),
+            "sim_opts": dict(sim_opts),
+            "version": importlib.metadata.version("agenet"),
+        }
+
+        return hashlib.sha256(
+            json.dumps(canonical, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Get the cached row of results for the given key.
+
+        Args:
+          key: Cache key, as returned by `key()`.
+
+        Returns:
+          The cached row of results, or `None` if there is no such entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                row = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path)
+        return row
+
+    def put(self, key: str, row: Mapping[str, Any]) -> None:
+        """Store a row of results in the cache, evicting old entries if required.
+
+        Args:
+          key: Cache key, as returned by `key()`.
+          row: Row of results to store.
+        """
+        path = self._path(key)
+        data = json.dumps(dict(row), default=_to_builtin)
+
+        # Write to a temporary file first so that entries are never partial
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(data)
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        self._size += path.stat().st_size - old_size
+
+        if self._size > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its size."""
+        entries = []
+        for f in self._entries():
+            try:
+                stat = f.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, f))
+
+        # Recompute the size, since other processes may share the cache
+        self._size = sum(size for _, size, _ in entries)
+
+        for _, size, f in sorted(entries, key=lambda e: e[0]):
+            if self._size <= self.max_size:
+                break
+            try:
+                f.unlink()
+            except OSError:
+                continue
+            self._size -= size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        for f in self._entries():
+            f.unlink(missing_ok=True)
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Number of entries in the cache."""
+        return len(self._entries())
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert NumPy scalars to built-in types for JSON serialization."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
@@ -0,0 +1,339 @@
+"""Small-scale fading channel models."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import overload
+
+import numpy as np
+import scipy.special as sp
+from numpy.random import Generator
+from numpy.typing import ArrayLike, NDArray
+
+from .blkerr import (
+    _block_error_range,
+    _block_error_th_bounds,
+    block_error,
+    block_error_th,
+)
+
+
+@lru_cache(maxsize=None)
+def _gauss_legendre(num_points: int) -> tuple[NDArray, NDArray]:
+    """Get the nodes and weights of Gauss-Legendre quadrature on [-1, 1]."""
+    return np.polynomial.legendre.leggauss(num_points)
+
+
+class Channel(ABC):
+    """Base class of small-scale fading channel models.
+
+    A channel model describes the distribution of the power gain `|h|^2` of the
+    small-scale fading, which is normalized to unit mean, so that the
+    instantaneous SNR is the average SNR times the gain. All methods are
+    vectorized, accepting and returning NumPy arrays.
+    """
+
+    @abstractmethod
+    def sample_gain(
+        self, rng: Generator, size: int | tuple[int, ...] | None = None
+    ) -> NDArray:
+        """Draw power gains from the channel model.
+
+        Args:
+          rng: Random number generator.
+          size: Shape of the array of gains to draw (a single gain by default).
+
+        Returns:
+          An array of independent power gains, or a single one if `size` is
+            `None`.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def cdf(self, x: ArrayLike) -> NDArray:
+        """Cumulative distribution function of the power gain.
+
+        This is the outage probability for a normalized SNR threshold `x`, i.e.
+        the probability that the instantaneous SNR is below `x` times the
+        average SNR.
+
+        Args:
+          x: Normalized threshold, or array of normalized thresholds.
+
+        Returns:
+          The probability that the power gain is below each given threshold.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def ppf(self, q: ArrayLike) -> NDArray:
+        """Quantile function (inverse of the CDF) of the power gain.
+
+        Args:
+          q: Probability, or array of probabilities.
+
+        Returns:
+          The power gain below which the gain falls with each given probability.
+        """
+        raise NotImplementedError
+
+    def mean_block_error(self, snr_avg: float, n: int, k: int) -> float:
+        """Calculate the exact Block Error Rate averaged over the fading.
+
+        Unlike `block_error_th()`, which linearly approximates the Block Error
+        Rate around the SNR threshold, the Block Error Rate is averaged by
+        numerical integration over the quantiles of the power gain. Only the
+        range of SNRs where the Block Error Rate is between 0 and 1 is
+        integrated, since it can be very narrow at high average SNRs.
+
+        Args:
+          snr_avg: Average Signal-to-noise ratio.
+          n: Total number of bits.
+          k: Number of information bits.
+
+        Returns:
+          The expected Block Error Rate for a random power gain.
+        """
+        from scipy.integrate import quad
+
+        if snr_avg <= 0 or n <= 0:
+            return 1.0
+
+        def integrand(q: float) -> float:
+            return block_error(snr_avg * float(self.ppf(q)), n, k)
+
+        # Quantiles of the power gain where the Block Error Rate drops from 1
+        # and where it reaches 0, or the whole range if they can't be found
+        log_snr_range = _block_error_range(n, k)
+        if log_snr_range is None:
+            return quad(integrand, 0, 1, limit=200)[0]
+        q_lo, q_hi = (float(self.cdf(np.exp(s) / snr_avg)) for s in log_snr_range)
+
+        return q_lo + (quad(integrand, q_lo, q_hi, limit=200)[0] if q_hi > q_lo else 0)
+
+    def _cdf_area(self, a: NDArray, b: NDArray) -> NDArray:
+        """Integral of the CDF of the power gain between `a` and `b`.
+
+        By default, the integral is computed numerically with Gauss-Legendre
+        quadrature, which is very accurate since the CDF is smooth. Subclasses
+        override this method when a closed form exists.
+        """
+        nodes, weights = _gauss_legendre(32)
+        half = (b - a)[..., None] / 2
+        x = half * nodes + ((a + b)[..., None] / 2)
+        return np.sum(half * weights * self.cdf(x), axis=-1)
+
+    @overload
+    def block_error_th(self, snr_avg: float, n: int, k: int) -> float: ...
+
+    @overload
+    def block_error_th(
+        self, snr_avg: ArrayLike, n: ArrayLike, k: ArrayLike
+    ) -> NDArray: ...
+
+    def block_error_th(
+        self, snr_avg: float | ArrayLike, n: int | ArrayLike, k: int | ArrayLike
+    ) -> float | NDArray:
+        """Calculate the theoretical Block Error Rate averaged over the fading.
+
+        As in `block_error_th()`, the Block Error Rate is linearly approximated
+        around the SNR threshold, so that its average over the fading is
+        proportional to the integral of the CDF of the SNR between the limits
+        of the linear region.
+
+        Args:
+          snr_avg: Average Signal-to-noise ratio.
+          n: Total number of bits.
+          k: Number of information bits.
+
+        Returns:
+          The theoretical Block Error Rate, or an array with the theoretical
+            Block Error Rate for each element of the broadcast arguments.
+        """
+        scalar = np.isscalar(snr_avg) and np.isscalar(n) and np.isscalar(k)
+        snr_avg, n, k = np.broadcast_arrays(snr_avg, n, k)
+        beta, phi_bas, delta, beta_error = _block_error_th_bounds(n, k)
+
+        # The gain is non-negative, so the CDF is zero below zero
+        with np.errstate(divide="ignore", invalid="ignore"):
+            area = self._cdf_area(
+                np.maximum(phi_bas, 0) / snr_avg, np.maximum(delta, 0) / snr_avg
+            )
+            err_th = np.where(beta_error, 1.0, beta * np.sqrt(n) * snr_avg * area)
+
+        return float(err_th) if scalar else err_th
+
+
+@dataclass(frozen=True)
+class Rayleigh(Channel):
+    """Rayleigh fading, i.e. without line of sight.
+
+    The power gain follows a standard exponential distribution.
+    """
+
+    def sample_gain(
+        self, rng: Generator, size: int | tuple[int, ...] | None = None
+    ) -> NDArray:
+        """Draw power gains from the channel model."""
+        return rng.standard_exponential(size)
+
+    def cdf(self, x: ArrayLike) -> NDArray:
+        """Cumulative distribution function of the power gain."""
+        return -np.expm1(-np.maximum(x, 0))
+
+    def ppf(self, q: ArrayLike) -> NDArray:
+        """Quantile function (inverse of the CDF) of the power gain."""
+        return -np.log1p(-np.asarray(q, dtype=float))
+
+    @overload
+    def block_error_th(self, snr_avg: float, n: int, k: int) -> float: ...
+
+    @overload
+    def block_error_th(
+        self, snr_avg: ArrayLike, n: ArrayLike, k: ArrayLike
+    ) -> NDArray: ...
+
+    def block_error_th(
+        self, snr_avg: float | ArrayLike, n: int | ArrayLike, k: int | ArrayLike
+    ) -> float | NDArray:
+        """Calculate the theoretical Block Error Rate with its closed form."""
+        return block_error_th(snr_avg, n, k)
+
+    def __str__(self) -> str:
+        """Specification of the channel model, as accepted by `get_channel()`."""
+        return "rayleigh"
+
+
+@dataclass(frozen=True)
+class Rician(Channel):
+    """Rician fading, i.e. with a line of sight component.
+
+    Args:
+      K: Rician factor, i.e. the ratio between the power of the line of sight
+        component and the power of the scattered components. If zero, this is
+        the same as Rayleigh fading.
+    """
+
+    K: float
+
+    def __post_init__(self):
+        """Check the channel parameters."""
+        if not self.K >= 0:
+            raise ValueError(f"Rician factor `K` ({self.K}) must be non-negative")
+
+    def sample_gain(
+        self, rng: Generator, size: int | tuple[int, ...] | None = None
+    ) -> NDArray:
+        """Draw power gains from the channel model."""
+        # 2(K+1)|h|^2 follows a noncentral chi-squared distribution with two
+        # degrees of freedom and noncentrality 2K
+        return rng.noncentral_chisquare(2, 2 * self.K, size) / (2 * (self.K + 1))
+
+    def cdf(self, x: ArrayLike) -> NDArray:
+        """Cumulative distribution function of the power gain."""
+        from scipy.stats import ncx2
+
+        return ncx2.cdf(2 * (self.K + 1) * np.maximum(x, 0), 2, 2 * self.K)
+
+    def ppf(self, q: ArrayLike) -> NDArray:
+        """Quantile function (inverse of the CDF) of the power gain."""
+        from scipy.stats import ncx2
+
+        return ncx2.ppf(q, 2, 2 * self.K) / (2 * (self.K + 1))
+
+    def __str__(self) -> str:
+        """Specification of the channel model, as accepted by `get_channel()`."""
+        return f"rician:{self.K:g}"
+
+
+@dataclass(frozen=True)
+class Nakagami(Channel):
+    """Nakagami-m fading.
+
+    The power gain follows a gamma distribution with shape `m` and unit mean.
+
+    Args:
+      m: Shape parameter, at least 0.5. For `m = 1` this is the same as Rayleigh
+        fading, and larger values correspond to less severe fading.
+    """
+
+    m: float
+
+    def __post_init__(self):
+        """Check the channel parameters."""
+        if not self.m >= 0.5:
+            raise ValueError(f"Nakagami parameter `m` ({self.m}) must be at least 0.5")
+
+    def sample_gain(
+        self, rng: Generator, size: int | tuple[int, ...] | None = None
+    ) -> NDArray:
+        """Draw power gains from the channel model."""
+        return rng.gamma(self.m, 1 / self.m, size)
+
+    def cdf(self, x: ArrayLike) -> NDArray:
+        """Cumulative distribution function of the power gain."""
+        return sp.gammainc(self.m, self.m * np.maximum(x, 0))
+
+    def ppf(self, q: ArrayLike) -> NDArray:
+        """Quantile function (inverse of the CDF) of the power gain."""
+        return sp.gammaincinv(self.m, q) / self.m
+
+    def _cdf_area(self, a: NDArray, b: NDArray) -> NDArray:
+        """Integral of the CDF of the power gain between `a` and `b`."""
+        # Antiderivative of the CDF, which is the regularized lower incomplete
+        # gamma function P(m, m x), is x P(m, m x) - P(m + 1, m x)
+        m = self.m
+        return (b * sp.gammainc(m, m * b) - sp.gammainc(m + 1, m * b)) - (
+            a * sp.gammainc(m, m * a) - sp.gammainc(m + 1, m * a)
+        )
+
+    def __str__(self) -> str:
+        """Specification of the channel model, as accepted by `get_channel()`."""
+        return f"nakagami:{self.m:g}"
+
+
+_channels: dict[str, type[Channel]] = {
+    "rayleigh": Rayleigh,
+    "rician": Rician,
+    "nakagami": Nakagami,
+}
+"""Channel models available by name."""
+
+
+def get_channel(channel: str | Channel) -> Channel:
+    """Get a channel model from its specification.
+
+    Args:
+      channel: Either a channel model object, or a specification with the name
+        of the model, followed by its parameter after a colon if required, e.g.
+        `"rayleigh"`, `"rician:3"` or `"nakagami:2"`.
+
+    Returns:
+      The specified channel model.
+    """
+    if isinstance(channel, Channel):
+        return channel
+
+    name, _, param = channel.partition(":")
+    if name not in _channels:
+        raise ValueError(
+            f"Unknown channel model `{name}` (available models: "
+            f"{', '.join(_channels.keys())})"
+        )
+
+    model = _channels[name]
+    if model is Rayleigh:
+        if param != "":
+            raise ValueError("The `rayleigh` channel model does not take parameters")
+        return Rayleigh()
+
+    try:
+        value = float(param)
+    except ValueError:
+        raise ValueError(
+            f"The `{name}` channel model requires a numeric parameter, "
+            f"e.g. `{name}:2`"
+        ) from None
+    return model(value)  # type: ignore[call-arg]
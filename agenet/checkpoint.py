@@ -0,0 +1,135 @@
+"""Checkpoint of the simulations completed in a parameter sweep."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from .cache import _to_builtin
+
+
+class Checkpoint:
+    """Checkpoint file of the simulations completed in a parameter sweep.
+
+    The checkpoint is a JSON Lines file. The first line is a header describing
+    the sweep (parameters, number of runs, seed and simulation options), and
+    each of the following lines records a completed simulation: the index of
+    the simulated parameter combination, in the order of the sweep, its derived
+    seed and the rows of results obtained. Each line is flushed as soon as it is
+    written, so that only the simulation in progress is lost if the process is
+    killed. To keep memory bounded, only the seeds of the simulations recorded
+    in this session are kept, while the rows of results are kept for the
+    simulations loaded from the file being resumed.
+
+    Args:
+      path: Checkpoint file.
+      resume: If true and the checkpoint file exists, the simulations recorded
+        in it are loaded and new ones are appended. Otherwise, a new checkpoint
+        file is created, replacing any existing one.
+    """
+
+    def __init__(self, path: str | os.PathLike, resume: bool = False):
+        """Open the checkpoint file, loading its contents if resuming."""
+        self.path = Path(path)
+        self.header: dict[str, Any] | None = None
+        self._seeds: dict[int, int] = {}
+        self._rows: dict[int, dict[int, dict[str, Any]]] = {}
+        self._file: Any = None
+
+        if resume and self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # The last line may be partial if the process was killed
+                        break
+                    if self.header is None:
+                        self.header = entry["header"]
+                    else:
+                        index = entry["index"]
+                        self._seeds[index] = entry["seed"]
+                        self._rows[index] = {
+                            int(n): row for n, row in entry["rows"].items()
+                        }
+
+    def start(self, header: Mapping[str, Any]) -> None:
+        """Start recording simulations, checking that the sweep is the same.
+
+        Args:
+          header: Description of the sweep, which must match the one in the
+            checkpoint file if resuming.
+        """
+        sweep = json.loads(json.dumps(dict(header), default=str))
+        if self.header is not None:
+            if sweep != self.header:
+                raise ValueError(
+                    f"Checkpoint `{self.path}` belongs to a different sweep "
+                    "(parameters, number of runs, seed or simulation options)"
+                )
+
+            # Drop any partial line, so that new entries start on a new line
+            with open(self.path, "rb+") as f:
+                content = f.read()
+                f.truncate(content.rfind(b"\n") + 1)
+            self._file = open(self.path, "a")  # noqa: SIM115
+        else:
+            self.header = sweep
+            self._file = open(self.path, "w")  # noqa: SIM115
+            self._write({"header": sweep})
+
+    def get(self, index: int, seed: int) -> dict[int, dict[str, Any]] | None:
+        """Get the rows of results of a completed simulation.
+
+        Args:
+          index: Index of the simulated parameter combination in the sweep.
+          seed: Seed derived for the parameter combination.
+
+        Returns:
+          The rows of results for each number of events, or `None` if the
+            simulation was not completed or was recorded in this session.
+        """
+        recorded = self._seeds.get(index)
+        if recorded is None:
+            return None
+        if recorded != int(seed):
+            raise ValueError(
+                f"Checkpoint `{self.path}` has a different seed for parameter "
+                f"combination {index} ({recorded}, expected {seed})"
+            )
+        return self._rows.get(index)
+
+    def put(self, index: int, seed: int, rows: Mapping[int, Mapping[str, Any]]) -> None:
+        """Record a completed simulation.
+
+        Args:
+          index: Index of the simulated parameter combination in the sweep.
+          seed: Seed derived for the parameter combination.
+          rows: Rows of results for each number of events.
+        """
+        self._seeds[index] = int(seed)
+        self._write(
+            {
+                "index": index,
+                "seed": int(seed),
+                "rows": {str(n): row for n, row in rows.items()},
+            }
+        )
+
+    def __len__(self) -> int:
+        """Number of completed simulations."""
+        return len(self._seeds)
+
+    def _write(self, entry: Mapping[str, Any]) -> None:
+        """Append an entry to the checkpoint file."""
+        self._file.write(json.dumps(entry, default=_to_builtin) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -10,19 +10,14 @@ from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from multiprocessing import Value
 from threading import Event
-from time import sleep
+from time import perf_counter, sleep
 from typing import NamedTuple
 
-import matplotlib.pyplot as plt
-import numpy as np
 from rich import box
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn
 from rich.style import Style
 from rich_argparse import RichHelpFormatter
-from rich_tools import df_to_table
-
-from .simulation import multi_param_ev_sim
 
 
 def _main() -> int:
@@ -88,6 +83,7 @@ def _main() -> int:
     parser = argparse.ArgumentParser(
         prog="agenet",
         description="Agenet is a Python package to estimate the Age of Information in cooperative wireless networks",
+        epilog="Use `agenet merge SHARD_FILE [SHARD_FILE ...]` to merge the results of the shards of a simulation run with --shard.",
         formatter_class=lambda prog: RichHelpFormatter(prog, console=console),
     )
 
@@ -128,7 +124,72 @@ def _main() -> int:
         "--num-runs",
         type=int,
         default=10,
-        help="Number of simulation runs (default: %(default)s)",
+        help="Number of simulation runs, maximum number if --ci-rel or --ci-abs are given (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--theory-only",
+        action="store_true",
+        help="Only compute the theoretical results, without simulating, which is nearly instantaneous even for very large parameter grids",
+    )
+
+    general_group.add_argument(
+        "--ci-rel",
+        type=float,
+        metavar="WIDTH",
+        help="Run each parameter combination until the half-width of the confidence interval of the simulation AAoI, relative to the latter, is at most WIDTH",
+    )
+
+    general_group.add_argument(
+        "--ci-abs",
+        type=float,
+        metavar="WIDTH",
+        help="Run each parameter combination until the half-width of the confidence interval of the simulation AAoI is at most WIDTH seconds",
+    )
+
+    general_group.add_argument(
+        "--min-runs",
+        type=int,
+        default=10,
+        help="Minimum number of simulation runs with --ci-rel or --ci-abs (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the confidence interval with --ci-rel or --ci-abs (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--importance-sampling",
+        action="store_true",
+        help="Estimate the simulation AAoI with importance sampling, biasing the fading towards deep fades, which is much more precise when block errors are very rare, and report the variance of the estimate",
+    )
+
+    general_group.add_argument(
+        "--is-bias",
+        type=float,
+        metavar="PROB",
+        help="Probability of drawing each fading gain from its deep-fade region with --importance-sampling (default: 1 / number of events)",
+    )
+
+    general_group.add_argument(
+        "--control-variate",
+        action="store_true",
+        help="Estimate the simulation AAoI with the end-to-end error rate of each run as a control variate, which requires a batch engine, and report the variance of the estimate and the variance reduction factor",
+    )
+
+    general_group.add_argument(
+        "--common-random-numbers",
+        action="store_true",
+        help="Simulate all parameter combinations with the same seed and common random numbers, which requires a batch engine, so that results vary smoothly with the parameters",
+    )
+
+    general_group.add_argument(
+        "--antithetic",
+        action="store_true",
+        help="Pair each run with an antithetic run, whose uniform random numbers are complementary, which implies --common-random-numbers",
     )
 
     general_group.add_argument(
@@ -138,6 +199,85 @@ def _main() -> int:
         help="Seed for random number generator (a random seed will be used by default)",
     )
 
+    general_group.add_argument(
+        "--engine",
+        choices=["loop", "vector", "slot", "skip"],
+        default="loop",
+        help="Simulation engine, `vector` simulates all events of a run at once, and `slot` does the same keeping time in integer slots for exact AAoI calculation, and `skip` samples the gaps between deliveries instead of every event (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--channel",
+        default="rayleigh",
+        metavar="MODEL",
+        help="Small-scale fading channel model, either `rayleigh`, `rician:K` with Rician factor K, or `nakagami:m` with shape parameter m (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--bler-tol",
+        type=float,
+        metavar="TOL",
+        help="Interpolate block error rates in precomputed tables with this absolute tolerance, which is faster, instead of calculating them exactly (by default)",
+    )
+
+    general_group.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, 0 uses all CPUs (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--cache-dir",
+        metavar="CACHE_DIR",
+        help="Folder where results are cached and reused in subsequent runs with the same seed",
+    )
+
+    general_group.add_argument(
+        "--cache-size",
+        type=float,
+        default=1024,
+        metavar="MB",
+        help="Maximum size of the result cache in megabytes (default: %(default)s)",
+    )
+
+    general_group.add_argument(
+        "--independent-samples",
+        action="store_true",
+        help="Simulate every parameter combination, even those statistically equivalent to a previous one (e.g. same average SNRs)",
+    )
+
+    general_group.add_argument(
+        "--no-prefix-reuse",
+        action="store_true",
+        help="With the vector and slot engines, simulate each number of events separately instead of obtaining the results for smaller numbers of events from prefixes of the longest simulation",
+    )
+
+    general_group.add_argument(
+        "--checkpoint",
+        metavar="CHECKPOINT_FILE",
+        help="File where each completed simulation is recorded, so that an interrupted simulation can be resumed with --resume",
+    )
+
+    general_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the interrupted simulation recorded in the --checkpoint file, which requires the same simulation parameters, skipping the completed simulations",
+    )
+
+    general_group.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Split the parameter combinations in N shards and only simulate shard I (starting at 0), saving its results to the --shard-file, so that the shards of a simulation can run in parallel on different machines and be merged with `agenet merge` (requires --seed)",
+    )
+
+    general_group.add_argument(
+        "--shard-file",
+        metavar="SHARD_FILE",
+        help="File where the results of the --shard are saved (default: agenet-shard-I-of-N.json)",
+    )
+
     # Per node simulation parameters
     node1_group = parser.add_argument_group(
         "Node", "Node (or source node) simulation parameters"
@@ -238,6 +378,21 @@ def _main() -> int:
         metavar="CSV_FILE",
     )
 
+    output_group.add_argument(
+        "--stream-output",
+        type=str,
+        help="Write results as they are obtained, in chunks, to a CSV file or a Parquet folder (requires pyarrow), depending on the extension (.csv or .parquet), so that partial results survive interruptions",
+        metavar="OUTPUT",
+    )
+
+    output_group.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        metavar="ROWS",
+        help="Number of rows written at a time with --stream-output (default: %(default)s)",
+    )
+
     output_group.add_argument(
         "-p",
         "--show-plot",
@@ -264,8 +419,46 @@ def _main() -> int:
         version="[argparse.prog]%(prog)s[/] v[i]" + agenet_version + "[/]",
     )
 
+    # Parser for the merge subcommand, which merges the results of the shards
+    # of a simulation
+    merge_parser = argparse.ArgumentParser(
+        prog="agenet merge",
+        description="Merge the results of the shards of a simulation run with --shard into the results of the whole simulation",
+        formatter_class=lambda prog: RichHelpFormatter(prog, console=console),
+    )
+
+    merge_parser.add_argument(
+        "shard_files",
+        nargs="+",
+        metavar="SHARD_FILE",
+        help="Files with the results of all the shards, in any order",
+    )
+
+    merge_parser.add_argument(
+        "-t", "--show-table", action="store_true", help="Show table with results"
+    )
+
+    merge_parser.add_argument(
+        "-o",
+        "--save-csv",
+        type=str,
+        help="Save results to CSV file",
+        metavar="CSV_FILE",
+    )
+
+    merge_parser.add_argument(
+        "--debug",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        help="Level of debugging report if an error occurs (default: %(default)s)",
+    )
+
+    merge_parser.set_defaults(show_plot=False, save_plot=None)
+
     # Parse the command line arguments
-    args = parser.parse_args()
+    merging = sys.argv[1:2] == ["merge"]
+    args = merge_parser.parse_args(sys.argv[2:]) if merging else parser.parse_args()
 
     console.print(f"[{agenet_color}]agenet[/] v[i]{agenet_version}[/i]")
 
@@ -278,65 +471,84 @@ def _main() -> int:
         # Event for signalling the simulation to stop
         stop_event = Event()
 
-        # At least one simulation argument is required to run the simulation
-        sim_args = {
-            "-f",
-            "--frequency",
-            "-e",
-            "--num-events",
-            "-r",
-            "--num-runs",
-            "-s",
-            "--seed",
-            "--num-bits",
-            "--info-bits",
-            "--power",
-            "--distance",
-            "--N0",
-            "--num-bits-2",
-            "--info-bits-2",
-            "--power-2",
-            "--distance-2",
-            "--N0-2",
-        }
-
-        if len(set(sys.argv) & sim_args) == 0:
-            parser.print_help()
-            raise ValueError(
-                "The agenet command requires at least one simulation parameter."
+        # Streaming result writer, if requested
+        writer = None
+
+        if merging:
+
+            from .shards import merge_shards
+
+            results, param_error_log = merge_shards(args.shard_files)
+            run_log.append(
+                RunLogMsg(
+                    message=f"Merged the results of {len(args.shard_files)} shards",
+                    msg_type=MsgType.INFO,
+                )
             )
 
-        # Determine the total number of steps (parameter combinations)
-        total_steps = (
-            len(args.frequency)
-            * len(args.num_events)
-            * len(args.num_bits)
-            * len(args.info_bits)
-            * len(args.power)
-            * len(args.distance)
-            * len(args.N0)
-            * len(args.num_bits_2)
-            * len(args.info_bits_2)
-            * len(args.power_2)
-            * len(args.distance_2)
-            * len(args.N0_2)
-        )
-
-        # Run the simulation within the context of a progress bar
-        with Progress(
-            SpinnerColumn(),
-            *Progress.get_default_columns(),
-            console=console,
-            transient=True,
-        ) as progress:
-            task = progress.add_task("", total=total_steps)
-
-            with ThreadPoolExecutor(max_workers=1) as executor:
-
-                # Execute the simulation in a separate thread
-                future = executor.submit(
-                    multi_param_ev_sim,
-                    num_runs=args.num_runs,
+        else:
+
+            # At least one simulation argument is required to run the simulation
+            sim_args = {
+                "-f",
+                "--frequency",
+                "-e",
+                "--num-events",
+                "-r",
+                "--num-runs",
+                "-s",
+                "--seed",
+                "--num-bits",
+                "--info-bits",
+                "--power",
+                "--distance",
+                "--N0",
+                "--num-bits-2",
+                "--info-bits-2",
+                "--power-2",
+                "--distance-2",
+                "--N0-2",
+            }
+
+            if len(set(sys.argv) & sim_args) == 0:
+                parser.print_help()
+                raise ValueError(
+                    "The agenet command requires at least one simulation parameter."
+                )
+
+            if args.resume and args.checkpoint is None:
+                raise ValueError("The --resume option requires a --checkpoint file.")
+
+            # Parse the shard of the simulation to run, if any
+            shard = None
+            if args.shard is not None:
+                shard_index, _, num_shards = args.shard.partition("/")
+                try:
+                    shard = (int(shard_index), int(num_shards))
+                except ValueError:
+                    raise ValueError(
+                        f"Invalid shard `{args.shard}`, expected I/N (e.g. 0/4)."
+                    ) from None
+                if args.theory_only:
+                    raise ValueError(
+                        "The --shard option is not available with --theory-only."
+                    )
+
+            # Only import the simulation modules (and NumPy, SciPy and pandas) when a
+            # simulation is actually run, so that the command starts quickly
+            from .cache import ResultCache
+            from .simulation import multi_param_ev_sim, multi_param_th
+            from .writer import ResultWriter
+
+            # Create the streaming result writer, if requested
+            if args.stream_output is not None:
+                writer = ResultWriter(args.stream_output, args.chunk_size)
+
+            if args.theory_only:
+
+                # Compute the theoretical results for all combinations at once
+                start_time = perf_counter()
+                results, param_error_log = multi_param_th(
                     frequency=sorted(set(args.frequency)),
                     num_events=sorted(set(args.num_events)),
                     num_bits=sorted(set(args.num_bits)),
@@ -349,44 +561,202 @@ def _main() -> int:
                     power_2=sorted(set(args.power_2)),
                     distance_2=sorted(set(args.distance_2)),
                     N0_2=sorted(set(args.N0_2)),
-                    seed=args.seed,
-                    counter=counter,
-                    stop_event=stop_event,
+                    channel=args.channel,
                 )
-
-                try:
-                    # Update progress bar while the simulation is running
-                    while not future.done():
-                        # Small delay to avoid excessive CPU usage
-                        sleep(0.1)
-                        # Update progress bar a little bit more
-                        progress.update(task, completed=counter.value)
-
-                except KeyboardInterrupt:
-                    stop_event.set()
-                    progress.stop()
-                    run_log.append(
-                        RunLogMsg(
-                            message="Simulation terminated early by user!",
-                            msg_type=MsgType.WARNING,
-                        )
-                    )
-
-                # Get the result after the task finishes
-                results, param_error_log = future.result()
-
-                # Log the time taken to run the simulation
-                elapsed_time = progress.tasks[task].elapsed
+                if writer is not None:
+                    with writer:
+                        for row in results.to_dict("records"):
+                            writer.write(row)
                 run_log.append(
                     RunLogMsg(
-                        message=f"Elapsed simulation time: {elapsed_time:.2f} seconds",
+                        message=f"Elapsed computation time: {perf_counter() - start_time:.2f} seconds",
                         msg_type=MsgType.INFO,
                     )
                 )
 
+            else:
+
+                # Open the result cache, if requested
+                cache = None
+                if args.cache_dir is not None:
+                    cache = ResultCache(args.cache_dir, int(args.cache_size * 2**20))
+
+                # Determine the total number of steps (parameter combinations)
+                total_steps = (
+                    len(args.frequency)
+                    * len(args.num_events)
+                    * len(args.num_bits)
+                    * len(args.info_bits)
+                    * len(args.power)
+                    * len(args.distance)
+                    * len(args.N0)
+                    * len(args.num_bits_2)
+                    * len(args.info_bits_2)
+                    * len(args.power_2)
+                    * len(args.distance_2)
+                    * len(args.N0_2)
+                )
+
+                # Run the simulation within the context of a progress bar
+                with Progress(
+                    SpinnerColumn(),
+                    *Progress.get_default_columns(),
+                    console=console,
+                    transient=True,
+                ) as progress:
+                    task = progress.add_task("", total=total_steps)
+
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+
+                        # Execute the simulation in a separate thread
+                        future = executor.submit(
+                            multi_param_ev_sim,
+                            num_runs=args.num_runs,
+                            frequency=sorted(set(args.frequency)),
+                            num_events=sorted(set(args.num_events)),
+                            num_bits=sorted(set(args.num_bits)),
+                            info_bits=sorted(set(args.info_bits)),
+                            power=sorted(set(args.power)),
+                            distance=sorted(set(args.distance)),
+                            N0=sorted(set(args.N0)),
+                            num_bits_2=sorted(set(args.num_bits_2)),
+                            info_bits_2=sorted(set(args.info_bits_2)),
+                            power_2=sorted(set(args.power_2)),
+                            distance_2=sorted(set(args.distance_2)),
+                            N0_2=sorted(set(args.N0_2)),
+                            seed=args.seed,
+                            counter=counter,
+                            stop_event=stop_event,
+                            engine=args.engine,
+                            channel=args.channel,
+                            bler_tol=args.bler_tol,
+                            workers=args.jobs if args.jobs != 0 else None,
+                            cache=cache,
+                            merge_equivalent=not args.independent_samples,
+                            reuse_prefixes=not args.no_prefix_reuse,
+                            rel_half_width=args.ci_rel,
+                            abs_half_width=args.ci_abs,
+                            min_runs=args.min_runs,
+                            confidence=args.confidence,
+                            importance_sampling=args.importance_sampling,
+                            is_bias=args.is_bias,
+                            control_variate=args.control_variate,
+                            common_random_numbers=args.common_random_numbers,
+                            antithetic=args.antithetic,
+                            checkpoint=args.checkpoint,
+                            resume=args.resume,
+                            output=writer,
+                            shard=shard,
+                            # Results are only kept in memory if needed for output
+                            keep_results=writer is None
+                            or shard is not None
+                            or args.show_table
+                            or args.save_csv is not None
+                            or args.show_plot
+                            or args.save_plot is not None,
+                        )
+
+                        try:
+                            # Update progress bar while the simulation is running
+                            while not future.done():
+                                # Small delay to avoid excessive CPU usage
+                                sleep(0.1)
+                                # Update progress bar a little bit more
+                                progress.update(task, completed=counter.value)
+
+                        except KeyboardInterrupt:
+                            stop_event.set()
+                            progress.stop()
+                            run_log.append(
+                                RunLogMsg(
+                                    message="Simulation terminated early by user!",
+                                    msg_type=MsgType.WARNING,
+                                )
+                            )
+
+                        # Get the result after the task finishes
+                        results, param_error_log = future.result()
+
+                        # Log the time taken to run the simulation and the throughput
+                        elapsed_time = progress.tasks[task].elapsed or 0.0
+                        throughput = (
+                            counter.value / elapsed_time if elapsed_time > 0 else 0.0
+                        )
+                        run_log.append(
+                            RunLogMsg(
+                                message=f"Elapsed simulation time: {elapsed_time:.2f} seconds "
+                                f"({throughput:.2f} combinations/second)",
+                                msg_type=MsgType.INFO,
+                            )
+                        )
+
+                # Save the results of the shard, unless they're incomplete
+                if shard is not None:
+                    if stop_event.is_set():
+                        run_log.append(
+                            RunLogMsg(
+                                message="Shard results not saved, since the simulation was terminated early",
+                                msg_type=MsgType.WARNING,
+                            )
+                        )
+                    else:
+                        from .shards import save_shard
+
+                        shard_file = (
+                            args.shard_file
+                            or f"agenet-shard-{shard[0]}-of-{shard[1]}.json"
+                        )
+                        save_shard(
+                            shard_file,
+                            results,
+                            param_error_log,
+                            shard,
+                            {
+                                param: getattr(args, param)
+                                for param in (
+                                    "frequency",
+                                    "num_events",
+                                    "num_bits",
+                                    "info_bits",
+                                    "power",
+                                    "distance",
+                                    "N0",
+                                    "num_bits_2",
+                                    "info_bits_2",
+                                    "power_2",
+                                    "distance_2",
+                                    "N0_2",
+                                    "num_runs",
+                                    "seed",
+                                    "engine",
+                                    "channel",
+                                    "bler_tol",
+                                    "independent_samples",
+                                    "no_prefix_reuse",
+                                    "ci_rel",
+                                    "ci_abs",
+                                    "min_runs",
+                                    "confidence",
+                                    "importance_sampling",
+                                    "is_bias",
+                                    "control_variate",
+                                    "common_random_numbers",
+                                    "antithetic",
+                                )
+                            },
+                        )
+                        run_log.append(
+                            RunLogMsg(
+                                message=f"Results of shard {shard[0]}/{shard[1]} saved to `{shard_file}`",
+                                msg_type=MsgType.INFO,
+                            )
+                        )
+
         # Process output options
         if args.show_table:
 
+            from rich_tools import df_to_table
+
             table = df_to_table(results)
             table.row_styles = ["none", "dim"]
             table.box = box.SIMPLE_HEAD
@@ -409,6 +779,14 @@ def _main() -> int:
                 )
             )
 
+        if writer is not None:
+            run_log.append(
+                RunLogMsg(
+                    message=f"{writer.num_rows} rows of results written to `{args.stream_output}`",
+                    msg_type=MsgType.INFO,
+                )
+            )
+
         if args.show_plot or args.save_plot is not None:
             aoi_vs_param: tuple[str, str, list[float | int]]
             num_var_params = 0
@@ -443,18 +821,29 @@ def _main() -> int:
                 raise ValueError("Unable to create plot: insufficient simulation data.")
             else:
 
+                import matplotlib.pyplot as plt
+                import numpy as np
+
                 fig, ax = plt.subplots()
-                aaoi_theory = results["aaoi_theory"]
-                aaoi_sim = results["aaoi_sim"]
-                if np.isinf(aaoi_theory).any() or np.isinf(aaoi_sim).any():
+
+                # Simulation results are not available with --theory-only
+                aaoi_series = [
+                    (results[column], label)
+                    for column, label in [
+                        ("aaoi_theory", "Theoretical"),
+                        ("aaoi_sim", "Simulation"),
+                    ]
+                    if column in results
+                ]
+                if any(np.isinf(aaoi).any() for aaoi, _ in aaoi_series):
                     raise ValueError(
                         "Unable to create plot: some AAoI values are infinite."
                     )
-                ax.plot(results[aoi_vs_param[0]], aaoi_theory, label="Theoretical")
-                ax.plot(results[aoi_vs_param[0]], aaoi_sim, label="Simulation")
+                for aaoi, label in aaoi_series:
+                    ax.plot(results[aoi_vs_param[0]], aaoi, label=label)
                 ax.set_xlabel(aoi_vs_param[1])
                 ax.set_ylabel("AAoI")
-                ax.set_ylim((0, max([aaoi_theory.max(), aaoi_sim.max()]) * 1.05))
+                ax.set_ylim((0, max(aaoi.max() for aaoi, _ in aaoi_series) * 1.05))
                 ax.grid(True)
                 ax.legend()
                 if args.save_plot is not None:
@@ -489,6 +878,8 @@ def _main() -> int:
 
     # Show plot if it exists and was requested by user
     if args.show_plot and plot_to_display is not None:
+        import matplotlib.pyplot as plt
+
         plt.show()
 
     return return_code
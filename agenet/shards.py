@@ -0,0 +1,106 @@
+"""Saving and merging the results of shards of a parameter sweep."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Mapping, MutableSequence, Sequence
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from .cache import _to_builtin
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def save_shard(
+    path: str | os.PathLike,
+    results: pd.DataFrame,
+    param_error_log: Mapping[str, Sequence[NamedTuple]],
+    shard: tuple[int, int],
+    sweep: Mapping[str, Any] | None = None,
+) -> None:
+    """Save the results of a shard of a parameter sweep to a JSON file.
+
+    Args:
+      path: Shard file.
+      results: Results of the shard, as returned by `multi_param_ev_sim()`.
+      param_error_log: Log of invalid parameter combinations of the shard, as
+        returned by `multi_param_ev_sim()`.
+      shard: Index of the shard (starting at 0) and number of shards.
+      sweep: Optional description of the sweep (e.g. parameters, number of
+        runs and seed), which must be the same for all shards of the sweep.
+    """
+    data = {
+        "shard": list(shard),
+        "sweep": sweep,
+        "columns": list(results.columns),
+        "rows": [list(values) for values in results.itertuples(index=False)],
+        "param_errors": {
+            err_msg: [list(combo) for combo in combos]
+            for err_msg, combos in param_error_log.items()
+        },
+    }
+
+    # Write to a temporary file first so that shard files are never partial
+    tmp_path = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, default=_to_builtin)
+    os.replace(tmp_path, path)
+
+
+def merge_shards(
+    paths: Sequence[str | os.PathLike],
+) -> tuple[pd.DataFrame, dict[str, Sequence[NamedTuple]]]:
+    """Merge the results of all the shards of a parameter sweep.
+
+    Args:
+      paths: Shard files, as saved by `save_shard()`, in any order.
+
+    Returns:
+      A tuple containing a DataFrame with the results of the sweep and a log
+        highlighting invalid parameters or parameter combinations, the same as
+        returned by `multi_param_ev_sim()` for the whole sweep.
+    """
+    import pandas as pd
+
+    from .simulation import ParamCombo
+
+    shards: dict[int, dict[str, Any]] = {}
+    num_shards = None
+    sweep = None
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        index, n = data["shard"]
+
+        if num_shards is None:
+            num_shards, sweep = n, data["sweep"]
+        elif n != num_shards or data["sweep"] != sweep:
+            raise ValueError(f"Shard file `{path}` belongs to a different sweep")
+        if index in shards:
+            raise ValueError(f"Shard {index}/{n} given more than once (`{path}`)")
+        shards[index] = data
+
+    if num_shards is None:
+        raise ValueError("No shard files given")
+    missing = sorted(set(range(num_shards)) - shards.keys())
+    if len(missing) > 0:
+        raise ValueError(
+            f"Missing shards of the sweep: {', '.join(f'{i}/{num_shards}' for i in missing)}"
+        )
+
+    # Concatenate rows and invalid combinations in the order of the sweep
+    rows: list[dict[str, Any]] = []
+    param_error_log: dict[str, Sequence[NamedTuple]] = {}
+    for index in range(num_shards):
+        columns = shards[index]["columns"]
+        rows.extend(dict(zip(columns, values)) for values in shards[index]["rows"])
+        for err_msg, combos in shards[index]["param_errors"].items():
+            if err_msg not in param_error_log:
+                param_error_log[err_msg] = []
+            cast(MutableSequence, param_error_log[err_msg]).extend(
+                ParamCombo._make(combo) for combo in combos
+            )
+
+    return pd.DataFrame(rows), param_error_log
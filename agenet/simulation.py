@@ -3,19 +3,35 @@
 from __future__ import annotations
 
 import itertools
-from collections import namedtuple
-from collections.abc import MutableSequence, Sequence
+import math
+import multiprocessing
+import os
+import signal
+from collections import OrderedDict, deque
+from collections.abc import Generator as PyGenerator
+from collections.abc import Iterable, MutableSequence, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack, closing
+from functools import lru_cache, partial
 from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.synchronize import Event as EventType
 from threading import Event
-from typing import NamedTuple, cast
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, cast
 
 import numpy as np
-import pandas as pd
 from numpy.random import PCG64DXSM, Generator, Philox
+from numpy.typing import NDArray
 
-from .aaoi import aaoi_fn
-from .blkerr import block_error, block_error_th
+from .aaoi import _aaoi_exact_rows, aaoi_fn
+from .blkerr import _block_error_th_bounds, block_error, block_error_tab
+from .cache import ResultCache
+from .channels import Channel, Rayleigh, get_channel
+from .checkpoint import Checkpoint
 from .snratio import snr, snr_avg
+from .writer import ResultWriter
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class _SimParams(NamedTuple):
@@ -72,6 +88,12 @@ class _SimParams(NamedTuple):
     rng: Generator
     """Pseudo-random number generator to use for the simulation."""
 
+    channel: Channel
+    """Small-scale fading channel model."""
+
+    bler_tol: float | None
+    """Tolerance of the tabulated Block Error Rate, or `None` if exact."""
+
 
 class _SimParamError(ValueError):
     """Thrown when a simulation parameter or parameter combination is invalid."""
@@ -93,6 +115,8 @@ def _param_validate(
     distance_2: float | None = None,
     N0_2: float | None = None,
     seed: int | np.signedinteger | None = None,
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
 ) -> _SimParams:
     """Check given simulation parameters and return object with final parameters."""
     # Distance between the relay and destination
@@ -153,6 +177,11 @@ def _param_validate(
             f"`num_bits_2` ({num_bits_2}) must be equal or greater than `num_bits` ({num_bits})"
         )
 
+    # The tolerance of the tabulated Block Error Rate is not a parameter of the
+    # communication system, so it is not logged as an invalid combination
+    if bler_tol is not None and not bler_tol > 0:
+        raise ValueError(f"`bler_tol` ({bler_tol}) must be greater than 0")
+
     # Initialize PCG64DXSM generator
     rng = Generator(PCG64DXSM(seed))
 
@@ -162,10 +191,11 @@ def _param_validate(
 
     # Block error rate at the relay node
 
-    er1_th = block_error_th(snr1_avg, num_bits, info_bits)
+    channel = get_channel(channel)
+    er1_th = channel.block_error_th(snr1_avg, num_bits, info_bits)
 
     # Block error rate at the destination node
-    er2_th = block_error_th(snr2_avg, num_bits_2, info_bits_2)
+    er2_th = channel.block_error_th(snr2_avg, num_bits_2, info_bits_2)
 
     # Return validate parameter object
     return _SimParams(
@@ -186,9 +216,18 @@ def _param_validate(
         snr2_avg=snr2_avg,
         blkerr2_th=er2_th,
         rng=rng,
+        channel=channel,
+        bler_tol=bler_tol,
     )
 
 
+def _bler_fn(bler_tol: float | None) -> Callable[..., Any]:
+    """Get the function calculating the Block Error Rate, exact or tabulated."""
+    if bler_tol is None:
+        return block_error
+    return partial(block_error_tab, tol=bler_tol)
+
+
 def _sim(
     frequency: float,
     num_events: int,
@@ -205,6 +244,8 @@ def _sim(
     N0_2: float,
     blkerr2_th: float,
     rng: Generator,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
 ) -> tuple[float, float]:
     """Low-level function for simulating a communication system and obtaining the AAoI.
 
@@ -228,6 +269,9 @@ def _sim(
       N0_2: Noise power for the relay or access point.
       blkerr2_th: Theoretical block error for the relay or access point.
       rng: Pseudo-random number generator to use for the simulation.
+      channel: Small-scale fading channel model.
+      bler_tol: If given, Block Error Rates are interpolated in tables with this
+        absolute tolerance (see `block_error_tab()`) instead of calculated exactly.
 
     Returns:
       A tuple containing the theoretical AAoI and the simulation AAoI.
@@ -253,16 +297,23 @@ def _sim(
 
     er_p_th = blkerr1_th + (blkerr2_th * (1 - blkerr1_th))
 
+    # Exact or tabulated Block Error Rate
+    bler = _bler_fn(bler_tol)
+
+    # Rayleigh fading is the default of `snr()`, which is faster without a
+    # channel model
+    fading = None if isinstance(channel, Rayleigh) else channel
+
     for i in range(0, num_events):
         # SNR for the source nodes at the relay or access point
-        snr1 = snr(N0_1, distance_1, power_1, frequency, seed=rng)
-        snr2 = snr(N0_2, distance_2, power_2, frequency, seed=rng)
+        snr1 = snr(N0_1, distance_1, power_1, frequency, seed=rng, channel=fading)
+        snr2 = snr(N0_2, distance_2, power_2, frequency, seed=rng, channel=fading)
 
         # block error rate for the source nodes at the relay or access point
-        er1 = block_error(snr1, num_bits_1, info_bits_1)
+        er1 = bler(snr1, num_bits_1, info_bits_1)
 
         # block error rate for the relay or access point at the destination
-        er2 = block_error(snr2, num_bits_2, info_bits_2)
+        er2 = bler(snr2, num_bits_2, info_bits_2)
 
         er_p = er1 + (er2 * (1 - er1))
         er_indi = int(rng.random() > er_p)
@@ -303,198 +354,2439 @@ def _sim(
     return aaoi_th, aaoi_sim
 
 
-def sim(
+_BATCH_SIZE = 1 << 20
+"""Maximum number of events simulated at once by `_sim_batch()`."""
+
+_GAP_BLOCK = 256
+"""Number of gaps per run drawn at once by `_sim_skip_batch()` by inversion."""
+
+
+def _uniforms(rng: Generator, shape: tuple[int, int], antithetic: bool) -> NDArray:
+    """Draw uniform random numbers in (0, 1) for several runs.
+
+    The numbers are the midpoints of `2^52` equal subintervals, so that neither
+    0 nor 1 are drawn and `1 - u` is exactly representable for each number `u`.
+
+    Args:
+      rng: Pseudo-random number generator.
+      shape: Number of runs (rows) and of numbers per run (columns).
+      antithetic: If true, only the first half of the runs is drawn, and the
+        second half is its antithetic counterpart, i.e. `1 - u` for each number
+        `u` of the corresponding run of the first half.
+
+    Returns:
+      A 2D array with the uniform random numbers of each run.
+    """
+    runs, size = shape
+    scale = float(1 << 52)
+    draws = (runs + 1) // 2 if antithetic else runs
+    u = (rng.integers(0, 1 << 52, (draws, size)) + 0.5) / scale
+    return np.vstack([u, 1 - u])[:runs] if antithetic else u
+
+
+def _sim_batch(
     frequency: float,
     num_events: int,
-    num_bits: int,
-    info_bits: int,
-    power: float,
-    distance: float,
-    N0: float,
-    num_bits_2: int | None = None,
-    info_bits_2: int | None = None,
-    power_2: float | None = None,
-    distance_2: float | None = None,
-    N0_2: float | None = None,
-    seed: int | np.signedinteger | None = None,
-) -> tuple[float, float, float, float, float, float]:
-    """Simulates a communication system and calculates the AAoI.
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    blkerr1_th: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+    blkerr2_th: float,
+    rng: Generator,
+    num_runs: int,
+    horizons: Sequence[int] | None = None,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
+    slots: bool = False,
+    failure_rate: NDArray | None = None,
+    common_random_numbers: bool = False,
+    antithetic: bool = False,
+) -> tuple[float, NDArray]:
+    """Vectorized simulation of several runs of a communication system.
+
+    Instead of looping over the events, this function draws the fading
+    coefficients, the instantaneous SNRs, the block errors and the success
+    indicators for all events of several runs at once as 2D NumPy arrays, with
+    one row per run. The AAoI of each run is computed analytically. In order to
+    bound memory usage, runs are simulated in chunks of at most `_BATCH_SIZE`
+    events. Results follow the same distribution as the ones produced by
+    `_sim()`, although the pseudo-random numbers are consumed in a different
+    order.
+
+    Optionally, the AAoI can also be obtained for prefixes of each run, i.e. for
+    the first events of the run, as if it had been simulated for fewer events.
+
+    Since events occur once per transmission period, time can also be kept in
+    integer slots, with the transmission period as the unit. The AAoI is then
+    computed in exact integer arithmetic, without cumulative rounding errors,
+    and scaled to seconds once at the end.
+
+    The fading gains and the success indicators can also be obtained by
+    inversion of uniform random numbers, one per gain and indicator, so that
+    simulations with the same seed and different parameters use common random
+    numbers, and so that runs can be paired with antithetic runs.
 
     Args:
       frequency: Signal frequency in Hertz.
       num_events: Number of events to simulate.
-      num_bits: Number of bits in a block.
-      info_bits: Number of bits in a message.
-      power: Transmission power in Watts.
-      distance: Distance between nodes.
-      N0: Noise power in Watts.
-      num_bits_2: Number of bits in a block at relay or access point.
-      info_bits_2: Number of bits in a message at relay or access point.
-      power_2: Transmission power in Watts at relay or access point.
-      distance_2: Distance between relay or access point and the destination.
-      N0_2: Noise power in Watts at relay or access point.
-      seed: Seed for the random number generator (optional).
+      num_bits_1: Number of bits in a block for the source node.
+      info_bits_1: Number of bits in a message for the source node.
+      power_1: Power in Watts (source node).
+      distance_1: Distance between source node and relay.
+      N0_1: Noise power for the source node.
+      blkerr1_th: Theoretical block error for the source node.
+      num_bits_2: Number of bits in a block for the relay or access point.
+      info_bits_2: Number of bits in a message for the relay or access point.
+      power_2: Power in Watts (relay or access point).
+      distance_2: Distance between source node and destination.
+      N0_2: Noise power for the relay or access point.
+      blkerr2_th: Theoretical block error for the relay or access point.
+      rng: Pseudo-random number generator to use for the simulation.
+      channel: Small-scale fading channel model.
+      bler_tol: If given, Block Error Rates are interpolated in tables with this
+        absolute tolerance (see `block_error_tab()`) instead of calculated exactly.
+      num_runs: Number of runs to simulate.
+      horizons: Number of events of the run prefixes for which to obtain the
+        AAoI (optional, by default only `num_events` is considered).
+      slots: Whether to keep time in integer slots instead of seconds.
+      failure_rate: Optional array, with one row per run and one column per
+        horizon, where the fraction of the events of each run prefix whose
+        packet was not delivered is stored.
+      common_random_numbers: Whether to obtain all random variables by
+        inversion of uniform random numbers.
+      antithetic: Whether to pair each run with an antithetic run, whose uniform
+        random numbers are the complements of the ones of the first run. Implies
+        `common_random_numbers`.
 
     Returns:
-       A tuple containing: theoretical AAoI, simulation AAoI, theoretical SNR at
-         source node, theoretical SNR at relay or access point, theoretical block
-         error at source node, theoretical SNR at relay or access point.
+      A tuple containing the theoretical AAoI and a 2D array with the simulation
+        AAoI for each run (rows) and horizon (columns).
     """
-    # Parse params and get an object of validated simulation parameters
-    params = _param_validate(
-        frequency=frequency,
-        num_events=num_events,
-        num_bits=num_bits,
-        info_bits=info_bits,
-        power=power,
-        distance=distance,
-        N0=N0,
-        num_bits_2=num_bits_2,
-        info_bits_2=info_bits_2,
-        power_2=power_2,
-        distance_2=distance_2,
-        N0_2=N0_2,
-        seed=seed,
-    )
+    if horizons is None:
+        horizons = [num_events]
+    inversion = common_random_numbers or antithetic
 
-    # Call the low-level function to actually perform the simulation
-    return (
-        *_sim(
-            frequency=params.frequency,
-            num_events=params.num_events,
-            num_bits_1=params.num_bits_1,
-            info_bits_1=params.info_bits_1,
-            power_1=params.power_1,
-            distance_1=params.distance_1,
-            N0_1=params.N0_1,
-            blkerr1_th=params.blkerr1_th,
-            num_bits_2=params.num_bits_2,
-            info_bits_2=params.info_bits_2,
-            power_2=params.power_2,
-            distance_2=params.distance_2,
-            N0_2=params.N0_2,
-            blkerr2_th=params.blkerr2_th,
-            rng=params.rng,
-        ),
-        params.snr1_avg,
-        params.snr2_avg,
-        params.blkerr1_th,
-        params.blkerr2_th,
-    )
+    # symbol time
+    symbol_time = 60e-6
 
+    # Transmission period
+    transmission_period = (num_bits_1 + num_bits_2) * symbol_time
 
-def ev_sim(
-    num_runs: int,
+    er_p_th = blkerr1_th + (blkerr2_th * (1 - blkerr1_th))
+
+    # Choose a small threshold
+    if abs(1 - er_p_th) < 1e-20:
+        if failure_rate is not None:
+            failure_rate[:] = 1.0
+        return float("inf"), np.full((num_runs, len(horizons)), float("inf"))
+
+    aaoi_th = (transmission_period) * (0.5 + (1 / (1 - er_p_th)))
+
+    # Arrival and departure timestamps, in seconds or in integer slots
+    arrival_timestamps: NDArray
+    if slots:
+        arrival_timestamps = np.arange(1, num_events + 1, dtype=np.int64)
+        departure_timestamps = arrival_timestamps + 1
+    else:
+        arrival_timestamps = transmission_period * np.arange(1, num_events + 1)
+        departure_timestamps = arrival_timestamps + transmission_period
+
+    aaoi_sim = np.empty((num_runs, len(horizons)))
+    chunk_runs = max(1, _BATCH_SIZE // num_events)
+
+    # Antithetic pairs of runs must be in the same chunk
+    if antithetic:
+        chunk_runs += chunk_runs % 2
+
+    # Exact or tabulated Block Error Rate
+    bler = _bler_fn(bler_tol)
+
+    for start in range(0, num_runs, chunk_runs):
+        runs = min(chunk_runs, num_runs - start)
+        shape = (runs, num_events)
+
+        # Instantaneous SNRs for the source node and for the relay or access
+        # point, for all events of the runs in this chunk
+        if inversion:
+            snr1 = snr_avg(N0_1, distance_1, power_1, frequency) * channel.ppf(
+                _uniforms(rng, shape, antithetic)
+            )
+            snr2 = snr_avg(N0_2, distance_2, power_2, frequency) * channel.ppf(
+                _uniforms(rng, shape, antithetic)
+            )
+        else:
+            snr1 = snr(
+                N0_1,
+                distance_1,
+                power_1,
+                frequency,
+                seed=rng,
+                size=shape,
+                channel=channel,
+            )
+            snr2 = snr(
+                N0_2,
+                distance_2,
+                power_2,
+                frequency,
+                seed=rng,
+                size=shape,
+                channel=channel,
+            )
+
+        # Block error rates for both hops and end-to-end
+        er1 = bler(snr1, num_bits_1, info_bits_1)
+        er2 = bler(snr2, num_bits_2, info_bits_2)
+        er_p = er1 + (er2 * (1 - er1))
+
+        # Which packets were successfully decoded at the destination
+        uniform = _uniforms(rng, shape, antithetic) if inversion else rng.random(shape)
+        delivered = uniform > er_p
+
+        # The first delivered packet is taken as generated at time zero, as in
+        # `_sim()`, where the age is also observed until the departure time of
+        # the last event
+        num_delivered = np.cumsum(delivered, axis=1)
+        first = delivered & (num_delivered == 1)
+        generation_times = np.where(first, 0, arrival_timestamps)
+
+        aaoi_chunk = _aaoi_exact_rows(
+            np.broadcast_to(departure_timestamps, shape),
+            generation_times,
+            delivered,
+            horizons,
+        )
+
+        if failure_rate is not None:
+            ends = np.asarray(horizons)
+            failure_rate[start : start + runs] = 1 - num_delivered[:, ends - 1] / ends
+
+        # Convert the AAoI from slots to seconds
+        if slots:
+            aaoi_chunk *= transmission_period
+
+        # Runs where no packets were delivered have infinite AAoI
+        aaoi_chunk[np.isnan(aaoi_chunk)] = float("inf")
+        aaoi_sim[start : start + runs] = aaoi_chunk
+
+    return aaoi_th, aaoi_sim
+
+
+def _sim_vec(
     frequency: float,
     num_events: int,
-    num_bits: int,
-    info_bits: int,
-    power: float,
-    distance: float,
-    N0: float,
-    num_bits_2: int | None = None,
-    info_bits_2: int | None = None,
-    power_2: float | None = None,
-    distance_2: float | None = None,
-    N0_2: float | None = None,
-    seed: int | np.signedinteger | None = None,
-) -> tuple[float, float, float, float, float, float]:
-    """Run the simulation `num_runs` times and return the AAoI expected value.
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    blkerr1_th: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+    blkerr2_th: float,
+    rng: Generator,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
+    slots: bool = False,
+) -> tuple[float, float]:
+    """Vectorized version of `_sim()`, i.e. `_sim_batch()` for a single run.
 
     Args:
-      num_runs: Number of times to run the simulation.
       frequency: Signal frequency in Hertz.
       num_events: Number of events to simulate.
-      num_bits: Number of bits in a block.
-      info_bits: Number of bits in a message.
-      power: Transmission power in Watts.
-      distance: Distance between nodes.
-      N0: Noise power in Watts.
-      num_bits_2: Number of bits in a block at relay or access point.
-      info_bits_2: Number of bits in a message at relay or access point.
-      power_2: Transmission power in Watts at relay or access point.
-      distance_2: Distance between relay or access point and the destination.
-      N0_2: Noise power in Watts at relay or access point.
-      seed: Seed for the random number generator (optional).
+      num_bits_1: Number of bits in a block for the source node.
+      info_bits_1: Number of bits in a message for the source node.
+      power_1: Power in Watts (source node).
+      distance_1: Distance between source node and relay.
+      N0_1: Noise power for the source node.
+      blkerr1_th: Theoretical block error for the source node.
+      num_bits_2: Number of bits in a block for the relay or access point.
+      info_bits_2: Number of bits in a message for the relay or access point.
+      power_2: Power in Watts (relay or access point).
+      distance_2: Distance between source node and destination.
+      N0_2: Noise power for the relay or access point.
+      blkerr2_th: Theoretical block error for the relay or access point.
+      rng: Pseudo-random number generator to use for the simulation.
+      channel: Small-scale fading channel model.
+      bler_tol: If given, Block Error Rates are interpolated in tables with this
+        absolute tolerance (see `block_error_tab()`) instead of calculated exactly.
+      slots: Whether to keep time in integer slots instead of seconds.
 
     Returns:
-      A tuple containing the expected value for the theoretical AAoI and the
-        simulation AAoI.
+      A tuple containing the theoretical AAoI and the simulation AAoI.
     """
-    # Parse params and get an object of validated simulation parameters
-    params = _param_validate(
+    aaoi_th, aaoi_sim = _sim_batch(
         frequency=frequency,
         num_events=num_events,
-        num_bits=num_bits,
-        info_bits=info_bits,
-        power=power,
-        distance=distance,
-        N0=N0,
+        num_bits_1=num_bits_1,
+        info_bits_1=info_bits_1,
+        power_1=power_1,
+        distance_1=distance_1,
+        N0_1=N0_1,
+        blkerr1_th=blkerr1_th,
         num_bits_2=num_bits_2,
         info_bits_2=info_bits_2,
         power_2=power_2,
         distance_2=distance_2,
         N0_2=N0_2,
-        seed=seed,
+        blkerr2_th=blkerr2_th,
+        rng=rng,
+        num_runs=1,
+        channel=channel,
+        bler_tol=bler_tol,
+        slots=slots,
     )
 
-    ev_aaoi_th_run = 0.0
-    ev_aaoi_sim_run = 0.0
-
-    for _ in range(num_runs):
-
-        # Run the simulation
-        av_aaoi_th_i, av_aaoi_sim_i = _sim(
-            frequency=params.frequency,
-            num_events=params.num_events,
-            num_bits_1=params.num_bits_1,
-            info_bits_1=params.info_bits_1,
-            power_1=params.power_1,
-            distance_1=params.distance_1,
-            N0_1=params.N0_1,
-            blkerr1_th=params.blkerr1_th,
-            num_bits_2=params.num_bits_2,
-            info_bits_2=params.info_bits_2,
-            power_2=params.power_2,
-            distance_2=params.distance_2,
-            N0_2=params.N0_2,
-            blkerr2_th=params.blkerr2_th,
-            rng=params.rng,
-        )
+    # If no packets were delivered, return infinity for both, as in `_sim()`
+    if np.isinf(aaoi_sim[0, 0]):
+        return float("inf"), float("inf")
 
-        # Return infinity for both if theoretical is infinity
-        if np.isinf(av_aaoi_th_i):
-            return (
-                float("inf"),
-                float("inf"),
-                params.snr1_avg,
-                params.snr2_avg,
-                params.blkerr1_th,
-                params.blkerr2_th,
-            )
+    return aaoi_th, float(aaoi_sim[0, 0])
 
-        # Sum the AAoI's
-        ev_aaoi_th_run += av_aaoi_th_i
-        ev_aaoi_sim_run += av_aaoi_sim_i
 
-    # Divide the AAoI's by the number of runs to get the expected value (mean)
-    ev_aaoi_th_run /= num_runs
-    ev_aaoi_sim_run /= num_runs
+@lru_cache(maxsize=1024)
+def _success_prob(
+    channel: Channel,
+    frequency: float,
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+) -> float:
+    """Probability that a packet is delivered through both hops.
 
-    # Return results
-    return (
-        ev_aaoi_th_run,
-        ev_aaoi_sim_run,
-        params.snr1_avg,
-        params.snr2_avg,
-        params.blkerr1_th,
-        params.blkerr2_th,
+    The Block Error Rate of each hop is averaged over the fading of the channel
+    model. Results are cached, since the numerical integration is much slower
+    than sampling the delivery gaps.
+    """
+    er1 = channel.mean_block_error(
+        snr_avg(N0_1, distance_1, power_1, frequency), num_bits_1, info_bits_1
     )
+    er2 = channel.mean_block_error(
+        snr_avg(N0_2, distance_2, power_2, frequency), num_bits_2, info_bits_2
+    )
+    return (1 - er1) * (1 - er2)
 
 
-def multi_param_ev_sim(
-    num_runs: int,
-    frequency: Sequence[float],
+def _sim_skip_batch(
+    frequency: float,
+    num_events: int,
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    blkerr1_th: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+    blkerr2_th: float,
+    rng: Generator,
+    num_runs: int,
+    horizons: Sequence[int] | None = None,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
+    failure_rate: NDArray | None = None,
+    common_random_numbers: bool = False,
+    antithetic: bool = False,
+) -> tuple[float, NDArray]:
+    """Event-skipping simulation of several runs of a communication system.
+
+    The fading and the block errors are independent from one event to the next,
+    so each packet is delivered with the same probability `p`, the product of
+    the success probabilities of both hops averaged over the fading. The number
+    of events between consecutive deliveries is thus geometric with parameter
+    `p`, and this function samples these gaps directly instead of every event,
+    so that its cost is proportional to the number of deliveries rather than to
+    the number of events. Time is kept in integer slots as in `_sim_batch()`,
+    and results follow the same distribution as the ones produced by it.
+
+    The gaps can also be obtained by inversion of uniform random numbers, so
+    that simulations with the same seed and different parameters use common
+    random numbers, and so that runs can be paired with antithetic runs. In
+    this case, the uniform random numbers of each run must not depend on `p`:
+    runs are split into chunks as in `_sim_batch()`, and the gaps of each chunk
+    are drawn in blocks of `_GAP_BLOCK` gaps per run from a generator of its
+    own, so that the number of gaps needed by a chunk doesn't shift the random
+    numbers of the next ones.
+
+    Args:
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits_1: Number of bits in a block for the source node.
+      info_bits_1: Number of bits in a message for the source node.
+      power_1: Power in Watts (source node).
+      distance_1: Distance between source node and relay.
+      N0_1: Noise power for the source node.
+      blkerr1_th: Theoretical block error for the source node.
+      num_bits_2: Number of bits in a block for the relay or access point.
+      info_bits_2: Number of bits in a message for the relay or access point.
+      power_2: Power in Watts (relay or access point).
+      distance_2: Distance between source node and destination.
+      N0_2: Noise power for the relay or access point.
+      blkerr2_th: Theoretical block error for the relay or access point.
+      rng: Pseudo-random number generator to use for the simulation.
+      num_runs: Number of runs to simulate.
+      horizons: Number of events of the run prefixes for which to obtain the
+        AAoI (optional, by default only `num_events` is considered).
+      channel: Small-scale fading channel model.
+      bler_tol: Unused, since the Block Error Rate is not calculated for each
+        event.
+      failure_rate: Optional array, with one row per run and one column per
+        horizon, where the fraction of the events of each run prefix whose
+        packet was not delivered is stored.
+      common_random_numbers: Whether to obtain the gaps by inversion of uniform
+        random numbers.
+      antithetic: Whether to pair each run with an antithetic run, whose uniform
+        random numbers are the complements of the ones of the first run. Implies
+        `common_random_numbers`.
+
+    Returns:
+      A tuple containing the theoretical AAoI and a 2D array with the simulation
+        AAoI for each run (rows) and horizon (columns).
+    """
+    if horizons is None:
+        horizons = [num_events]
+    inversion = common_random_numbers or antithetic
+
+    # symbol time
+    symbol_time = 60e-6
+
+    # Transmission period
+    transmission_period = (num_bits_1 + num_bits_2) * symbol_time
+
+    er_p_th = blkerr1_th + (blkerr2_th * (1 - blkerr1_th))
+
+    # Choose a small threshold
+    if failure_rate is not None:
+        failure_rate[:] = 1.0
+    if abs(1 - er_p_th) < 1e-20:
+        return float("inf"), np.full((num_runs, len(horizons)), float("inf"))
+
+    aaoi_th = (transmission_period) * (0.5 + (1 / (1 - er_p_th)))
+
+    aaoi_sim = np.full((num_runs, len(horizons)), float("inf"))
+    p = _success_prob(
+        channel,
+        frequency,
+        num_bits_1,
+        info_bits_1,
+        power_1,
+        distance_1,
+        N0_1,
+        num_bits_2,
+        info_bits_2,
+        power_2,
+        distance_2,
+        N0_2,
+    )
+    if not p > 0:
+        return aaoi_th, aaoi_sim
+
+    # Number of deliveries sampled per run, enough for almost all runs to go
+    # past the last event (the remaining ones are extended below)
+    mean = num_events * p
+    num_gaps = min(num_events, math.ceil(mean + 6 * math.sqrt(mean * (1 - p)) + 10))
+
+    # With inversion, neither the chunks nor the blocks of gaps depend on `p`
+    if inversion:
+        chunk_runs = max(1, _BATCH_SIZE // num_events)
+        block = min(num_events, _GAP_BLOCK)
+    else:
+        chunk_runs = max(1, _BATCH_SIZE // num_gaps)
+        block = num_gaps
+
+    # Antithetic pairs of runs must be in the same chunk
+    if antithetic:
+        chunk_runs += chunk_runs % 2
+
+    # Logarithm of the probability that a packet is not delivered, to invert
+    # the geometric distribution
+    log_fail = math.log1p(-p) if p < 1 else -math.inf
+
+    def geometric(gen: Generator, shape: tuple[int, int]) -> NDArray:
+        """Draw gaps between deliveries, by inversion if required."""
+        if not inversion:
+            return gen.geometric(p, shape)
+        gaps = np.floor(np.log(_uniforms(gen, shape, antithetic)) / log_fail) + 1
+
+        # All gaps past the last event are equivalent
+        return np.minimum(gaps, num_events + 1).astype(np.int64)
+
+    # Seeds of the generators of the chunks, drawn before any of the gaps
+    starts = range(0, num_runs, chunk_runs)
+    if inversion:
+        chunk_seeds = rng.integers(0, np.iinfo(np.int64).max, len(starts))
+
+    for i, start in enumerate(starts):
+        runs = min(chunk_runs, num_runs - start)
+        gen = Generator(PCG64DXSM(chunk_seeds[i])) if inversion else rng
+
+        # Events (starting at 1) at which packets are delivered, past the last
+        # event in every run
+        blocks = [geometric(gen, (runs, block)) for _ in range(-(-num_gaps // block))]
+        delivery = np.cumsum(np.hstack(blocks), axis=1)
+        while delivery.shape[1] < num_events and (delivery[:, -1] <= num_events).any():
+            gaps = geometric(gen, (runs, block))
+            delivery = np.hstack([delivery, delivery[:, -1:] + np.cumsum(gaps, axis=1)])
+
+        # Reception and generation times in slots, where the first delivered
+        # packet is taken as generated at time zero, as in `_sim_batch()`
+        receiving_times = delivery + 1
+        generation_times = delivery.copy()
+        generation_times[:, 0] = 0
+        prev_rec = np.zeros_like(receiving_times)
+        prev_rec[:, 1:] = receiving_times[:, :-1]
+        prev_gen = np.zeros_like(generation_times)
+        prev_gen[:, 1:] = generation_times[:, :-1]
+
+        # Accumulate the trapezoids between consecutive deliveries (twice their
+        # area, in exact integer arithmetic)
+        area2 = np.cumsum(
+            (receiving_times - prev_rec)
+            * ((receiving_times - prev_gen) + (prev_rec - prev_gen)),
+            axis=1,
+        )
+
+        for j, horizon in enumerate(horizons):
+            # Last delivery up to the horizon, observed until the departure
+            # time of the last event
+            num_delivered = np.count_nonzero(delivery <= horizon, axis=1)
+            if failure_rate is not None:
+                failure_rate[start : start + runs, j] = 1 - num_delivered / horizon
+            has_rec = num_delivered > 0
+            last = np.maximum(num_delivered - 1, 0)[:, None]
+            last_rec = np.take_along_axis(receiving_times, last, 1)[:, 0]
+            last_gen = np.take_along_axis(generation_times, last, 1)[:, 0]
+            end_time = horizon + 1
+            total2 = np.take_along_axis(area2, last, 1)[:, 0] + (
+                end_time - last_rec
+            ) * ((last_rec - last_gen) + (end_time - last_gen))
+
+            # Runs where no packets were delivered have infinite AAoI
+            aaoi_sim[start : start + runs, j] = np.where(
+                has_rec, total2 / (2 * end_time) * transmission_period, float("inf")
+            )
+
+    return aaoi_th, aaoi_sim
+
+
+def _sim_skip(
+    frequency: float,
+    num_events: int,
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    blkerr1_th: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+    blkerr2_th: float,
+    rng: Generator,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
+) -> tuple[float, float]:
+    """Event-skipping version of `_sim()`, i.e. `_sim_skip_batch()` for a single run.
+
+    Args:
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits_1: Number of bits in a block for the source node.
+      info_bits_1: Number of bits in a message for the source node.
+      power_1: Power in Watts (source node).
+      distance_1: Distance between source node and relay.
+      N0_1: Noise power for the source node.
+      blkerr1_th: Theoretical block error for the source node.
+      num_bits_2: Number of bits in a block for the relay or access point.
+      info_bits_2: Number of bits in a message for the relay or access point.
+      power_2: Power in Watts (relay or access point).
+      distance_2: Distance between source node and destination.
+      N0_2: Noise power for the relay or access point.
+      blkerr2_th: Theoretical block error for the relay or access point.
+      rng: Pseudo-random number generator to use for the simulation.
+      channel: Small-scale fading channel model.
+      bler_tol: Unused, since the Block Error Rate is not calculated for each
+        event.
+
+    Returns:
+      A tuple containing the theoretical AAoI and the simulation AAoI.
+    """
+    aaoi_th, aaoi_sim = _sim_skip_batch(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits_1=num_bits_1,
+        info_bits_1=info_bits_1,
+        power_1=power_1,
+        distance_1=distance_1,
+        N0_1=N0_1,
+        blkerr1_th=blkerr1_th,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        blkerr2_th=blkerr2_th,
+        rng=rng,
+        num_runs=1,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    # If no packets were delivered, return infinity for both, as in `_sim()`
+    if np.isinf(aaoi_sim[0, 0]):
+        return float("inf"), float("inf")
+
+    return aaoi_th, float(aaoi_sim[0, 0])
+
+
+def _sim_is_batch(
+    frequency: float,
+    num_events: int,
+    num_bits_1: int,
+    info_bits_1: int,
+    power_1: float,
+    distance_1: float,
+    N0_1: float,
+    blkerr1_th: float,
+    num_bits_2: int,
+    info_bits_2: int,
+    power_2: float,
+    distance_2: float,
+    N0_2: float,
+    blkerr2_th: float,
+    rng: Generator,
+    num_runs: int,
+    channel: Channel = Rayleigh(),
+    bler_tol: float | None = None,
+    bias: float | None = None,
+) -> tuple[float, NDArray]:
+    """Importance sampling simulation of several runs of a communication system.
+
+    When block errors are very rare, plain Monte Carlo almost never observes a
+    failed delivery. Instead, each power gain is drawn from its deep-fade region
+    (below the upper limit of the linear region of the Block Error Rate around
+    the SNR threshold, see `_block_error_th_bounds()`) with probability `bias`,
+    and from the channel model otherwise. This defensive mixture only requires
+    the CDF and the quantile function of the channel model, and its likelihood
+    ratio is bounded. The AAoI of each run is weighted by the product of the
+    likelihood ratios of its gains. Since the weights have unit mean, the AAoI
+    of a run where all packets are delivered is used as a control, so that only
+    runs with failed deliveries contribute to the variance. Time is kept in
+    integer slots as in `_sim_batch()`.
+
+    Args:
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits_1: Number of bits in a block for the source node.
+      info_bits_1: Number of bits in a message for the source node.
+      power_1: Power in Watts (source node).
+      distance_1: Distance between source node and relay.
+      N0_1: Noise power for the source node.
+      blkerr1_th: Theoretical block error for the source node.
+      num_bits_2: Number of bits in a block for the relay or access point.
+      info_bits_2: Number of bits in a message for the relay or access point.
+      power_2: Power in Watts (relay or access point).
+      distance_2: Distance between source node and destination.
+      N0_2: Noise power for the relay or access point.
+      blkerr2_th: Theoretical block error for the relay or access point.
+      rng: Pseudo-random number generator to use for the simulation.
+      num_runs: Number of runs to simulate.
+      channel: Small-scale fading channel model.
+      bler_tol: If given, Block Error Rates are interpolated in tables with this
+        absolute tolerance (see `block_error_tab()`) instead of calculated exactly.
+      bias: Probability of drawing each power gain from its deep-fade region
+        (optional, by default `1 / num_events`, i.e. about one deep fade per hop
+        and run, and at most 0.5).
+
+    Returns:
+      A tuple containing the theoretical AAoI and an array with an unbiased
+        estimate of the expected simulation AAoI for each run, whose mean and
+        variance are those of the importance sampling estimator.
+    """
+    if bias is None:
+        bias = min(0.5, 1 / num_events)
+
+    # symbol time
+    symbol_time = 60e-6
+
+    # Transmission period
+    transmission_period = (num_bits_1 + num_bits_2) * symbol_time
+
+    er_p_th = blkerr1_th + (blkerr2_th * (1 - blkerr1_th))
+
+    # Choose a small threshold
+    if abs(1 - er_p_th) < 1e-20:
+        return float("inf"), np.full(num_runs, float("inf"))
+
+    aaoi_th = (transmission_period) * (0.5 + (1 / (1 - er_p_th)))
+
+    # Arrival and departure timestamps in integer slots
+    arrival_timestamps = np.arange(1, num_events + 1, dtype=np.int64)
+    departure_timestamps = arrival_timestamps + 1
+
+    # AAoI of a run where all packets are delivered, the first one being taken
+    # as generated at time zero
+    all_generation_times = arrival_timestamps.copy()
+    all_generation_times[0] = 0
+    aaoi_all = _aaoi_exact_rows(
+        departure_timestamps[None],
+        all_generation_times[None],
+        np.ones((1, num_events), dtype=bool),
+    )[0]
+
+    # Deep-fade region of the power gains of each hop, and its probability
+    hops = []
+    for n, k, snr_mean in (
+        (num_bits_1, info_bits_1, snr_avg(N0_1, distance_1, power_1, frequency)),
+        (num_bits_2, info_bits_2, snr_avg(N0_2, distance_2, power_2, frequency)),
+    ):
+        delta = _block_error_th_bounds(np.asarray(n), np.asarray(k))[2]
+        deep_fade = float(np.maximum(delta, 0)) / snr_mean
+        hops.append((n, k, snr_mean, deep_fade, float(channel.cdf(deep_fade))))
+
+    aaoi_sim = np.empty(num_runs)
+    chunk_runs = max(1, _BATCH_SIZE // num_events)
+
+    # Exact or tabulated Block Error Rate
+    bler = _bler_fn(bler_tol)
+
+    for start in range(0, num_runs, chunk_runs):
+        runs = min(chunk_runs, num_runs - start)
+        shape = (runs, num_events)
+
+        er_p = np.zeros(shape)
+        log_weights = np.zeros(runs)
+        for n, k, snr_mean, deep_fade, deep_fade_prob in hops:
+            gains = channel.sample_gain(rng, shape)
+
+            # Draw some gains from the deep-fade region instead, by inversion
+            if deep_fade_prob > 0:
+                biased = rng.random(shape) < bias
+                gains[biased] = channel.ppf(
+                    rng.random(np.count_nonzero(biased)) * deep_fade_prob
+                )
+
+                # Likelihood ratio of each gain, between the channel model and
+                # the mixture from which it was drawn
+                log_weights -= np.sum(
+                    np.log(
+                        np.where(
+                            gains < deep_fade,
+                            (1 - bias) + bias / deep_fade_prob,
+                            1 - bias,
+                        )
+                    ),
+                    axis=1,
+                )
+
+            # Block errors of both hops combined
+            er = bler(snr_mean * gains, n, k)
+            er_p += er * (1 - er_p)
+
+        # Which packets were successfully decoded at the destination
+        delivered = rng.random(shape) > er_p
+
+        # The first delivered packet is taken as generated at time zero, as in
+        # `_sim_batch()`
+        first = delivered & (np.cumsum(delivered, axis=1) == 1)
+        generation_times = np.where(first, 0, arrival_timestamps)
+        aaoi_chunk = _aaoi_exact_rows(
+            np.broadcast_to(departure_timestamps, shape),
+            generation_times,
+            delivered,
+        )
+
+        # Runs where no packets were delivered have infinite AAoI
+        aaoi_chunk[np.isnan(aaoi_chunk)] = float("inf")
+
+        # Weighted difference with the AAoI when all packets are delivered,
+        # converted from slots to seconds
+        aaoi_sim[start : start + runs] = (
+            aaoi_all + np.exp(log_weights) * (aaoi_chunk - aaoi_all)
+        ) * transmission_period
+
+    return aaoi_th, aaoi_sim
+
+
+_engines: dict[str, Callable[..., tuple[float, float]]] = {
+    "loop": _sim,
+    "vector": _sim_vec,
+    "slot": partial(_sim_vec, slots=True),
+    "skip": _sim_skip,
+}
+"""Available simulation engines, i.e. low-level functions which simulate one run."""
+
+_batch_engines: dict[str, Callable[..., tuple[float, NDArray]]] = {
+    "vector": _sim_batch,
+    "slot": partial(_sim_batch, slots=True),
+    "skip": _sim_skip_batch,
+}
+"""Simulation engines which can simulate several runs at once."""
+
+
+def _get_engine(engine: str) -> Callable[..., tuple[float, float]]:
+    """Get the low-level simulation function for the given engine name."""
+    try:
+        return _engines[engine]
+    except KeyError:
+        raise ValueError(
+            f"Unknown simulation engine `{engine}` (available engines: "
+            + ", ".join(f"`{e}`" for e in _engines)
+            + ")"
+        ) from None
+
+
+def sim(
+    frequency: float,
+    num_events: int,
+    num_bits: int,
+    info_bits: int,
+    power: float,
+    distance: float,
+    N0: float,
+    num_bits_2: int | None = None,
+    info_bits_2: int | None = None,
+    power_2: float | None = None,
+    distance_2: float | None = None,
+    N0_2: float | None = None,
+    seed: int | np.signedinteger | None = None,
+    engine: str = "loop",
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+) -> tuple[float, float, float, float, float, float]:
+    """Simulates a communication system and calculates the AAoI.
+
+    Args:
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits: Number of bits in a block.
+      info_bits: Number of bits in a message.
+      power: Transmission power in Watts.
+      distance: Distance between nodes.
+      N0: Noise power in Watts.
+      num_bits_2: Number of bits in a block at relay or access point.
+      info_bits_2: Number of bits in a message at relay or access point.
+      power_2: Transmission power in Watts at relay or access point.
+      distance_2: Distance between relay or access point and the destination.
+      N0_2: Noise power in Watts at relay or access point.
+      seed: Seed for the random number generator (optional).
+      engine: Simulation engine, one of `"loop"` (default, simulates one event
+        at a time), `"vector"` (simulates all events at once using NumPy arrays),
+        `"slot"` (same as `"vector"`, but keeping time in integer slots) or
+        `"skip"` (samples the gaps between deliveries instead of every event).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+
+    Returns:
+       A tuple containing: theoretical AAoI, simulation AAoI, theoretical SNR at
+         source node, theoretical SNR at relay or access point, theoretical block
+         error at source node, theoretical SNR at relay or access point.
+    """
+    # Get the low-level simulation function
+    sim_fn = _get_engine(engine)
+
+    # Parse params and get an object of validated simulation parameters
+    params = _param_validate(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits=num_bits,
+        info_bits=info_bits,
+        power=power,
+        distance=distance,
+        N0=N0,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        seed=seed,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    # Call the low-level function to actually perform the simulation
+    return (
+        *sim_fn(
+            frequency=params.frequency,
+            num_events=params.num_events,
+            num_bits_1=params.num_bits_1,
+            info_bits_1=params.info_bits_1,
+            power_1=params.power_1,
+            distance_1=params.distance_1,
+            N0_1=params.N0_1,
+            blkerr1_th=params.blkerr1_th,
+            num_bits_2=params.num_bits_2,
+            info_bits_2=params.info_bits_2,
+            power_2=params.power_2,
+            distance_2=params.distance_2,
+            N0_2=params.N0_2,
+            blkerr2_th=params.blkerr2_th,
+            rng=params.rng,
+            channel=params.channel,
+            bler_tol=params.bler_tol,
+        ),
+        params.snr1_avg,
+        params.snr2_avg,
+        params.blkerr1_th,
+        params.blkerr2_th,
+    )
+
+
+def _sim_kwargs(params: _SimParams) -> dict[str, Any]:
+    """Get the arguments of the low-level simulation functions from parameters."""
+    return {
+        "frequency": params.frequency,
+        "num_events": params.num_events,
+        "num_bits_1": params.num_bits_1,
+        "info_bits_1": params.info_bits_1,
+        "power_1": params.power_1,
+        "distance_1": params.distance_1,
+        "N0_1": params.N0_1,
+        "blkerr1_th": params.blkerr1_th,
+        "num_bits_2": params.num_bits_2,
+        "info_bits_2": params.info_bits_2,
+        "power_2": params.power_2,
+        "distance_2": params.distance_2,
+        "N0_2": params.N0_2,
+        "blkerr2_th": params.blkerr2_th,
+        "rng": params.rng,
+        "channel": params.channel,
+        "bler_tol": params.bler_tol,
+    }
+
+
+def _ev_sim_batch(
+    params: _SimParams,
+    num_runs: int,
+    engine: str,
+    horizons: Sequence[int] | None = None,
+    common_random_numbers: bool = False,
+    antithetic: bool = False,
+) -> list[tuple[float, float]]:
+    """Get the expected AAoI's by simulating all runs at once with a batch engine.
+
+    Args:
+      params: Validated simulation parameters.
+      num_runs: Number of times to run the simulation.
+      engine: Name of a simulation engine which can simulate several runs at
+        once.
+      horizons: Number of events of the run prefixes for which to obtain the
+        expected AAoI's (optional, by default only `params.num_events` is
+        considered).
+      common_random_numbers: Whether to obtain all random variables by
+        inversion of uniform random numbers.
+      antithetic: Whether to pair each run with an antithetic run.
+
+    Returns:
+      A list with a tuple containing the expected value for the theoretical AAoI
+        and the simulation AAoI for each horizon.
+    """
+    aaoi_th, aaoi_sim = _batch_engines[engine](
+        **_sim_kwargs(params),
+        num_runs=num_runs,
+        horizons=horizons,
+        common_random_numbers=common_random_numbers,
+        antithetic=antithetic,
+    )
+
+    # Get the expected value (mean) of the simulation AAoI, returning infinity
+    # for both if theoretical is infinity or if no packets were delivered in
+    # some run, as in `ev_sim()`
+    return [
+        (
+            (float("inf"), float("inf"))
+            if np.isinf(aaoi_th) or np.isinf(aaoi_sim_h).any()
+            else (aaoi_th, float(np.mean(aaoi_sim_h)))
+        )
+        for aaoi_sim_h in aaoi_sim.T
+    ]
+
+
+def _control_variate(
+    values: NDArray, controls: NDArray, control_mean: float
+) -> tuple[float, float, float]:
+    """Estimate an expected value with a control variate.
+
+    The mean of the values is corrected by the deviation of the mean of the
+    controls from their known expected value, scaled by the coefficient which
+    minimizes the variance of the estimate, i.e. the slope of the least squares
+    regression of the values on the controls.
+
+    Args:
+      values: Values whose expected value is estimated, one per run.
+      controls: Values of the control, one per run.
+      control_mean: Known expected value of the control.
+
+    Returns:
+      A tuple containing the estimated expected value, the variance of the
+        estimate and the variance reduction factor, i.e. the ratio between the
+        variance of the plain mean of the values and the variance of the
+        estimate.
+    """
+    num_runs = len(values)
+    if num_runs < 2:
+        return float(np.mean(values)), float("inf"), 1.0
+
+    cov = np.cov(values, controls)
+    coef = cov[0, 1] / cov[1, 1] if cov[1, 1] > 0 else 0.0
+    adjusted = values - coef * (controls - control_mean)
+    var = float(np.var(adjusted, ddof=1))
+    vrf = float(cov[0, 0]) / var if var > 0 else 1.0
+
+    return float(np.mean(adjusted)), var / num_runs, vrf
+
+
+def _ev_sim_cv_batch(
+    params: _SimParams,
+    num_runs: int,
+    engine: str,
+    horizons: Sequence[int] | None = None,
+    common_random_numbers: bool = False,
+) -> list[tuple[float, float, float, float]]:
+    """Get the expected AAoI's with a control variate, using a batch engine.
+
+    The control is the fraction of the events of each run whose packet was not
+    delivered, whose expected value is the end-to-end Block Error Rate averaged
+    over the fading of the channel model.
+
+    Args:
+      params: Validated simulation parameters.
+      num_runs: Number of times to run the simulation.
+      engine: Name of a simulation engine which can simulate several runs at
+        once.
+      horizons: Number of events of the run prefixes for which to obtain the
+        expected AAoI's (optional, by default only `params.num_events` is
+        considered).
+      common_random_numbers: Whether to obtain all random variables by
+        inversion of uniform random numbers.
+
+    Returns:
+      A list with a tuple containing the expected value for the theoretical AAoI
+        and the simulation AAoI, the variance of the latter and the variance
+        reduction factor of the control variate, for each horizon.
+    """
+    failure_rate = np.empty((num_runs, len(horizons or [params.num_events])))
+    aaoi_th, aaoi_sim = _batch_engines[engine](
+        **_sim_kwargs(params),
+        num_runs=num_runs,
+        horizons=horizons,
+        failure_rate=failure_rate,
+        common_random_numbers=common_random_numbers,
+    )
+
+    # Expected fraction of failed deliveries, which is exact unlike the
+    # theoretical Block Error Rates, which are only approximations
+    failure_mean = 1 - _success_prob(
+        params.channel,
+        params.frequency,
+        params.num_bits_1,
+        params.info_bits_1,
+        params.power_1,
+        params.distance_1,
+        params.N0_1,
+        params.num_bits_2,
+        params.info_bits_2,
+        params.power_2,
+        params.distance_2,
+        params.N0_2,
+    )
+
+    # Return infinity if theoretical is infinity or if no packets were
+    # delivered in some run, as in `ev_sim()`
+    inf = float("inf")
+    return [
+        (
+            (inf, inf, inf, 1.0)
+            if np.isinf(aaoi_th) or np.isinf(aaoi_sim_h).any()
+            else (aaoi_th, *_control_variate(aaoi_sim_h, failure_h, failure_mean))
+        )
+        for aaoi_sim_h, failure_h in zip(aaoi_sim.T, failure_rate.T)
+    ]
+
+
+def _batch_validate(engine: str, technique: str) -> None:
+    """Check that the simulation engine can simulate several runs at once.
+
+    Args:
+      engine: Name of the simulation engine.
+      technique: Name of the simulation technique which requires it, used in
+        the error message.
+    """
+    _get_engine(engine)
+    if engine not in _batch_engines:
+        raise ValueError(
+            f"{technique} require an engine which can simulate several runs "
+            f"at once ({', '.join(f'`{e}`' for e in _batch_engines)}), not `{engine}`"
+        )
+
+
+def ev_sim(
+    num_runs: int,
+    frequency: float,
+    num_events: int,
+    num_bits: int,
+    info_bits: int,
+    power: float,
+    distance: float,
+    N0: float,
+    num_bits_2: int | None = None,
+    info_bits_2: int | None = None,
+    power_2: float | None = None,
+    distance_2: float | None = None,
+    N0_2: float | None = None,
+    seed: int | np.signedinteger | None = None,
+    engine: str = "loop",
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+    common_random_numbers: bool = False,
+    antithetic: bool = False,
+) -> tuple[float, float, float, float, float, float]:
+    """Run the simulation `num_runs` times and return the AAoI expected value.
+
+    With common random numbers, every random variable of the simulation is
+    obtained by inversion of a uniform random number drawn in a fixed order, so
+    that simulations with the same seed and different parameters use the same
+    uniform random numbers, and their results vary smoothly with the
+    parameters. Differences between parameters are then estimated with much
+    less variance than with independent simulations. Antithetic variates go
+    further, pairing each run with a run whose uniform random numbers are the
+    complements of the ones of the first run.
+
+    Args:
+      num_runs: Number of times to run the simulation.
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits: Number of bits in a block.
+      info_bits: Number of bits in a message.
+      power: Transmission power in Watts.
+      distance: Distance between nodes.
+      N0: Noise power in Watts.
+      num_bits_2: Number of bits in a block at relay or access point.
+      info_bits_2: Number of bits in a message at relay or access point.
+      power_2: Transmission power in Watts at relay or access point.
+      distance_2: Distance between relay or access point and the destination.
+      N0_2: Noise power in Watts at relay or access point.
+      seed: Seed for the random number generator (optional).
+      engine: Simulation engine, one of `"loop"` (default, simulates one event
+        at a time), `"vector"` (simulates all events at once using NumPy arrays),
+        `"slot"` (same as `"vector"`, but keeping time in integer slots) or
+        `"skip"` (samples the gaps between deliveries instead of every event).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+      common_random_numbers: Whether to use common random numbers, which
+        requires an engine which can simulate several runs at once.
+      antithetic: Whether to pair runs with antithetic runs, which implies
+        common random numbers.
+
+    Returns:
+      A tuple containing the expected value for the theoretical AAoI and the
+        simulation AAoI.
+    """
+    # Get the low-level simulation function
+    sim_fn = _get_engine(engine)
+    if antithetic:
+        _batch_validate(engine, "Antithetic variates")
+    elif common_random_numbers:
+        _batch_validate(engine, "Common random numbers")
+
+    # Parse params and get an object of validated simulation parameters
+    params = _param_validate(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits=num_bits,
+        info_bits=info_bits,
+        power=power,
+        distance=distance,
+        N0=N0,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        seed=seed,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    # Arguments for the low-level simulation function
+    sim_kwargs = _sim_kwargs(params)
+
+    if engine in _batch_engines:
+
+        # Simulate all runs at once
+        ev_aaoi_th_run, ev_aaoi_sim_run = _ev_sim_batch(
+            params,
+            num_runs,
+            engine,
+            common_random_numbers=common_random_numbers,
+            antithetic=antithetic,
+        )[0]
+
+    else:
+
+        ev_aaoi_th_run = 0.0
+        ev_aaoi_sim_run = 0.0
+
+        for _ in range(num_runs):
+
+            # Run the simulation
+            av_aaoi_th_i, av_aaoi_sim_i = sim_fn(**sim_kwargs)
+
+            # Return infinity for both if theoretical is infinity
+            if np.isinf(av_aaoi_th_i):
+                return (
+                    float("inf"),
+                    float("inf"),
+                    params.snr1_avg,
+                    params.snr2_avg,
+                    params.blkerr1_th,
+                    params.blkerr2_th,
+                )
+
+            # Sum the AAoI's
+            ev_aaoi_th_run += av_aaoi_th_i
+            ev_aaoi_sim_run += av_aaoi_sim_i
+
+        # Divide the AAoI's by the number of runs to get the expected value (mean)
+        ev_aaoi_th_run /= num_runs
+        ev_aaoi_sim_run /= num_runs
+
+    # Return results
+    return (
+        ev_aaoi_th_run,
+        ev_aaoi_sim_run,
+        params.snr1_avg,
+        params.snr2_avg,
+        params.blkerr1_th,
+        params.blkerr2_th,
+    )
+
+
+class _RunStats(NamedTuple):
+    """Streaming statistics of the simulation AAoI over a number of runs."""
+
+    num_runs: int
+    """Number of runs."""
+
+    mean: float
+    """Mean of the simulation AAoI."""
+
+    m2: float
+    """Sum of squared deviations from the mean of the simulation AAoI."""
+
+
+def _update_stats(stats: _RunStats, values: NDArray) -> _RunStats:
+    """Merge the simulation AAoI's of new runs into streaming statistics.
+
+    This is Welford's online algorithm, generalized to batches of values as
+    proposed by Chan et al., which is numerically stable.
+
+    Args:
+      stats: Statistics of the previous runs.
+      values: Simulation AAoI's of the new runs.
+
+    Returns:
+      The statistics of the previous and new runs.
+    """
+    count = len(values)
+    mean = float(np.mean(values))
+    m2 = float(np.sum((values - mean) ** 2))
+    total = stats.num_runs + count
+    delta = mean - stats.mean
+    return _RunStats(
+        num_runs=total,
+        mean=stats.mean + delta * count / total,
+        m2=stats.m2 + m2 + delta**2 * stats.num_runs * count / total,
+    )
+
+
+def _ci_half_width(stats: _RunStats, confidence: float) -> float:
+    """Get the half-width of the Student's t confidence interval of the mean."""
+    from scipy.stats import t as student_t
+
+    if stats.num_runs < 2:
+        return float("inf")
+    std_err = math.sqrt(stats.m2 / (stats.num_runs - 1) / stats.num_runs)
+    return float(student_t.ppf(0.5 + confidence / 2, stats.num_runs - 1) * std_err)
+
+
+def _adaptive_validate(
+    max_runs: int,
+    rel_half_width: float | None,
+    abs_half_width: float | None,
+    min_runs: int,
+    confidence: float,
+) -> None:
+    """Check the options of the adaptive number of runs."""
+    if rel_half_width is None and abs_half_width is None:
+        raise ValueError(
+            "At least one of `rel_half_width` and `abs_half_width` must be given"
+        )
+    if rel_half_width is not None and rel_half_width <= 0:
+        raise ValueError(f"`rel_half_width` ({rel_half_width}) must be greater than 0")
+    if abs_half_width is not None and abs_half_width <= 0:
+        raise ValueError(f"`abs_half_width` ({abs_half_width}) must be greater than 0")
+    if min_runs < 2:
+        raise ValueError(f"`min_runs` ({min_runs}) must be at least 2")
+    if max_runs < min_runs:
+        raise ValueError(
+            f"`max_runs` ({max_runs}) must be equal or greater than `min_runs` ({min_runs})"
+        )
+    if not 0 < confidence < 1:
+        raise ValueError(f"`confidence` ({confidence}) must be between 0 and 1")
+
+
+def ev_sim_adaptive(
+    max_runs: int,
+    frequency: float,
+    num_events: int,
+    num_bits: int,
+    info_bits: int,
+    power: float,
+    distance: float,
+    N0: float,
+    num_bits_2: int | None = None,
+    info_bits_2: int | None = None,
+    power_2: float | None = None,
+    distance_2: float | None = None,
+    N0_2: float | None = None,
+    seed: int | np.signedinteger | None = None,
+    engine: str = "loop",
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+    rel_half_width: float | None = None,
+    abs_half_width: float | None = None,
+    min_runs: int = 10,
+    confidence: float = 0.95,
+) -> tuple[float, float, float, float, float, float, float, int]:
+    """Run the simulation until the AAoI expected value reaches a given precision.
+
+    Runs are performed until the half-width of the confidence interval of the
+    expected simulation AAoI meets all the given targets, with at least
+    `min_runs` and at most `max_runs` runs. The mean and variance of the
+    simulation AAoI are tracked with Welford's streaming algorithm. The loop
+    engine checks the targets after every run, while batch engines (e.g.
+    `"vector"`) simulate `min_runs` runs at a time.
+
+    Args:
+      max_runs: Maximum number of times to run the simulation.
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits: Number of bits in a block.
+      info_bits: Number of bits in a message.
+      power: Transmission power in Watts.
+      distance: Distance between nodes.
+      N0: Noise power in Watts.
+      num_bits_2: Number of bits in a block at relay or access point.
+      info_bits_2: Number of bits in a message at relay or access point.
+      power_2: Transmission power in Watts at relay or access point.
+      distance_2: Distance between relay or access point and the destination.
+      N0_2: Noise power in Watts at relay or access point.
+      seed: Seed for the random number generator (optional).
+      engine: Simulation engine, one of `"loop"` (default, simulates one event
+        at a time), `"vector"` (simulates all events at once using NumPy arrays),
+        `"slot"` (same as `"vector"`, but keeping time in integer slots) or
+        `"skip"` (samples the gaps between deliveries instead of every event).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+      rel_half_width: Target half-width of the confidence interval, relative to
+        the expected simulation AAoI (optional).
+      abs_half_width: Target half-width of the confidence interval, in seconds
+        (optional).
+      min_runs: Minimum number of times to run the simulation.
+      confidence: Confidence level of the confidence interval.
+
+    Returns:
+      A tuple containing the same values as `ev_sim()`, followed by the
+        half-width of the confidence interval of the expected simulation AAoI
+        and the number of runs performed.
+    """
+    _adaptive_validate(max_runs, rel_half_width, abs_half_width, min_runs, confidence)
+
+    # Get the low-level simulation function
+    sim_fn = _get_engine(engine)
+
+    # Parse params and get an object of validated simulation parameters
+    params = _param_validate(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits=num_bits,
+        info_bits=info_bits,
+        power=power,
+        distance=distance,
+        N0=N0,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        seed=seed,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    # Arguments for the low-level simulation function
+    sim_kwargs = _sim_kwargs(params)
+
+    stats = _RunStats(num_runs=0, mean=0.0, m2=0.0)
+    aaoi_th = 0.0
+    half_width = float("inf")
+
+    while stats.num_runs < max_runs:
+
+        # Simulate the next run, or the next batch of runs
+        if engine in _batch_engines:
+            aaoi_th, aaoi_sim = _batch_engines[engine](
+                **sim_kwargs, num_runs=min(min_runs, max_runs - stats.num_runs)
+            )
+            aaoi_sim = aaoi_sim[:, 0]
+        else:
+            aaoi_th, aaoi_sim_i = sim_fn(**sim_kwargs)
+            aaoi_sim = np.array([aaoi_sim_i])
+
+        # Return infinity for both if theoretical is infinity or if no packets
+        # were delivered in some run, as in `ev_sim()`
+        if np.isinf(aaoi_th) or np.isinf(aaoi_sim).any():
+            aaoi_th = float("inf")
+            stats = _RunStats(stats.num_runs + len(aaoi_sim), float("inf"), 0.0)
+            half_width = float("inf")
+            break
+
+        stats = _update_stats(stats, aaoi_sim)
+
+        # Stop as soon as all targets are met
+        if stats.num_runs >= min_runs:
+            half_width = _ci_half_width(stats, confidence)
+            if (abs_half_width is None or half_width <= abs_half_width) and (
+                rel_half_width is None or half_width <= rel_half_width * stats.mean
+            ):
+                break
+
+    return (
+        float(aaoi_th),
+        stats.mean,
+        params.snr1_avg,
+        params.snr2_avg,
+        params.blkerr1_th,
+        params.blkerr2_th,
+        half_width,
+        stats.num_runs,
+    )
+
+
+def ev_sim_is(
+    num_runs: int,
+    frequency: float,
+    num_events: int,
+    num_bits: int,
+    info_bits: int,
+    power: float,
+    distance: float,
+    N0: float,
+    num_bits_2: int | None = None,
+    info_bits_2: int | None = None,
+    power_2: float | None = None,
+    distance_2: float | None = None,
+    N0_2: float | None = None,
+    seed: int | np.signedinteger | None = None,
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+    bias: float | None = None,
+) -> tuple[float, float, float, float, float, float, float]:
+    """Estimate the AAoI expected value with importance sampling.
+
+    In ultra-reliable regimes, block errors are so rare that plain Monte Carlo
+    simulation almost never observes a failed delivery. Here, the fading is
+    biased towards deep fades and the AAoI of each run is re-weighted by the
+    likelihood ratio of its fading, so that the effect of failed deliveries on
+    the AAoI is estimated with a much smaller variance (see `_sim_is_batch()`).
+    All runs are simulated at once with NumPy arrays.
+
+    Args:
+      num_runs: Number of times to run the simulation.
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits: Number of bits in a block.
+      info_bits: Number of bits in a message.
+      power: Transmission power in Watts.
+      distance: Distance between nodes.
+      N0: Noise power in Watts.
+      num_bits_2: Number of bits in a block at relay or access point.
+      info_bits_2: Number of bits in a message at relay or access point.
+      power_2: Transmission power in Watts at relay or access point.
+      distance_2: Distance between relay or access point and the destination.
+      N0_2: Noise power in Watts at relay or access point.
+      seed: Seed for the random number generator (optional).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+      bias: Probability of drawing each fading gain from its deep-fade region
+        instead of the channel model, between 0 (plain Monte Carlo) and 1
+        (exclusive). By default `1 / num_events`, i.e. about one deep fade per
+        hop and run.
+
+    Returns:
+      A tuple containing the same values as `ev_sim()`, followed by the variance
+        of the estimated expected simulation AAoI.
+    """
+    if bias is not None and not 0 <= bias < 1:
+        raise ValueError(f"`bias` ({bias}) must be between 0 and 1 (exclusive)")
+
+    # Parse params and get an object of validated simulation parameters
+    params = _param_validate(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits=num_bits,
+        info_bits=info_bits,
+        power=power,
+        distance=distance,
+        N0=N0,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        seed=seed,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    aaoi_th, aaoi_sim = _sim_is_batch(
+        **_sim_kwargs(params), num_runs=num_runs, bias=bias
+    )
+
+    # Return infinity for both if theoretical is infinity or if no packets
+    # were delivered in some run, as in `ev_sim()`
+    if np.isinf(aaoi_th) or np.isinf(aaoi_sim).any():
+        aaoi_th = ev_aaoi_sim = aaoi_sim_var = float("inf")
+    else:
+        ev_aaoi_sim = float(np.mean(aaoi_sim))
+        aaoi_sim_var = (
+            float(np.var(aaoi_sim, ddof=1)) / num_runs if num_runs > 1 else float("inf")
+        )
+
+    return (
+        float(aaoi_th),
+        ev_aaoi_sim,
+        params.snr1_avg,
+        params.snr2_avg,
+        params.blkerr1_th,
+        params.blkerr2_th,
+        aaoi_sim_var,
+    )
+
+
+def ev_sim_cv(
+    num_runs: int,
+    frequency: float,
+    num_events: int,
+    num_bits: int,
+    info_bits: int,
+    power: float,
+    distance: float,
+    N0: float,
+    num_bits_2: int | None = None,
+    info_bits_2: int | None = None,
+    power_2: float | None = None,
+    distance_2: float | None = None,
+    N0_2: float | None = None,
+    seed: int | np.signedinteger | None = None,
+    engine: str = "vector",
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+    common_random_numbers: bool = False,
+) -> tuple[float, float, float, float, float, float, float, float]:
+    """Estimate the AAoI expected value with a control variate.
+
+    The AAoI of a run grows with the number of packets which were not
+    delivered, whose expected value is known exactly. The mean simulation AAoI
+    is thus corrected by the deviation of the empirical end-to-end error rate
+    of the runs from its expected value, which reduces the variance of the
+    estimate by a factor `1 / (1 - rho^2)`, where `rho` is the correlation
+    between the AAoI and the error rate of a run. The achieved factor is
+    reported along with the variance of the estimate.
+
+    Args:
+      num_runs: Number of times to run the simulation.
+      frequency: Signal frequency in Hertz.
+      num_events: Number of events to simulate.
+      num_bits: Number of bits in a block.
+      info_bits: Number of bits in a message.
+      power: Transmission power in Watts.
+      distance: Distance between nodes.
+      N0: Noise power in Watts.
+      num_bits_2: Number of bits in a block at relay or access point.
+      info_bits_2: Number of bits in a message at relay or access point.
+      power_2: Transmission power in Watts at relay or access point.
+      distance_2: Distance between relay or access point and the destination.
+      N0_2: Noise power in Watts at relay or access point.
+      seed: Seed for the random number generator (optional).
+      engine: Simulation engine, which must be able to simulate several runs at
+        once, i.e. `"vector"` (default), `"slot"` or `"skip"`.
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+      common_random_numbers: Whether to use common random numbers (see
+        `ev_sim()`).
+
+    Returns:
+      A tuple containing the same values as `ev_sim()`, followed by the variance
+        of the estimated expected simulation AAoI and the variance reduction
+        factor of the control variate with respect to plain Monte Carlo
+        simulation.
+    """
+    _batch_validate(engine, "Control variates")
+
+    # Parse params and get an object of validated simulation parameters
+    params = _param_validate(
+        frequency=frequency,
+        num_events=num_events,
+        num_bits=num_bits,
+        info_bits=info_bits,
+        power=power,
+        distance=distance,
+        N0=N0,
+        num_bits_2=num_bits_2,
+        info_bits_2=info_bits_2,
+        power_2=power_2,
+        distance_2=distance_2,
+        N0_2=N0_2,
+        seed=seed,
+        channel=channel,
+        bler_tol=bler_tol,
+    )
+
+    aaoi_th, ev_aaoi_sim, aaoi_sim_var, aaoi_sim_vrf = _ev_sim_cv_batch(
+        params, num_runs, engine, common_random_numbers=common_random_numbers
+    )[0]
+
+    return (
+        float(aaoi_th),
+        ev_aaoi_sim,
+        params.snr1_avg,
+        params.snr2_avg,
+        params.blkerr1_th,
+        params.blkerr2_th,
+        aaoi_sim_var,
+        aaoi_sim_vrf,
+    )
+
+
+class ParamCombo(NamedTuple):
+    """A combination of parameters in a multi-parameter simulation."""
+
+    frequency: float
+    """Signal frequency in Hertz."""
+
+    num_events: int
+    """Number of events to simulate."""
+
+    num_bits: int
+    """Number of bits in a block."""
+
+    info_bits: int
+    """Number of bits in a message."""
+
+    power: float
+    """Transmission power in Watts."""
+
+    distance: float
+    """Distance between nodes."""
+
+    N0: float
+    """Noise power in Watts."""
+
+    num_bits_2: int | None
+    """Number of bits in a block at relay or access point."""
+
+    info_bits_2: int | None
+    """Number of bits in a message at relay or access point."""
+
+    power_2: float | None
+    """Transmission power in Watts at relay or access point."""
+
+    distance_2: float | None
+    """Distance between relay or access point and the destination."""
+
+    N0_2: float | None
+    """Noise power in Watts at relay or access point."""
+
+
+class _ParamGrid:
+    """Lazy, index-addressable Cartesian product of lists of parameters.
+
+    Combinations are enumerated in the same order as `itertools.product()`,
+    i.e. with the last parameter varying fastest, and the combination with a
+    given index is computed directly from the index (mixed-radix decoding), so
+    memory use does not depend on the number of combinations.
+
+    Each combination also has its own seed, derived directly from the index
+    and the seed of the sweep, as the index-th output block of a Philox
+    counter-based generator keyed by the latter. Alternatively, all
+    combinations can share the seed of the first one, for common random
+    numbers.
+
+    Args:
+      param_lists: Lists of values of each parameter, in the order of the
+        fields of `ParamCombo`.
+    """
+
+    _SEED_CHUNK = 4096
+    """Number of seeds derived at a time when iterating over combinations."""
+
+    def __init__(self, *param_lists: Sequence[Any]):
+        """Create the grid of the given lists of parameters."""
+        self.param_lists = [list(values) for values in param_lists]
+        self._size = math.prod(len(values) for values in self.param_lists)
+
+    def __len__(self) -> int:
+        """Number of parameter combinations."""
+        return self._size
+
+    def __getitem__(self, index: int) -> ParamCombo:
+        """Get the parameter combination with the given index."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"Combination index {index} out of range")
+
+        values = []
+        for param_values in reversed(self.param_lists):
+            index, digit = divmod(index, len(param_values))
+            values.append(param_values[digit])
+        return ParamCombo._make(reversed(values))
+
+    def combos(self, start: int = 0, stop: int | None = None) -> Iterable[ParamCombo]:
+        """Iterate over the combinations with indexes in `[start, stop)`."""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start == 0:
+            combos = map(ParamCombo._make, itertools.product(*self.param_lists))
+            return itertools.islice(combos, stop)
+        return (self[i] for i in range(start, stop))
+
+    @staticmethod
+    def seeds(
+        seed: int | np.signedinteger | None, start: int, stop: int
+    ) -> NDArray[np.int64]:
+        """Derive the seeds of the combinations with indexes in `[start, stop)`.
+
+        Args:
+          seed: Seed of the sweep.
+          start: Index of the first combination.
+          stop: Index after the last combination.
+
+        Returns:
+          An array with the non-negative seed of each combination.
+        """
+        bitgen = Philox(key=Philox(seed).state["state"]["key"])
+        bitgen.advance(start)
+        blocks = bitgen.random_raw(4 * (stop - start))[::4]
+        return (blocks >> np.uint64(1)).astype(np.int64)
+
+    def tasks(
+        self,
+        seed: int | np.signedinteger | None,
+        start: int = 0,
+        stop: int | None = None,
+        common_seed: bool = False,
+    ) -> PyGenerator[tuple[int, ParamCombo, np.int64], None, None]:
+        """Iterate over the combinations with indexes in `[start, stop)`.
+
+        Args:
+          seed: Seed of the sweep. If `None`, seeds are not reproducible.
+          start: Index of the first combination.
+          stop: Index after the last combination (the end of the grid if `None`).
+          common_seed: Whether all combinations have the seed of the first one.
+
+        Yields:
+          Tuples with the index of a parameter combination, the combination and
+            its seed.
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        if seed is None:
+            seed = int(cast(int, np.random.SeedSequence().entropy))
+
+        if common_seed:
+            combo_seed = self.seeds(seed, 0, 1)[0]
+            for index, combo in enumerate(self.combos(start, stop), start):
+                yield index, combo, combo_seed
+            return
+
+        combos = iter(self.combos(start, stop))
+        for chunk_start in range(start, stop, self._SEED_CHUNK):
+            chunk_stop = min(chunk_start + self._SEED_CHUNK, stop)
+            seeds = self.seeds(seed, chunk_start, chunk_stop)
+            for index, combo_seed in enumerate(seeds, chunk_start):
+                yield index, next(combos), combo_seed
+
+
+def _shard_range(shard: tuple[int, int], num_combos: int) -> tuple[int, int]:
+    """Get the range of indexes of the combinations in a shard of a sweep.
+
+    Args:
+      shard: Index of the shard (starting at 0) and number of shards.
+      num_combos: Number of combinations in the sweep.
+
+    Returns:
+      The index of the first combination of the shard, and the index after the
+        last one.
+    """
+    index, num_shards = shard
+    if num_shards < 1:
+        raise ValueError(f"Number of shards ({num_shards}) must be greater than 0")
+    if not 0 <= index < num_shards:
+        raise ValueError(
+            f"Shard index ({index}) must be between 0 and {num_shards - 1}"
+        )
+    return index * num_combos // num_shards, (index + 1) * num_combos // num_shards
+
+
+def _combo_ev_sim(
+    num_runs: int,
+    combo: ParamCombo,
+    seed: int | np.signedinteger,
+    sim_opts: dict[str, Any],
+    horizons: Sequence[int] | None = None,
+) -> dict[int, dict[str, Any]] | _SimParamError:
+    """Run `ev_sim()` for a parameter combination and get rows of results.
+
+    This function is executed in worker processes when `multi_param_ev_sim()`
+    runs in parallel, so invalid parameters are returned instead of raised.
+
+    Args:
+      num_runs: Number of times to run the simulation (maximum number of times
+        if the number of runs is adaptive).
+      combo: Parameter combination to simulate.
+      seed: Seed for the random number generator.
+      sim_opts: Additional keyword arguments for `ev_sim()`, or for
+        `ev_sim_adaptive()` if they include `min_runs`. If they include
+        `importance_sampling` or `control_variate`, `ev_sim_is()` or
+        `ev_sim_cv()` is used instead.
+      horizons: Optional number of events of the prefixes of the simulated event
+        traces for which to also obtain results. Requires a batch simulation
+        engine and `combo.num_events` must be the largest horizon.
+
+    Returns:
+      A dictionary with the row of results for each horizon (only
+        `combo.num_events` if no horizons are given), or the error raised if the
+        combination is invalid.
+    """
+    # Names of the results returned by `ev_sim()`
+    names = [
+        "aaoi_theory",
+        "aaoi_sim",
+        "snr1_avg",
+        "snr2_avg",
+        "blkerr1_th",
+        "blkerr2_th",
+    ]
+    combo_kwargs: dict[str, Any] = {
+        "frequency": combo.frequency,
+        "num_events": combo.num_events,
+        "num_bits": combo.num_bits,
+        "info_bits": combo.info_bits,
+        "power": combo.power,
+        "distance": combo.distance,
+        "N0": combo.N0,
+        "num_bits_2": combo.num_bits_2,
+        "info_bits_2": combo.info_bits_2,
+        "power_2": combo.power_2,
+        "distance_2": combo.distance_2,
+        "N0_2": combo.N0_2,
+        "seed": seed,
+    }
+
+    try:
+        if horizons is not None:
+            params = _param_validate(
+                **combo_kwargs,
+                channel=sim_opts["channel"],
+                bler_tol=sim_opts.get("bler_tol"),
+            )
+            if "control_variate" in sim_opts:
+                names += ["aaoi_sim_var", "aaoi_sim_vrf"]
+                batch_results: Sequence[tuple] = _ev_sim_cv_batch(
+                    params,
+                    num_runs,
+                    sim_opts["engine"],
+                    horizons,
+                    common_random_numbers=sim_opts.get("common_random_numbers", False),
+                )
+            else:
+                batch_results = _ev_sim_batch(
+                    params,
+                    num_runs,
+                    sim_opts["engine"],
+                    horizons,
+                    common_random_numbers=sim_opts.get("common_random_numbers", False),
+                    antithetic=sim_opts.get("antithetic", False),
+                )
+            results: list[tuple] = [
+                (
+                    aaoi_th,
+                    aaoi_sim,
+                    params.snr1_avg,
+                    params.snr2_avg,
+                    params.blkerr1_th,
+                    params.blkerr2_th,
+                    *extra,
+                )
+                for aaoi_th, aaoi_sim, *extra in batch_results
+            ]
+        elif "min_runs" in sim_opts:
+            # Adaptive number of runs, which also reports the half-width of the
+            # confidence interval and the number of runs performed
+            names += ["aaoi_sim_ci", "num_runs"]
+            results = [ev_sim_adaptive(num_runs, **combo_kwargs, **sim_opts)]
+        elif "importance_sampling" in sim_opts:
+            # Importance sampling, which also reports the variance of the
+            # estimated expected simulation AAoI
+            names += ["aaoi_sim_var"]
+            results = [
+                ev_sim_is(
+                    num_runs,
+                    **combo_kwargs,
+                    channel=sim_opts["channel"],
+                    bler_tol=sim_opts.get("bler_tol"),
+                    bias=sim_opts["is_bias"],
+                )
+            ]
+        elif "control_variate" in sim_opts:
+            # Control variate, which also reports the variance of the estimated
+            # expected simulation AAoI and the variance reduction factor
+            names += ["aaoi_sim_var", "aaoi_sim_vrf"]
+            results = [
+                ev_sim_cv(
+                    num_runs,
+                    **combo_kwargs,
+                    engine=sim_opts["engine"],
+                    channel=sim_opts["channel"],
+                    bler_tol=sim_opts.get("bler_tol"),
+                    common_random_numbers=sim_opts.get("common_random_numbers", False),
+                )
+            ]
+        else:
+            results = [ev_sim(num_runs, **combo_kwargs, **sim_opts)]
+    except _SimParamError as spe:
+        return spe
+
+    return {
+        int(horizon): {
+            **_combo_params(combo._replace(num_events=horizon)),
+            **dict(zip(names, result)),
+        }
+        for horizon, result in zip(horizons or [combo.num_events], results)
+    }
+
+
+def _combo_params(combo: ParamCombo) -> dict[str, Any]:
+    """Get the parameters of a combination, as they appear in a row of results.
+
+    Relay parameters which are not specified take the value of the respective
+    source node parameters.
+
+    Args:
+      combo: Parameter combination.
+
+    Returns:
+      A dictionary with the parameters of the given combination.
+    """
+    return {
+        "frequency": combo.frequency,
+        "num_events": combo.num_events,
+        "num_bits": combo.num_bits,
+        "info_bits": combo.info_bits,
+        "power": combo.power,
+        "distance": combo.distance,
+        "N0": combo.N0,
+        "num_bits_2": (
+            combo.num_bits if combo.num_bits_2 is None else combo.num_bits_2
+        ),
+        "info_bits_2": (
+            combo.info_bits if combo.info_bits_2 is None else combo.info_bits_2
+        ),
+        "power_2": combo.power if combo.power_2 is None else combo.power_2,
+        "distance_2": (
+            combo.distance if combo.distance_2 is None else combo.distance_2
+        ),
+        "N0_2": combo.N0 if combo.N0_2 is None else combo.N0_2,
+    }
+
+
+def _job_key(
+    combo: ParamCombo, merge_equivalent: bool, reuse_prefixes: bool
+) -> tuple | None:
+    """Get the key of the simulation job to which a parameter combination belongs.
+
+    Combinations with the same job key are obtained from a single simulation.
+
+    The frequency, power, distance and noise power only affect the simulation
+    through the average SNRs, so if `merge_equivalent` is true, combinations
+    with the same average SNRs, bits and number of events are statistically
+    equivalent and share the same job. Average SNRs are compared with 12
+    significant digits, in order to absorb rounding errors.
+
+    If `reuse_prefixes` is true, combinations which differ only in the number of
+    events also share the same job, since their results can be obtained from
+    prefixes of the same event traces.
+
+    Args:
+      combo: Parameter combination.
+      merge_equivalent: Whether equivalent combinations share the same job.
+      reuse_prefixes: Whether combinations which differ only in the number of
+        events share the same job.
+
+    Returns:
+      A hashable key identifying the job of the combination, or `None` if the
+        combination does not share its job or is invalid.
+    """
+    if not merge_equivalent and not reuse_prefixes:
+        return None
+
+    try:
+        params = _param_validate(**combo._asdict(), seed=0)
+    except _SimParamError:
+        return None
+
+    if merge_equivalent:
+        key: tuple = (
+            float(f"{params.snr1_avg:.12g}"),
+            params.num_bits_1,
+            params.info_bits_1,
+            float(f"{params.snr2_avg:.12g}"),
+            params.num_bits_2,
+            params.info_bits_2,
+        )
+    else:
+        key = tuple(v for p, v in _combo_params(combo).items() if p != "num_events")
+
+    return key if reuse_prefixes else (*key, params.num_events)
+
+
+class _JobRep(NamedTuple):
+    """First combination of a simulation job, which determines its outcome."""
+
+    combo_index: int
+    """Index of the combination in the sweep."""
+
+    combo: ParamCombo
+    """Parameter combination."""
+
+    seed: int | np.signedinteger
+    """Seed of the combination."""
+
+
+_JOB_WINDOW = 1 << 12
+"""Maximum number of simulation jobs shared by parameter combinations at a time."""
+
+
+class _JobWindow:
+    """Most recently used simulation jobs of a parameter sweep.
+
+    Only the last `size` jobs to which a combination belonged are kept, so that
+    memory usage does not grow with the number of parameter combinations. A
+    combination whose job was evicted starts a new job. For each job, the first
+    combination and, once available, the results of the job (without the
+    parameters of the simulated combination) are kept.
+
+    Args:
+      size: Maximum number of jobs (`_JOB_WINDOW` by default).
+    """
+
+    def __init__(self, size: int | None = None):
+        """Create an empty window of jobs."""
+        self.size = _JOB_WINDOW if size is None else size
+        self.reps: OrderedDict[tuple, _JobRep] = OrderedDict()
+        self.outcomes: dict[tuple, Any] = {}
+
+    def visit(self, jkey: tuple, rep: _JobRep) -> _JobRep:
+        """Get the first combination of a job, starting the job if required.
+
+        Args:
+          jkey: Job key of a combination.
+          rep: The combination, in case it starts a new job.
+
+        Returns:
+          The first combination of the job.
+        """
+        if jkey in self.reps:
+            self.reps.move_to_end(jkey)
+            return self.reps[jkey]
+
+        self.reps[jkey] = rep
+        if len(self.reps) > self.size:
+            evicted, _ = self.reps.popitem(last=False)
+            self.outcomes.pop(evicted, None)
+        return rep
+
+
+def _job_reps(
+    tasks: Iterable[tuple[int, ParamCombo, int | np.signedinteger]],
+    merge_equivalent: bool,
+    reuse_prefixes: bool,
+) -> _JobWindow:
+    """Get the jobs of some combinations, without simulating anything.
+
+    Args:
+      tasks: Index of each parameter combination in the sweep, the combination
+        and its seed.
+      merge_equivalent: Whether equivalent combinations share the same job.
+      reuse_prefixes: Whether combinations which differ only in the number of
+        events share the same job.
+
+    Returns:
+      The window of jobs after the last combination, the same as when the
+        combinations are evaluated by `_eval_combos()`.
+    """
+    jobs = _JobWindow()
+    if not merge_equivalent and not reuse_prefixes:
+        return jobs
+
+    for index, combo, seed in tasks:
+        jkey = _job_key(combo, merge_equivalent, reuse_prefixes)
+        if jkey is not None:
+            jobs.visit(jkey, _JobRep(index, combo, seed))
+    return jobs
+
+
+class _StoreKey(NamedTuple):
+    """Where to record the outcome of a simulation job."""
+
+    combo_index: int
+    """Index of the simulated parameter combination, for the checkpoint."""
+
+    seed: int
+    """Seed of the simulated parameter combination, for the checkpoint."""
+
+    cache_key: str | None
+    """Cache key, or `None` if the outcome is not to be cached."""
+
+
+_worker_stop_event: EventType | None = None
+"""Event for signalling a worker process to skip any remaining combinations."""
+
+
+def _init_worker(stop_event: EventType) -> None:
+    """Initialize a worker process of `multi_param_ev_sim()`.
+
+    Workers ignore SIGINT, since a CTRL+C is handled by the parent process,
+    which relays its `stop_event` to the workers via the given event.
+
+    Args:
+      stop_event: Event shared by the parent process and all workers.
+    """
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _worker_combo_ev_sim(
+    num_runs: int,
+    combo: ParamCombo,
+    seed: int | np.signedinteger,
+    sim_opts: dict[str, Any],
+    horizons: Sequence[int] | None = None,
+) -> dict[int, dict[str, Any]] | _SimParamError | None:
+    """Same as `_combo_ev_sim()`, but returns `None` if the worker was stopped."""
+    if _worker_stop_event is not None and _worker_stop_event.is_set():
+        return None
+    return _combo_ev_sim(num_runs, combo, seed, sim_opts, horizons)
+
+
+def _eval_combos(
+    num_runs: int,
+    tasks: Iterable[tuple[int, ParamCombo, int | np.signedinteger]],
+    sim_opts: dict[str, Any],
+    workers: int,
+    stop_event: Event | None,
+    cache: ResultCache | None = None,
+    merge_equivalent: bool = False,
+    horizons: Sequence[int] | None = None,
+    checkpoint: Checkpoint | None = None,
+    job_reps: _JobWindow | None = None,
+) -> PyGenerator[tuple[ParamCombo, dict[str, Any] | _SimParamError], None, None]:
+    """Evaluate parameter combinations, yielding their outcomes in order.
+
+    With more than one worker, combinations are evaluated in a process pool,
+    keeping a bounded number of them in flight. Once `stop_event` is set, no new
+    combinations are submitted and workers skip the ones they haven't started
+    yet. Pending combinations are cancelled when the generator is closed.
+
+    Combinations which share the same job (see `_job_key()`) are simulated only
+    once, using the seed of the first one, as long as the job is among the most
+    recently used ones (see `_JobWindow`).
+
+    Args:
+      num_runs: Number of times to run the simulation.
+      tasks: Index of each parameter combination in the sweep, the combination
+        and its seed.
+      sim_opts: Additional keyword arguments for `ev_sim()`.
+      workers: Number of worker processes.
+      stop_event: Optional event for signalling the simulation to stop.
+      cache: Optional cache where results are looked up before simulating a
+        parameter combination, and stored afterwards.
+      merge_equivalent: If true, only the first combination of each equivalence
+        class is simulated, and the remaining ones reuse its results.
+      horizons: If given, combinations which differ only in the number of events
+        are simulated only once, with the largest number of events in
+        `horizons`, and their results are obtained from prefixes of the same
+        event traces. Requires a batch simulation engine.
+      checkpoint: Optional checkpoint where completed simulations are looked up
+        before the cache, and recorded afterwards. Simulations are identified by
+        the index of the simulated combination and its seed.
+      job_reps: Jobs of the combinations before `tasks` (see `_job_reps()`),
+        when only a slice of a sweep is evaluated. Such jobs are simulated with
+        their first combination, so that the outcomes are the same as when
+        evaluating the whole sweep.
+
+    Yields:
+      Pairs of parameter combination and respective outcome, either a row of
+        results or the error raised if the combination is invalid.
+    """
+    jobs = job_reps if job_reps is not None else _JobWindow()
+
+    def plan(
+        index: int, combo: ParamCombo, seed: int | np.signedinteger
+    ) -> tuple[tuple | None, _JobRep, Sequence[int] | None]:
+        """Get the job key, the combination to simulate and the horizons.
+
+        The combination to simulate is the first one of the job, with the
+        largest number of events if results are obtained for several horizons.
+        """
+        jkey = _job_key(combo, merge_equivalent, horizons is not None)
+        job_rep = _JobRep(index, combo, seed)
+        if jkey is None:
+            return jkey, job_rep, None
+        job_rep = jobs.visit(jkey, job_rep)
+        if horizons is None:
+            return jkey, job_rep, None
+        job_combo = job_rep.combo._replace(num_events=max(horizons))
+        return jkey, job_rep._replace(combo=job_combo), horizons
+
+    # Names of the parameters in rows of results, which are not kept with the
+    # results of jobs
+    param_names = frozenset(ParamCombo._fields)
+
+    def results(
+        outcome: dict[int, dict[str, Any]],
+    ) -> dict[int, dict[str, Any]]:
+        """Get the results of a job, without the parameters in its rows."""
+        return {
+            n: {k: v for k, v in job_row.items() if k not in param_names}
+            for n, job_row in outcome.items()
+        }
+
+    def lookup(
+        index: int,
+        combo: ParamCombo,
+        seed: int | np.signedinteger,
+        job_horizons: Sequence[int] | None,
+    ) -> tuple[_StoreKey | None, dict[int, dict[str, Any]] | None]:
+        """Get where to store the outcome (`None` if found) and the found rows."""
+        rows = None
+        if checkpoint is not None:
+            rows = checkpoint.get(index, int(seed))
+            if rows is not None:
+                return None, rows
+
+        key = None
+        if cache is not None:
+            key = cache.key(
+                combo,
+                num_runs,
+                int(seed),
+                {
+                    **sim_opts,
+                    "horizons": None if job_horizons is None else list(job_horizons),
+                },
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                rows = {int(n): row for n, row in cached.items()}
+                key = None
+        store_key = _StoreKey(index, int(seed), key)
+        return store_key, rows
+
+    def store(
+        store_key: _StoreKey | None,
+        outcome: dict[int, dict[str, Any]] | _SimParamError,
+    ) -> None:
+        """Record the outcome in the checkpoint and cache, if new and valid."""
+        if store_key is None or not isinstance(outcome, dict):
+            return
+        if checkpoint is not None:
+            checkpoint.put(store_key.combo_index, store_key.seed, outcome)
+        if cache is not None and store_key.cache_key is not None:
+            cache.put(store_key.cache_key, {str(n): row for n, row in outcome.items()})
+
+    def row(
+        combo: ParamCombo, outcome: dict[int, dict[str, Any]] | _SimParamError
+    ) -> dict[str, Any] | _SimParamError:
+        """Get the outcome of a combination from the results of its job."""
+        if isinstance(outcome, _SimParamError):
+            return outcome
+        return {**_combo_params(combo), **outcome[combo.num_events]}
+
+    if workers == 1:
+        for index, combo, seed in tasks:
+            jkey, job_rep, job_horizons = plan(index, combo, seed)
+            if jkey in jobs.outcomes:
+                yield combo, row(combo, jobs.outcomes[cast(tuple, jkey)])
+                continue
+
+            store_key, rows = lookup(*job_rep, job_horizons)
+            if rows is not None:
+                outcome: dict[int, dict[str, Any]] | _SimParamError = rows
+            else:
+                outcome = _combo_ev_sim(
+                    num_runs, job_rep.combo, job_rep.seed, sim_opts, job_horizons
+                )
+            store(store_key, outcome)
+
+            if isinstance(outcome, dict):
+                outcome = results(outcome)
+                if jkey is not None:
+                    jobs.outcomes[jkey] = outcome
+            yield combo, row(combo, outcome)
+        return
+
+    def stopped() -> bool:
+        return stop_event is not None and stop_event.is_set()
+
+    task_iter = iter(tasks)
+
+    # Combinations in flight, with respective job key, store key (`None` if
+    # the job outcome is not to be stored), future and whether the future was
+    # submitted to the pool. Until consumed, the futures of the jobs are kept
+    # in the window of jobs instead of their results.
+    in_flight: deque[
+        tuple[ParamCombo, tuple | None, _StoreKey | None, Future, bool]
+    ] = deque()
+    num_submitted = 0
+
+    # Event shared with the workers, set when `stop_event` is set
+    mp_context = multiprocessing.get_context()
+    workers_stop_event = mp_context.Event()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(workers_stop_event,),
+    ) as pool:
+        try:
+            while True:
+                # Keep the pool busy, unless we've been asked to stop
+                while (
+                    num_submitted < 2 * workers
+                    and len(in_flight) < 64 * workers
+                    and not stopped()
+                ):
+                    task = next(task_iter, None)
+                    if task is None:
+                        break
+                    index, combo, seed = task
+
+                    jkey, job_rep, job_horizons = plan(index, combo, seed)
+                    if jkey in jobs.outcomes:
+                        job_outcome = jobs.outcomes[cast(tuple, jkey)]
+                        if not isinstance(job_outcome, Future):
+                            job_future: Future = Future()
+                            job_future.set_result(job_outcome)
+                            job_outcome = job_future
+                        in_flight.append((combo, None, None, job_outcome, False))
+                        continue
+
+                    key, cached_rows = lookup(*job_rep, job_horizons)
+                    submitted = cached_rows is None
+                    if submitted:
+                        future = pool.submit(
+                            _worker_combo_ev_sim,
+                            num_runs,
+                            job_rep.combo,
+                            job_rep.seed,
+                            sim_opts,
+                            job_horizons,
+                        )
+                        num_submitted += 1
+                    else:
+                        future = Future()
+                        future.set_result(cached_rows)
+
+                    if jkey is not None:
+                        jobs.outcomes[jkey] = future
+                    in_flight.append((combo, jkey, key, future, submitted))
+
+                if len(in_flight) == 0:
+                    break
+
+                # Wait for the oldest combination, relaying a stop request to
+                # the workers in the meantime
+                combo, jkey, key, future, submitted = in_flight.popleft()
+                if submitted:
+                    num_submitted -= 1
+                while not future.done():
+                    if stopped():
+                        workers_stop_event.set()
+                    wait([future], timeout=0.1)
+
+                pool_outcome = future.result()
+                if pool_outcome is None:
+                    continue
+                store(key, pool_outcome)
+                if isinstance(pool_outcome, dict):
+                    pool_outcome = results(pool_outcome)
+
+                # Once consumed, keep the outcome of the job instead of its
+                # future (combinations of the job in flight still hold it)
+                if jkey is not None and jobs.outcomes.get(jkey) is future:
+                    jobs.outcomes[jkey] = pool_outcome
+                yield combo, row(combo, pool_outcome)
+
+        finally:
+            workers_stop_event.set()
+            for _, _, _, future, _ in in_flight:
+                future.cancel()
+
+
+def multi_param_ev_sim(
+    num_runs: int,
+    frequency: Sequence[float],
     num_events: Sequence[int],
     num_bits: Sequence[int],
     info_bits: Sequence[int],
@@ -509,11 +2801,33 @@ def multi_param_ev_sim(
     seed: int | np.signedinteger | None = None,
     counter: Synchronized[int] | None = None,
     stop_event: Event | None = None,
+    engine: str = "loop",
+    channel: str | Channel = "rayleigh",
+    bler_tol: float | None = None,
+    workers: int | None = 1,
+    cache: str | os.PathLike | ResultCache | None = None,
+    merge_equivalent: bool = True,
+    reuse_prefixes: bool = True,
+    rel_half_width: float | None = None,
+    abs_half_width: float | None = None,
+    min_runs: int = 10,
+    confidence: float = 0.95,
+    importance_sampling: bool = False,
+    is_bias: float | None = None,
+    control_variate: bool = False,
+    common_random_numbers: bool = False,
+    antithetic: bool = False,
+    output: str | os.PathLike | ResultWriter | None = None,
+    keep_results: bool = True,
+    checkpoint: str | os.PathLike | None = None,
+    resume: bool = False,
+    shard: tuple[int, int] | None = None,
 ) -> tuple[pd.DataFrame, dict[str, Sequence[NamedTuple]]]:
     """Run the simulation for multiple parameters and return the results.
 
     Args:
-      num_runs: Number of times to run the simulation.
+      num_runs: Number of times to run the simulation (maximum number of times
+        if the number of runs is adaptive).
       frequency: List of frequencies.
       num_events: List of number of events.
       num_bits: List of number of bits in a block.
@@ -538,129 +2852,499 @@ def multi_param_ev_sim(
       stop_event: The simulation will stop if this optional event is set
         externally. Only relevant if this function is executed in a separate
         thread.
+      engine: Simulation engine, one of `"loop"` (default, simulates one event
+        at a time), `"vector"` (simulates all events at once using NumPy arrays),
+        `"slot"` (same as `"vector"`, but keeping time in integer slots) or
+        `"skip"` (samples the gaps between deliveries instead of every event).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+      bler_tol: If given, Block Error Rates are interpolated in precomputed
+        tables with this absolute tolerance (see `block_error_tab()`), which is
+        faster, instead of being calculated exactly (default).
+      workers: Number of worker processes among which parameter combinations are
+        distributed. If `None`, the number of CPUs is used. Results do not depend
+        on the number of workers.
+      cache: Optional folder or `ResultCache` object where results of parameter
+        combinations are cached, so that they are not simulated again in
+        subsequent invocations with the same parameters, number of runs and
+        seed. Only useful if a seed is given.
+      merge_equivalent: Since the frequency, power, distance and noise power only
+        affect the simulation through the average SNRs, combinations with the
+        same average SNRs, bits and number of events are statistically
+        equivalent. If true (default), only the first combination of each such
+        equivalence class is simulated, and its results are reused for the
+        remaining ones. Set to false to obtain independent samples for every
+        combination. In order to bound memory usage, results are only reused
+        if the equivalent combination was among the last 4096 simulations,
+        otherwise it is simulated again.
+      reuse_prefixes: If true (default) and the simulation engine can simulate
+        several runs at once (e.g. `"vector"`), combinations which differ only
+        in the number of events are simulated only once, with the largest number
+        of events, and the results for the smaller numbers of events are
+        obtained from prefixes of the same event traces. This makes sweeps over
+        the number of events cost roughly the same as the longest simulation,
+        at the expense of results being correlated across the number of events.
+        Not used if the number of runs is adaptive. In order to bound memory
+        usage, results are only shared with the last 4096 simulations, as with
+        `merge_equivalent`.
+      rel_half_width: If given, the number of runs is adaptive, and each
+        combination is simulated until the half-width of the confidence interval
+        of the expected simulation AAoI, relative to the latter, is at most this
+        value (see `ev_sim_adaptive()`). The results then include the half-width
+        of the confidence interval (`aaoi_sim_ci`) and the number of runs
+        performed (`num_runs`).
+      abs_half_width: Same as `rel_half_width`, but for the absolute half-width
+        of the confidence interval, in seconds. If both are given, both targets
+        must be met.
+      min_runs: Minimum number of runs if the number of runs is adaptive.
+      confidence: Confidence level of the confidence interval if the number of
+        runs is adaptive.
+      importance_sampling: If true, the expected simulation AAoI is estimated
+        with importance sampling instead of plain Monte Carlo simulation (see
+        `ev_sim_is()`), regardless of the simulation engine, and the results
+        then include the variance of the estimate (`aaoi_sim_var`). It can't be
+        combined with an adaptive number of runs.
+      is_bias: Probability of drawing each fading gain from its deep-fade region
+        with importance sampling (optional, see `ev_sim_is()`).
+      control_variate: If true, the expected simulation AAoI is estimated with
+        the empirical end-to-end error rate as a control variate (see
+        `ev_sim_cv()`), which requires a batch simulation engine, and the
+        results then include the variance of the estimate (`aaoi_sim_var`) and
+        the variance reduction factor achieved (`aaoi_sim_vrf`). It can't be
+        combined with an adaptive number of runs or importance sampling.
+      common_random_numbers: If true, all parameter combinations are simulated
+        with the same seed and common random numbers (see `ev_sim()`), which
+        requires a batch simulation engine, so that differences between
+        combinations are not dominated by the noise of the simulation. It can't
+        be combined with an adaptive number of runs or importance sampling.
+      antithetic: If true, runs are paired with antithetic runs (see
+        `ev_sim()`), which implies `common_random_numbers`. It can't be
+        combined with control variates either.
+      output: Optional CSV file, Parquet folder or `ResultWriter` object to
+        which the row of results of each parameter combination is written as
+        soon as it is available, in chunks, so that results are not lost if the
+        simulation is interrupted or crashes. The output is replaced if it
+        already exists, unless a `ResultWriter` object is given.
+      keep_results: If false, the rows of results are not accumulated in
+        memory, and the returned DataFrame is empty. Useful for very large
+        sweeps whose results are only written to `output`.
+      checkpoint: Optional file where each completed simulation is recorded,
+        identified by the index of the parameter combination in the sweep and
+        its derived seed, so that an interrupted sweep can be resumed. If no
+        seed is given, a random one is drawn and recorded in the checkpoint.
+      resume: If true and the `checkpoint` file exists, the simulations recorded
+        in it are not performed again, and the results are the same as those of
+        an uninterrupted sweep. The sweep (parameters, number of runs, seed and
+        simulation options) must be the same, although if no seed is given, the
+        one recorded in the checkpoint is used.
+      shard: Optional pair `(i, n)`, in which case the combinations are split
+        in `n` contiguous slices of (nearly) equal size, and only the `i`-th
+        slice (starting at 0) is evaluated. Results are the same as for the
+        respective combinations of the whole sweep, so the results of all
+        slices can be concatenated (see `merge_shards()`). Requires a seed.
 
     Returns:
       A tuple containing a DataFrame with the results of the simulation and a
         log highlighting invalid parameters or parameter combinations.
     """
-    rng = Generator(Philox(seed))
+    import pandas as pd
+
+    # Fail early if the simulation engine or the channel model do not exist, or
+    # if the tolerance of the tabulated Block Error Rate is invalid
+    _get_engine(engine)
+    channel = get_channel(channel)
+    if bler_tol is not None and not bler_tol > 0:
+        raise ValueError(f"`bler_tol` ({bler_tol}) must be greater than 0")
+
+    # Create the result writer, if an output file or folder was given
+    if output is not None and not isinstance(output, ResultWriter):
+        output = ResultWriter(output)
+
+    # Determine and check the number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"`workers` ({workers}) must be greater than 0")
+
+    # Open the result cache, if a folder was given
+    if cache is not None and not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+
+    # Additional simulation options, including those for an adaptive number of
+    # runs, if a target confidence interval was given
+    sim_opts: dict[str, Any] = {"engine": engine, "channel": channel}
+    if bler_tol is not None:
+        sim_opts["bler_tol"] = bler_tol
+    adaptive = rel_half_width is not None or abs_half_width is not None
+    if adaptive:
+        _adaptive_validate(
+            num_runs, rel_half_width, abs_half_width, min_runs, confidence
+        )
+        sim_opts.update(
+            rel_half_width=rel_half_width,
+            abs_half_width=abs_half_width,
+            min_runs=min_runs,
+            confidence=confidence,
+        )
+
+    # Options for importance sampling, which has its own sampler
+    if importance_sampling:
+        if adaptive:
+            raise ValueError(
+                "Importance sampling can't be combined with an adaptive number of runs"
+            )
+        if is_bias is not None and not 0 <= is_bias < 1:
+            raise ValueError(
+                f"`is_bias` ({is_bias}) must be between 0 and 1 (exclusive)"
+            )
+        sim_opts.update(importance_sampling=True, is_bias=is_bias)
+
+    # Option for the control variate, which is computed by batch engines
+    if control_variate:
+        if adaptive or importance_sampling:
+            raise ValueError(
+                "Control variates can't be combined with an adaptive number of "
+                "runs or importance sampling"
+            )
+        _batch_validate(engine, "Control variates")
+        sim_opts["control_variate"] = True
+
+    # Options for common random numbers, which are shared by all combinations,
+    # and for antithetic variates, which imply them
+    if antithetic or common_random_numbers:
+        if adaptive or importance_sampling:
+            raise ValueError(
+                "Common random numbers and antithetic variates can't be combined "
+                "with an adaptive number of runs or importance sampling"
+            )
+        if antithetic and control_variate:
+            raise ValueError(
+                "Antithetic variates can't be combined with control variates"
+            )
+        _batch_validate(
+            engine, "Antithetic variates" if antithetic else "Common random numbers"
+        )
+        common_random_numbers = True
+        sim_opts["common_random_numbers"] = True
+        if antithetic:
+            sim_opts["antithetic"] = True
+
+    # Number of events of the event trace prefixes for which to obtain results
+    horizons = (
+        sorted({n for n in num_events if n > 0})
+        if reuse_prefixes
+        and engine in _batch_engines
+        and not adaptive
+        and not importance_sampling
+        else None
+    )
+
+    # All the shards of a sweep must derive the same seeds
+    if shard is not None and seed is None:
+        raise ValueError("A seed is required to evaluate a shard of a sweep")
+
+    # Open the checkpoint, if a file was given, resuming the recorded seed or
+    # drawing a new one, so that derived seeds are reproducible when resuming
+    sweep_checkpoint = None
+    if checkpoint is not None:
+        sweep_checkpoint = Checkpoint(checkpoint, resume)
+        if seed is None:
+            seed = (
+                int(sweep_checkpoint.header["seed"])
+                if sweep_checkpoint.header is not None
+                else int(cast(int, np.random.SeedSequence().entropy))
+            )
 
     results = []
 
     param_error_log: dict[str, Sequence[NamedTuple]] = {}
 
-    # Define the named tuple
-    ParamCombo = namedtuple(
-        "ParamCombo",
-        [
-            "frequency",
-            "num_events",
-            "num_bits",
-            "info_bits",
-            "power",
-            "distance",
-            "N0",
-            "num_bits_2",
-            "info_bits_2",
-            "power_2",
-            "distance_2",
-            "N0_2",
-        ],
+    # Lazy grid of parameter combinations, each with a seed derived from its index
+    grid = _ParamGrid(
+        frequency,
+        num_events,
+        num_bits,
+        info_bits,
+        power,
+        distance,
+        N0,
+        num_bits_2,
+        info_bits_2,
+        power_2,
+        distance_2,
+        N0_2,
     )
 
-    # Get all combinations and create a parameter combo for each combination
-    combos = [
-        ParamCombo(f, e, n1, k1, p1, d1, n01, n2, k2, p2, d2, n02)
-        for f, e, n1, k1, p1, d1, n01, n2, k2, p2, d2, n02 in itertools.product(
-            frequency,
-            num_events,
-            num_bits,
-            info_bits,
-            power,
-            distance,
-            N0,
-            num_bits_2,
-            info_bits_2,
-            power_2,
-            distance_2,
-            N0_2,
+    # Record the sweep in the checkpoint, checking it's the same when resuming
+    if sweep_checkpoint is not None:
+        sweep_checkpoint.start(
+            {
+                "params": [
+                    list(values)
+                    for values in (
+                        frequency,
+                        num_events,
+                        num_bits,
+                        info_bits,
+                        power,
+                        distance,
+                        N0,
+                        num_bits_2,
+                        info_bits_2,
+                        power_2,
+                        distance_2,
+                        N0_2,
+                    )
+                ],
+                "num_runs": num_runs,
+                "seed": seed,
+                "sim_opts": sim_opts,
+                "merge_equivalent": merge_equivalent,
+                "horizons": horizons,
+                "shard": shard,
+            }
         )
-    ]
 
-    # Obtain PRNG seeds for each combo
-    seeds = rng.integers(np.iinfo(np.int64).max, size=len(combos), dtype=np.int64)
+    # Slice of combinations to evaluate, and the first combination of the jobs
+    # which started before it, so that these jobs have the same outcome as when
+    # evaluating the whole sweep
+    start, stop = 0, len(grid)
+    job_reps = None
+    if shard is not None:
+        start, stop = _shard_range(shard, len(grid))
+        job_reps = _job_reps(
+            grid.tasks(seed, 0, start, common_random_numbers),
+            merge_equivalent,
+            horizons is not None,
+        )
 
     # Perform `num_runs` simulations for each parameter combo and get the
     # expected value of the AAoI for each combination
-    for combo, seed in zip(combos, seeds):
-
-        try:
-            (
-                aaoi_th,
-                aaoi_sim,
-                snr1_avg,
-                snr2_avg,
-                blkerr1_th,
-                blkerr2_th,
-            ) = ev_sim(
-                num_runs=num_runs,
-                frequency=combo.frequency,
-                num_events=combo.num_events,
-                num_bits=combo.num_bits,
-                info_bits=combo.info_bits,
-                power=combo.power,
-                distance=combo.distance,
-                N0=combo.N0,
-                num_bits_2=combo.num_bits_2,
-                info_bits_2=combo.info_bits_2,
-                power_2=combo.power_2,
-                distance_2=combo.distance_2,
-                N0_2=combo.N0_2,
-                seed=seed,
+    with ExitStack() as stack:
+        outcomes = stack.enter_context(
+            closing(
+                _eval_combos(
+                    num_runs,
+                    grid.tasks(seed, start, stop, common_random_numbers),
+                    sim_opts,
+                    workers,
+                    stop_event,
+                    cache,
+                    merge_equivalent,
+                    horizons,
+                    sweep_checkpoint,
+                    job_reps,
+                )
             )
+        )
+        if output is not None:
+            stack.enter_context(output)
+        if sweep_checkpoint is not None:
+            stack.enter_context(closing(sweep_checkpoint))
+
+        for combo, outcome in outcomes:
+
+            if isinstance(outcome, _SimParamError):
+                # In case of invalid parameters or parameter combinations, log
+                # the error and proceed to the next combination
+                err_msg = str(outcome)
+                if err_msg not in param_error_log:
+                    param_error_log[err_msg] = []
+                cast(MutableSequence, param_error_log[err_msg]).append(combo)
+            else:
+                if output is not None:
+                    output.write(outcome)
+                if keep_results:
+                    results.append(outcome)
+
+            if counter is not None:
+                counter.value += 1
+            if stop_event is not None and stop_event.is_set():
+                break
 
-            results.append(
-                {
-                    "frequency": combo.frequency,
-                    "num_events": combo.num_events,
-                    "num_bits": combo.num_bits,
-                    "info_bits": combo.info_bits,
-                    "power": combo.power,
-                    "distance": combo.distance,
-                    "N0": combo.N0,
-                    "num_bits_2": (
-                        combo.num_bits if combo.num_bits_2 is None else combo.num_bits_2
-                    ),
-                    "info_bits_2": (
-                        combo.info_bits
-                        if combo.info_bits_2 is None
-                        else combo.info_bits_2
-                    ),
-                    "power_2": combo.power if combo.power_2 is None else combo.power_2,
-                    "distance_2": (
-                        combo.distance if combo.distance_2 is None else combo.distance_2
-                    ),
-                    "N0_2": combo.N0 if combo.N0_2 is None else combo.N0_2,
-                    "aaoi_theory": aaoi_th,
-                    "aaoi_sim": aaoi_sim,
-                    "snr1_avg": snr1_avg,
-                    "snr2_avg": snr2_avg,
-                    "blkerr1_th": blkerr1_th,
-                    "blkerr2_th": blkerr2_th,
-                }
+    return pd.DataFrame(results), param_error_log
+
+
+def _aaoi_th_arr(
+    num_bits_1: NDArray, num_bits_2: NDArray, blkerr1_th: NDArray, blkerr2_th: NDArray
+) -> NDArray:
+    """Element-wise theoretical AAoI for arrays of parameters, as in `_sim()`."""
+    # Transmission period, with a symbol time of 60 microseconds
+    transmission_period = (num_bits_1 + num_bits_2) * 60e-6
+
+    er_p_th = blkerr1_th + (blkerr2_th * (1 - blkerr1_th))
+
+    with np.errstate(divide="ignore"):
+        aaoi_th = (transmission_period) * (0.5 + (1 / (1 - er_p_th)))
+
+    # Same small threshold as in `_sim()`
+    return np.where(np.abs(1 - er_p_th) < 1e-20, float("inf"), aaoi_th)
+
+
+def multi_param_th(
+    frequency: Sequence[float],
+    num_events: Sequence[int],
+    num_bits: Sequence[int],
+    info_bits: Sequence[int],
+    power: Sequence[float],
+    distance: Sequence[float],
+    N0: Sequence[float],
+    num_bits_2: Sequence[int | None] = [None],
+    info_bits_2: Sequence[int | None] = [None],
+    power_2: Sequence[float | None] = [None],
+    distance_2: Sequence[float | None] = [None],
+    N0_2: Sequence[float | None] = [None],
+    channel: str | Channel = "rayleigh",
+) -> tuple[pd.DataFrame, dict[str, Sequence[NamedTuple]]]:
+    """Get the theoretical results for multiple parameters, without simulating.
+
+    The theoretical AAoI, average SNRs and block error rates of all parameter
+    combinations are computed at once with NumPy arrays, so this function is
+    suitable for very large parameter grids, e.g. for choosing which
+    combinations to simulate with `multi_param_ev_sim()`.
+
+    Args:
+      frequency: List of frequencies.
+      num_events: List of number of events.
+      num_bits: List of number of bits in a block.
+      info_bits: List of number of bits in a message.
+      power: List of powers.
+      distance: List of distances between nodes.
+      N0: List of noise powers.
+      num_bits_2: List of number of bits in a block for relay or access point
+        (optional, if different than source).
+      info_bits_2: List of number of bits in a message for relay or access point
+        (optional, if different than source).
+      power_2: List of powers for relay or access point
+        (optional, if different than source).
+      distance_2: List of distances between nodes for relay or access point
+        (optional, if different than source).
+      N0_2: List of noise powers for relay or access point (optional, if
+        different than source).
+      channel: Small-scale fading channel model, or its specification (see
+        `get_channel()`), Rayleigh fading by default.
+
+    Returns:
+      A tuple containing a DataFrame with the same columns as the one returned
+        by `multi_param_ev_sim()`, except `aaoi_sim`, and a log highlighting
+        invalid parameters or parameter combinations.
+    """
+    import pandas as pd
+
+    channel = get_channel(channel)
+
+    param_lists: list[Sequence[Any]] = [
+        frequency,
+        num_events,
+        num_bits,
+        info_bits,
+        power,
+        distance,
+        N0,
+        num_bits_2,
+        info_bits_2,
+        power_2,
+        distance_2,
+        N0_2,
+    ]
+
+    # Index of each parameter value for every combination, in the same order
+    # as `itertools.product()`
+    indices = np.indices([len(p) for p in param_lists]).reshape(len(param_lists), -1)
+
+    # Value of each parameter for every combination, where relay parameters
+    # which are not specified take the value of the respective source parameter,
+    # in a type which can hold the values of both
+    columns: dict[str, NDArray] = {}
+    for name, values, idx in zip(ParamCombo._fields, param_lists, indices):
+        if name.endswith("_2"):
+            src = columns[name[:-2]]
+            given = [v for v in values if v is not None]
+            dtype = np.result_type(src, np.asarray(given)) if given else src.dtype
+            relay = np.array([np.nan if v is None else v for v in values])[idx]
+            columns[name] = np.where(np.isnan(relay), src, relay).astype(dtype)
+        else:
+            columns[name] = np.asarray(values)[idx]
+
+    # Same checks as `_param_validate()`, in the same order, with the
+    # parameters which determine the respective error message
+    c = columns
+    checks = [
+        (c["frequency"] > 0, ["frequency"]),
+        (c["num_events"] > 0, ["num_events"]),
+        ((c["num_bits"] > 0) & (c["num_bits_2"] > 0), ["num_bits", "num_bits_2"]),
+        ((c["info_bits"] > 0) & (c["info_bits_2"] > 0), ["info_bits", "info_bits_2"]),
+        (c["info_bits"] <= c["num_bits"], ["info_bits", "num_bits"]),
+        (c["info_bits_2"] <= c["num_bits_2"], ["info_bits_2", "num_bits_2"]),
+        ((c["power"] > 0) & (c["power_2"] > 0), ["power", "power_2"]),
+        ((c["distance"] > 0) & (c["distance_2"] > 0), ["distance", "distance_2"]),
+        ((c["N0"] > 0) & (c["N0_2"] > 0), ["N0", "N0_2"]),
+        (c["num_bits_2"] >= c["num_bits"], ["num_bits_2", "num_bits"]),
+    ]
+    passed = np.array([check for check, _ in checks])
+    valid = passed.all(axis=0)
+
+    # Log invalid combinations with the same error messages as
+    # `multi_param_ev_sim()`, validating a single combination for each distinct
+    # error message
+    err_msgs: dict[str, int] = {}
+    invalid = np.flatnonzero(~valid)
+    first_failed = np.argmin(passed[:, invalid], axis=0)
+    err_codes = np.empty(len(invalid), dtype=int)
+    for i, (_, fields) in enumerate(checks):
+        failed_i = first_failed == i
+        if not failed_i.any():
+            continue
+        _, first, inverse = np.unique(
+            np.stack([c[f][invalid[failed_i]] for f in fields], axis=1),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        codes = []
+        for j in np.flatnonzero(failed_i)[first]:
+            combo = ParamCombo._make(
+                p[k] for p, k in zip(param_lists, indices[:, invalid[j]])
             )
+            try:
+                _param_validate(**combo._asdict())
+            except _SimParamError as spe:
+                codes.append(err_msgs.setdefault(str(spe), len(err_msgs)))
+        err_codes[failed_i] = np.array(codes)[inverse.ravel()]
+
+    # Original parameter values of the invalid combinations
+    invalid_values = [
+        np.asarray(p, dtype=object)[idx[invalid]]
+        for p, idx in zip(param_lists, indices)
+    ]
 
-        except _SimParamError as spe:
-            # In case of invalid parameters or parameter combinations, log the
-            # error and proceed to the next combination
-            err_msg = str(spe)
-            if err_msg not in param_error_log:
-                param_error_log[err_msg] = []
-            cast(MutableSequence, param_error_log[err_msg]).append(combo)
-
-        if counter is not None:
-            counter.value += 1
-        if stop_event is not None and stop_event.is_set():
-            break
+    param_error_log: dict[str, Sequence[NamedTuple]] = {}
+    for err_msg, code in sorted(
+        err_msgs.items(), key=lambda item: np.argmax(err_codes == item[1])
+    ):
+        selected = err_codes == code
+        param_error_log[err_msg] = list(
+            map(ParamCombo._make, zip(*(v[selected] for v in invalid_values)))
+        )
 
-    return pd.DataFrame(results), param_error_log
+    c = {name: values[valid] for name, values in columns.items()}
+
+    # Theoretical results for all valid combinations at once
+    snr1_avg = snr_avg(c["N0"], c["distance"], c["power"], c["frequency"])
+    snr2_avg = snr_avg(c["N0_2"], c["distance_2"], c["power_2"], c["frequency"])
+    blkerr1_th = channel.block_error_th(snr1_avg, c["num_bits"], c["info_bits"])
+    blkerr2_th = channel.block_error_th(snr2_avg, c["num_bits_2"], c["info_bits_2"])
+    aaoi_th = _aaoi_th_arr(c["num_bits"], c["num_bits_2"], blkerr1_th, blkerr2_th)
+
+    results = pd.DataFrame(
+        {
+            **c,
+            "aaoi_theory": aaoi_th,
+            "snr1_avg": snr1_avg,
+            "snr2_avg": snr2_avg,
+            "blkerr1_th": blkerr1_th,
+            "blkerr2_th": blkerr2_th,
+        }
+    )
+
+    return results, param_error_log
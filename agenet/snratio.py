@@ -3,15 +3,57 @@
 from __future__ import annotations
 
 import math
-from typing import cast
+from typing import TYPE_CHECKING, cast, overload
 
 import numpy as np
 from numpy.random import Generator
+from numpy.typing import ArrayLike, NDArray
+
+if TYPE_CHECKING:
+    from .channels import Channel
+
+
+def _is_rayleigh(channel: Channel) -> bool:
+    """Check whether a channel model is Rayleigh fading."""
+    from .channels import Rayleigh
+
+    return isinstance(channel, Rayleigh)
+
+
+@overload
+def snr(
+    N0: float,
+    d: float,
+    P: float,
+    fr: float,
+    seed: int | Generator | None = None,
+    size: None = None,
+    channel: Channel | None = None,
+) -> float: ...
+
+
+@overload
+def snr(
+    N0: float | ArrayLike,
+    d: float | ArrayLike,
+    P: float | ArrayLike,
+    fr: float | ArrayLike,
+    seed: int | Generator | None = None,
+    *,
+    size: int | tuple[int, ...],
+    channel: Channel | None = None,
+) -> NDArray: ...
 
 
 def snr(
-    N0: float, d: float, P: float, fr: float, seed: int | Generator | None = None
-) -> float:
+    N0: float | ArrayLike,
+    d: float | ArrayLike,
+    P: float | ArrayLike,
+    fr: float | ArrayLike,
+    seed: int | Generator | None = None,
+    size: int | tuple[int, ...] | None = None,
+    channel: Channel | None = None,
+) -> float | NDArray:
     """Computes the instantaneous SNR of the received signal.
 
     Args:
@@ -21,15 +63,36 @@ def snr(
       fr: The frequency of the signal.
       seed: Seed for the random number generator or a previously instantied
         random number generator (optional).
+      size: If given, the shape of an array of independent instantaneous SNRs
+        to return. These are obtained with a single draw from the random number
+        generator, and the other arguments can then also be arrays broadcastable
+        to this shape.
+      channel: Small-scale fading channel model (optional, Rayleigh fading by
+        default).
 
     Returns:
-      The instantaneous SNR of the received signal in linear scale.
+      The instantaneous SNR of the received signal in linear scale, or an array
+        of instantaneous SNRs if `size` is given.
     """
     if isinstance(seed, Generator):
         rng = cast(Generator, seed)
     else:
         rng = Generator(np.random.SFC64(seed))
 
+    # Other channel models than Rayleigh fading draw the gain themselves
+    if channel is not None and not _is_rayleigh(channel):
+        gain = channel.sample_gain(rng, size)
+        if size is None:
+            return float(snr_avg(cast(float, N0), d, P, fr) * gain)
+        return snr_avg(np.asarray(N0), d, P, fr) * gain
+
+    if size is not None:
+        # |h|^2 of a complex Gaussian channel coefficient with unit average power
+        # follows a standard exponential distribution
+        return snr_avg(np.asarray(N0), d, P, fr) * rng.standard_exponential(size)
+
+    N0, d, P, fr = cast(float, N0), cast(float, d), cast(float, P), cast(float, fr)
+
     # Calculate large-scale gain using _alpha function
     alpha = _alpha(d, fr)
 
@@ -44,9 +107,25 @@ def snr(
     return snr
 
 
-def snr_avg(N0: float, d: float, P: float, fr: float) -> float:
+@overload
+def snr_avg(N0: float, d: float, P: float, fr: float) -> float: ...
+
+
+@overload
+def snr_avg(N0: ArrayLike, d: ArrayLike, P: ArrayLike, fr: ArrayLike) -> NDArray: ...
+
+
+def snr_avg(
+    N0: float | ArrayLike,
+    d: float | ArrayLike,
+    P: float | ArrayLike,
+    fr: float | ArrayLike,
+) -> float | NDArray:
     """Computes the average SNR of the received signal.
 
+    Arguments can also be arrays, which are broadcast against each other, in
+    which case the average SNR is calculated element-wise.
+
     Args:
       N0: Noise power in Watts.
       d: The distance between the transmitter and receiver.
@@ -54,14 +133,29 @@ def snr_avg(N0: float, d: float, P: float, fr: float) -> float:
       fr: The frequency of the signal.
 
     Returns:
-      The average SNR of the received signal in linear scale.
+      The average SNR of the received signal in linear scale, or an array with
+        the average SNR for each element of the broadcast arguments.
     """
-    alpha = _alpha(d, fr)
-    snr_th: float = (alpha * P) / N0
+    if not all(np.isscalar(a) for a in (N0, d, P, fr)):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (_alpha(np.asarray(d), np.asarray(fr)) * np.asarray(P)) / np.asarray(
+                N0
+            )
+
+    alpha = _alpha(cast(float, d), cast(float, fr))
+    snr_th: float = (alpha * cast(float, P)) / cast(float, N0)
     return snr_th
 
 
-def _alpha(d: float, fr: float) -> float:
+@overload
+def _alpha(d: float, fr: float) -> float: ...
+
+
+@overload
+def _alpha(d: ArrayLike, fr: ArrayLike) -> NDArray: ...
+
+
+def _alpha(d: float | ArrayLike, fr: float | ArrayLike) -> float | NDArray:
     """Calculates the path loss in linear scale.
 
     Args:
@@ -69,11 +163,22 @@ def _alpha(d: float, fr: float) -> float:
       fr: The frequency of the signal.
 
     Returns:
-      The path loss in linear scale.
+      The path loss in linear scale, or an array with the path loss for each
+        element of the broadcast arguments.
     """
-    f = fr  # frequency of the signal
     C: float = 3 * (10**8)  # speed of light
-    log_alpha: float = (20 * math.log10(d)) + (
+
+    if not (np.isscalar(d) and np.isscalar(fr)):
+        # Non-positive distances or frequencies yield infinity or NaN instead of
+        # raising an error
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_alpha_arr = (20 * np.log10(d)) + (
+                20 * np.log10((4 * np.asarray(fr) * math.pi) / C)
+            )
+            return 1 / (10 ** (log_alpha_arr / 10))
+
+    f = cast(float, fr)  # frequency of the signal
+    log_alpha: float = (20 * math.log10(cast(float, d))) + (
         20 * math.log10((4 * f * math.pi) / C)
     )  # path loss in dB
     alpha: float = 1 / (10 ** ((log_alpha) / 10))  # path loss in linear scale
@@ -0,0 +1,134 @@
+"""Incremental writer of simulation results to CSV or Parquet files."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+_formats = {".csv": "csv", ".parquet": "parquet"}
+"""Output formats, by file extension."""
+
+
+class ResultWriter:
+    """Incremental writer of rows of results to a CSV or Parquet output.
+
+    Rows are buffered in memory and written to disk in chunks, so that memory
+    usage does not grow with the number of parameter combinations, and so that
+    the results written so far survive an interrupted or crashed sweep.
+
+    CSV output is a single file, to which each chunk is appended and flushed to
+    disk. Parquet output is a folder (a Parquet dataset, as read by
+    `pandas.read_parquet()`) containing one file per chunk. Each chunk file is
+    written atomically, so the output is always readable. Writing Parquet
+    requires the optional `pyarrow` package.
+
+    Args:
+      path: Output file (CSV) or folder (Parquet).
+      chunk_size: Number of rows buffered before they are written to disk.
+      file_format: Either `"csv"` or `"parquet"`. If `None`, it is determined
+        by the extension of `path` (`.csv` or `.parquet`).
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        chunk_size: int = 1000,
+        file_format: str | None = None,
+    ):
+        """Create the output file or folder, replacing existing results."""
+        if chunk_size <= 0:
+            raise ValueError(f"`chunk_size` ({chunk_size}) must be greater than 0")
+
+        self.path = Path(path)
+        if file_format is None:
+            if self.path.suffix.lower() not in _formats:
+                raise ValueError(
+                    f"Unable to determine the output format of `{self.path}` "
+                    f"(supported extensions: {', '.join(_formats.keys())})"
+                )
+            file_format = _formats[self.path.suffix.lower()]
+        elif file_format not in _formats.values():
+            raise ValueError(
+                f"Unknown output format `{file_format}` (supported formats: "
+                f"{', '.join(_formats.values())})"
+            )
+
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.num_rows = 0
+        self._chunk: list[Mapping[str, Any]] = []
+        self._num_chunks = 0
+        self._columns: list[str] | None = None
+
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "Writing Parquet files requires the `pyarrow` package"
+                ) from None
+
+            # Remove chunk files of previous results
+            self.path.mkdir(parents=True, exist_ok=True)
+            for f in self.path.glob("part-*.parquet"):
+                f.unlink()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("")
+
+    def write(self, row: Mapping[str, Any]) -> None:
+        """Add a row of results, writing the buffered rows to disk if required.
+
+        Args:
+          row: Row of results, with the same columns for every row.
+        """
+        self._chunk.append(row)
+        self.num_rows += 1
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows to disk."""
+        if len(self._chunk) == 0:
+            return
+
+        import pandas as pd
+
+        # The columns of the first row determine those of the output
+        if self._columns is None:
+            self._columns = list(self._chunk[0].keys())
+        df = pd.DataFrame(self._chunk, columns=self._columns)
+
+        if self.file_format == "parquet":
+            self._write_parquet(df)
+        else:
+            with open(self.path, "a", newline="") as f:
+                df.to_csv(f, header=self._num_chunks == 0, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._num_chunks += 1
+        self._chunk = []
+
+    def _write_parquet(self, df: Any) -> None:
+        """Write a chunk of rows to a new file in the Parquet folder."""
+        path = self.path / f"part-{self._num_chunks:06d}.parquet"
+
+        # Write to a temporary file first so that chunk files are never partial
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        """Write the remaining buffered rows to disk."""
+        self.flush()
+
+    def __enter__(self) -> ResultWriter:
+        """Use the writer as a context manager, which closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Write the remaining buffered rows, even if an exception was raised."""
+        self.close()
@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 
 from agenet import aaoi_fn
+from agenet.aaoi import _aaoi_exact_rows
 
 
 @pytest.mark.parametrize("v, T, expected", [([2, 3, 4, 5], [1, 2, 3, 4], 1.3)])
@@ -12,3 +13,88 @@ def test_av_age_func_values(v, T, expected):
     aaoi, _, _ = aaoi_fn(v, T)
     assert round(aaoi, 1) == expected
     assert np.isclose(aaoi, expected, rtol=1e-1)
+
+
+@pytest.mark.parametrize("v, T, expected", [([2, 3, 4, 5], [1, 2, 3, 4], 1.3)])
+def test_av_age_func_exact_values(v, T, expected):
+    """Test the aaoi_fn() function with the exact method."""
+    aaoi, age, times = aaoi_fn(v, T, method="exact")
+    assert np.isclose(aaoi, expected)
+    assert len(age) == len(times) == 2 * len(v) + 1
+    assert times[0] == 0
+    assert times[-1] == v[-1]
+
+
+def test_av_age_func_exact_vs_grid():
+    """Test that the exact and grid methods of aaoi_fn() agree."""
+    rng = np.random.default_rng(123)
+    period = 0.03
+    arrivals = period * np.sort(rng.choice(np.arange(1, 500), 200, replace=False))
+    receiving_times = arrivals + period
+    generation_times = np.concatenate(([0], arrivals[1:]))
+    aaoi_grid, _, _ = aaoi_fn(receiving_times, generation_times)
+    aaoi_exact, _, _ = aaoi_fn(receiving_times, generation_times, method="exact")
+    assert np.isclose(aaoi_exact, aaoi_grid, rtol=1e-3)
+
+
+def test_av_age_func_invalid_method():
+    """Test that aaoi_fn() does not accept unknown methods."""
+    with pytest.raises(ValueError, match="Unknown AAoI calculation method"):
+        aaoi_fn([2, 3, 4, 5], [1, 2, 3, 4], method="foo")
+
+
+def test_av_age_func_exact_rows():
+    """Test that the row-wise exact AAoI matches the exact aaoi_fn() per row."""
+    rng = np.random.default_rng(42)
+    received = rng.random((6, 40)) > 0.5
+    received[1:, -1] = True
+    received[0, :] = False
+    receiving_times = np.broadcast_to(0.1 * np.arange(2, 42), received.shape)
+    generation_times = receiving_times - 0.1 * rng.integers(1, 3, received.shape)
+    aaoi_rows = _aaoi_exact_rows(receiving_times, generation_times, received)
+    assert np.isnan(aaoi_rows[0])
+    for i in range(1, received.shape[0]):
+        aaoi, _, _ = aaoi_fn(
+            receiving_times[i][received[i]],
+            generation_times[i][received[i]],
+            method="exact",
+        )
+        assert np.isclose(aaoi_rows[i], aaoi)
+
+
+def test_av_age_func_exact_rows_horizons():
+    """Test that the row-wise exact AAoI of prefixes matches the full AAoI."""
+    rng = np.random.default_rng(7)
+    received = rng.random((5, 30)) > 0.6
+    receiving_times = np.broadcast_to(0.1 * np.arange(2, 32), received.shape)
+    generation_times = receiving_times - 0.1 * rng.integers(1, 3, received.shape)
+    horizons = [1, 4, 17, 30]
+    aaoi_rows = _aaoi_exact_rows(receiving_times, generation_times, received, horizons)
+    assert aaoi_rows.shape == (5, len(horizons))
+    for j, h in enumerate(horizons):
+        aaoi_h = _aaoi_exact_rows(
+            receiving_times[:, :h], generation_times[:, :h], received[:, :h]
+        )
+        assert np.allclose(aaoi_rows[:, j], aaoi_h, equal_nan=True)
+
+
+def test_av_age_func_exact_rows_slots():
+    """Test that the row-wise exact AAoI is exact with integer times."""
+    rng = np.random.default_rng(3)
+    received = rng.random((4, 10**6)) > 0.5
+    received[:, -1] = True
+    slots = np.arange(2, received.shape[1] + 2, dtype=np.int64)
+    receiving_times = np.broadcast_to(slots, received.shape)
+    generation_times = receiving_times - rng.integers(1, 3, received.shape)
+    aaoi_slots = _aaoi_exact_rows(receiving_times, generation_times, received)
+
+    # Same as with times in seconds, scaled once at the end
+    period = 0.042
+    aaoi = _aaoi_exact_rows(
+        period * receiving_times, period * generation_times, received
+    )
+    assert np.allclose(aaoi_slots * period, aaoi, rtol=1e-10)
+
+    # Twice the area under the age curve is an exact integer
+    area2 = aaoi_slots * 2 * receiving_times[:, -1]
+    assert np.array_equal(area2, np.round(area2))
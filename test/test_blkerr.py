@@ -5,8 +5,8 @@ import math
 import numpy as np
 import pytest
 
-from agenet import block_error, block_error_th
-from agenet.blkerr import _qfunc
+from agenet import blkerr, block_error, block_error_tab, block_error_th
+from agenet.blkerr import _bler_table, _qfunc
 
 
 def test_block_error():
@@ -53,3 +53,109 @@ def test_qfunc():
     assert math.isnan(_qfunc(float("nan")))
     assert _qfunc(float("-inf")) == 1
     assert _qfunc(float("inf")) == 0
+
+
+def test_block_error_array():
+    """Test that block_error() on arrays matches the scalar version."""
+    snrs = np.array([0, 1e-3, 0.5, 1, 5, 100])
+    errs = block_error(snrs, 100, 50)
+    assert isinstance(errs, np.ndarray)
+    assert errs.shape == snrs.shape
+    assert np.allclose(errs, [block_error(s, 100, 50) for s in snrs])
+
+    # Broadcast the number of bits against the SNRs
+    n = np.array([[100], [300]])
+    k = np.array([[50], [200]])
+    errs = block_error(snrs, n, k)
+    assert errs.shape == (2, len(snrs))
+    for i in range(2):
+        expected = [block_error(s, int(n[i, 0]), int(k[i, 0])) for s in snrs]
+        assert np.allclose(errs[i], expected)
+
+
+def test_qfunc_array():
+    """Test the qfunc function with arrays, including far into the tail."""
+    x = np.array([-10, -1, 0, 1, 30, float("inf"), float("-inf")])
+    q = _qfunc(x)
+    assert np.allclose(q[:4], [_qfunc(v) for v in x[:4]])
+    assert np.isclose(q[4], 4.906713927148187e-198)
+    assert _qfunc(30.0) == 0
+    assert q[5] == 0
+    assert q[6] == 1
+    assert np.isnan(_qfunc(np.array([float("nan")]))[0])
+
+
+def test_block_error_th_array():
+    """Test that block_error_th() on arrays matches the scalar version."""
+    snr_avgs = np.array([1e-6, 0.5, 10, 1000])[:, None]
+    n = np.array([300, 600, 0, 100])
+    k = np.array([280, 100, 100, 0])
+    errs = block_error_th(snr_avgs, n, k)
+    assert errs.shape == (4, 4)
+    for i in range(4):
+        for j in range(4):
+            expected = block_error_th(float(snr_avgs[i, 0]), int(n[j]), int(k[j]))
+            assert np.isclose(errs[i, j], expected)
+
+    # Degenerate cases yield the worst-case scenario, as in the scalar version
+    assert (errs[:, 2:] == 1.0).all()
+
+
+@pytest.mark.parametrize("n, k", [(300, 100), (400, 350), (100, 1), (5000, 1000)])
+@pytest.mark.parametrize("tol", [1e-4, 1e-7])
+def test_block_error_tab(n, k, tol):
+    """Test that the tabulated BLER is within the tolerance of the exact one."""
+    rng = np.random.default_rng(9)
+    snrs = np.concatenate(
+        [rng.exponential(avg, 100000) for avg in (0.1, 1, 10, 1000)]
+        + [[0, np.inf, 2 ** (k / n) - 1]]
+    )
+    errs = block_error_tab(snrs, n, k, tol=tol)
+    assert errs.shape == snrs.shape
+    assert np.max(np.abs(errs - block_error(snrs, n, k))) <= tol
+
+    # Scalars and multidimensional arrays
+    assert isinstance(block_error_tab(2.0, n, k), float)
+    assert block_error_tab(snrs[:6].reshape(2, 3), n, k).shape == (2, 3)
+
+
+def test_block_error_tab_fallback(monkeypatch):
+    """Test that the tabulated BLER falls back to the exact one if required."""
+    # Invalid SNRs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        errs = block_error_tab(np.array([-1.0, np.nan, 0.0]), 300, 100)
+    assert np.isnan(errs[:2]).all()
+    assert errs[2] == 1.0
+
+    # No information bits, and arrays of bits
+    snrs = np.array([1e-3, 0.5, 5])
+    assert np.array_equal(block_error_tab(snrs, 300, 0), block_error(snrs, 300, 0))
+    n = np.array([[300], [400]])
+    assert np.array_equal(block_error_tab(snrs, n, 100), block_error(snrs, n, 100))
+
+    # Tolerance which can't be met within the maximum size of the table
+    monkeypatch.setattr(blkerr, "_BLER_TABLE_SIZE_MAX", 513)
+    _bler_table.cache_clear()
+    assert _bler_table(300, 100, 1e-14) is None
+    snrs = np.geomspace(0.3, 3, 101)
+    errs = block_error_tab(snrs, 300, 100, tol=1e-14)
+    assert np.array_equal(errs, block_error(snrs, 300, 100))
+    _bler_table.cache_clear()
+
+    with pytest.raises(ValueError, match="must be greater than 0"):
+        block_error_tab(snrs, 300, 100, tol=0)
+
+
+def test_bler_table_cache():
+    """Test that BLER tables are cached, and finer for smaller tolerances."""
+    _bler_table.cache_clear()
+    block_error_tab([1.0], 300, 100, tol=1e-5)
+    block_error_tab([2.0], 300, 100, tol=1e-5)
+    assert _bler_table.cache_info().hits == 1
+    assert _bler_table.cache_info().currsize == 1
+
+    coarse = _bler_table(300, 100, 1e-3)
+    fine = _bler_table(300, 100, 1e-7)
+    assert len(fine.values) > len(coarse.values)
+    assert coarse.values[0] <= 0.5
+    assert coarse.values[-1] == 0.0
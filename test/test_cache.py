@@ -0,0 +1,82 @@
+"""Tests for the result cache."""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from agenet import ResultCache, multi_param_ev_sim
+from agenet.simulation import ParamCombo
+
+combo = ParamCombo(5e9, 100, 400, 350, 5e-3, 500, 1e-13, None, None, None, None, None)
+
+
+def test_cache_key():
+    """Test that equivalent parameter combinations share the same key."""
+    key = ResultCache.key(combo, 10, 123, {"engine": "loop"})
+    combo_eq = ParamCombo(
+        int(5e9), 100, 400, 350, 5e-3, 500, 1e-13, 400, 350, 5e-3, 500.0, None
+    )
+    assert ResultCache.key(combo_eq, 10, 123, {"engine": "loop"}) == key
+    assert ResultCache.key(combo, 11, 123, {"engine": "loop"}) != key
+    assert ResultCache.key(combo, 10, 124, {"engine": "loop"}) != key
+    assert ResultCache.key(combo, 10, 123, {"engine": "vector"}) != key
+
+
+def test_cache_get_put(tmp_path):
+    """Test storing and retrieving rows from the cache."""
+    cache = ResultCache(tmp_path)
+    key = ResultCache.key(combo, 10, 123, {})
+    assert cache.get(key) is None
+    row = {"aaoi_theory": 0.1, "aaoi_sim": float("inf")}
+    cache.put(key, row)
+    assert len(cache) == 1
+    assert cache.get(key) == row
+    assert ResultCache(tmp_path).get(key) == row
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_cache_eviction(tmp_path):
+    """Test that the least recently used entries are evicted."""
+    row = {"aaoi_theory": 0.1, "aaoi_sim": 0.2}
+    keys = [ResultCache.key(combo, 10, seed, {}) for seed in range(4)]
+
+    # Cache with room for exactly three entries
+    entry_size = len(json.dumps(row))
+    cache = ResultCache(tmp_path, max_size=3 * entry_size)
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, row)
+        # Make sure that the entries have distinct modification times
+        os.utime(tmp_path / f"{key}.json", (i, i))
+    assert len(cache) == 3
+
+    # Use the first entry, so that the second is the least recently used
+    assert cache.get(keys[0]) == row
+    cache.put(keys[3], row)
+    assert len(cache) == 3
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == row
+
+
+def test_cache_invalid_size(tmp_path):
+    """Test that the cache requires a positive maximum size."""
+    with pytest.raises(ValueError, match="must be greater than 0"):
+        ResultCache(tmp_path, max_size=0)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_param_ev_sim_cache(tmp_path, mocker, workers):
+    """Test that multi_param_ev_sim() reuses cached results."""
+    params = (3, [5e9], [20], [300, 400], [100, 350], [1e-3, 5e-3], [700], [1e-13])
+    df_nocache, _ = multi_param_ev_sim(*params, seed=5)
+    df_1, perrs_1 = multi_param_ev_sim(*params, seed=5, cache=tmp_path)
+    assert len(ResultCache(tmp_path)) == len(df_1)
+
+    spy = mocker.spy(ResultCache, "put")
+    df_2, perrs_2 = multi_param_ev_sim(*params, seed=5, cache=tmp_path, workers=workers)
+    assert spy.call_count == 0
+    pd.testing.assert_frame_equal(df_nocache, df_1)
+    pd.testing.assert_frame_equal(df_1, df_2)
+    assert perrs_1 == perrs_2
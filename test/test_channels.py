@@ -0,0 +1,162 @@
+"""Tests for the channels module."""
+
+import numpy as np
+import pytest
+
+from agenet import (
+    Channel,
+    Nakagami,
+    Rayleigh,
+    Rician,
+    block_error,
+    block_error_th,
+    get_channel,
+    snr,
+    snr_avg,
+)
+
+channels = [Rayleigh(), Rician(0.5), Rician(3), Nakagami(0.5), Nakagami(2.5)]
+
+
+@pytest.mark.parametrize("channel", channels, ids=str)
+def test_sample_gain(channel):
+    """Test that gains have unit mean and follow the channel CDF."""
+    rng = np.random.default_rng(11)
+    gains = channel.sample_gain(rng, (400, 500))
+    assert gains.shape == (400, 500)
+    assert (gains >= 0).all()
+    assert np.isclose(np.mean(gains), 1, rtol=0.01)
+    for x in [0.1, 0.5, 1, 2]:
+        assert np.isclose(np.mean(gains < x), channel.cdf(x), atol=0.005)
+
+    assert np.isscalar(channel.sample_gain(rng))
+
+
+@pytest.mark.parametrize("channel", channels, ids=str)
+def test_block_error_th(channel):
+    """Test that the theoretical BLER approximates the average over the fading."""
+    rng = np.random.default_rng(5)
+    gains = channel.sample_gain(rng, 200000)
+    for avg, n, k in [(2.0, 300, 100), (10, 400, 350)]:
+        err_th = channel.block_error_th(avg, n, k)
+        assert isinstance(err_th, float)
+        err_mc = np.mean(block_error(avg * gains, n, k))
+        assert np.isclose(err_th, err_mc, rtol=0.1, atol=1e-3)
+
+    # Arrays, including degenerate cases as in block_error_th()
+    err_th = channel.block_error_th(
+        np.array([[1e-6], [5]]), [300, 0, 100], [280, 100, 0]
+    )
+    assert err_th.shape == (2, 3)
+    assert (err_th[:, 1:] == 1.0).all()
+    assert np.isclose(err_th[1, 0], channel.block_error_th(5.0, 300, 280))
+
+
+@pytest.mark.parametrize("channel", channels, ids=str)
+def test_ppf(channel):
+    """Test that the quantile function inverts the CDF."""
+    q = np.array([0.001, 0.1, 0.5, 0.9, 0.999])
+    x = channel.ppf(q)
+    assert (np.diff(x) > 0).all()
+    assert np.allclose(channel.cdf(x), q)
+
+
+@pytest.mark.parametrize("channel", channels, ids=str)
+def test_mean_block_error(channel):
+    """Test that the exact average BLER matches the average over the fading."""
+    rng = np.random.default_rng(5)
+    gains = channel.sample_gain(rng, 200000)
+    for avg, n, k in [(2.0, 300, 100), (10, 400, 350), (100, 400, 350)]:
+        err = channel.mean_block_error(avg, n, k)
+        assert isinstance(err, float)
+        err_mc = np.mean(block_error(avg * gains, n, k))
+        assert np.isclose(err, err_mc, rtol=0.03, atol=1e-4)
+
+    assert channel.mean_block_error(0.0, 300, 100) == 1.0
+    assert channel.mean_block_error(1e-6, 300, 100) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize(
+    "channel, pdf",
+    [
+        (Rayleigh(), lambda x: np.exp(-x)),
+        (Nakagami(2), lambda x: 4 * x * np.exp(-2 * x)),
+    ],
+    ids=str,
+)
+@pytest.mark.parametrize("avg", [300, 1e5])
+def test_mean_block_error_high_snr(channel, pdf, avg):
+    """Test the exact average BLER at high SNR, where it's concentrated."""
+    from scipy.integrate import trapezoid
+
+    x = np.exp(np.linspace(-30, 0, 1_000_001))
+    err = trapezoid(block_error(avg * x, 300, 100) * pdf(x) * x, np.log(x))
+    assert np.isclose(channel.mean_block_error(avg, 300, 100), err, rtol=1e-4)
+
+
+def test_channel_abstract():
+    """Test that channel models must implement the distribution of the gain."""
+
+    class NoPpf(Channel):
+        def sample_gain(self, rng, size=None):
+            return rng.standard_exponential(size)
+
+        def cdf(self, x):
+            return -np.expm1(-np.maximum(x, 0))
+
+    with pytest.raises(TypeError, match="abstract"):
+        Channel()
+    with pytest.raises(TypeError, match="ppf"):
+        NoPpf()
+
+
+def test_rayleigh_equivalents():
+    """Test that Rician with K=0 and Nakagami with m=1 are Rayleigh fading."""
+    snr_avgs = np.array([0.5, 2, 10])
+    expected = block_error_th(snr_avgs, 300, 100)
+    assert np.array_equal(Rayleigh().block_error_th(snr_avgs, 300, 100), expected)
+    assert np.allclose(Rician(0).block_error_th(snr_avgs, 300, 100), expected)
+    assert np.allclose(Nakagami(1).block_error_th(snr_avgs, 300, 100), expected)
+
+
+def test_snr_channel():
+    """Test that snr() draws gains from the given channel model."""
+    args = (1e-13, 1000, 1e-3, 6e9)
+    snrs = snr(*args, seed=3, size=1000, channel=Nakagami(2))
+    gains = Nakagami(2).sample_gain(np.random.Generator(np.random.SFC64(3)), 1000)
+    assert np.allclose(snrs, snr_avg(*args) * gains)
+    assert isinstance(snr(*args, seed=3, channel=Rician(2)), float)
+
+    # Rayleigh fading keeps the original sampling method
+    assert snr(*args, seed=3, channel=Rayleigh()) == snr(*args, seed=3)
+
+
+@pytest.mark.parametrize(
+    "spec, channel",
+    [
+        ("rayleigh", Rayleigh()),
+        ("rician:3", Rician(3)),
+        ("nakagami:2.5", Nakagami(2.5)),
+        (Rician(1), Rician(1)),
+    ],
+)
+def test_get_channel(spec, channel):
+    """Test that channel specifications are parsed."""
+    assert get_channel(spec) == channel
+    assert get_channel(str(channel)) == channel
+
+
+@pytest.mark.parametrize(
+    "spec, error_msg",
+    [
+        ("foo", "Unknown channel model `foo`"),
+        ("rayleigh:2", "does not take parameters"),
+        ("rician", "requires a numeric parameter"),
+        ("rician:-1", "must be non-negative"),
+        ("nakagami:0.2", "must be at least 0.5"),
+    ],
+)
+def test_get_channel_invalid(spec, error_msg):
+    """Test that invalid channel specifications are caught."""
+    with pytest.raises(ValueError, match=error_msg):
+        get_channel(spec)
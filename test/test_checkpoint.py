@@ -0,0 +1,105 @@
+"""Tests for the checkpoint of parameter sweeps."""
+
+import json
+from threading import Event
+
+import pandas as pd
+import pytest
+
+from agenet import multi_param_ev_sim, simulation
+from agenet.checkpoint import Checkpoint
+
+params = (10, [5e9], [50, 100], [300], [100, 200, 350], [1e-3, 2e-3], [700], [1e-13])
+
+
+def test_checkpoint_put_get(tmp_path):
+    """Test recording and loading completed simulations."""
+    path = tmp_path / "sweep.jsonl"
+    rows = {10: {"aaoi_theory": 0.1, "aaoi_sim": float("inf")}, 20: {"x": 1}}
+    checkpoint = Checkpoint(path)
+    checkpoint.start({"seed": 1})
+    checkpoint.put(3, 123, rows)
+    checkpoint.close()
+
+    # A new checkpoint replaces the existing one
+    assert len(Checkpoint(path)) == 0
+
+    # A partial line left by a killed process is ignored
+    with open(path, "a") as f:
+        f.write('{"index": 4, "se')
+    checkpoint = Checkpoint(path, resume=True)
+    assert checkpoint.header == {"seed": 1}
+    assert len(checkpoint) == 1
+    assert checkpoint.get(3, 123) == rows
+    assert checkpoint.get(4, 123) is None
+    with pytest.raises(ValueError, match="different seed for parameter combination 3"):
+        checkpoint.get(3, 124)
+
+    checkpoint.start({"seed": 1})
+    checkpoint.put(5, 1, rows)
+    checkpoint.close()
+
+    # Only the seeds of the simulations recorded in this session are kept
+    assert len(checkpoint) == 2
+    assert checkpoint.get(5, 1) is None
+    assert list(checkpoint._rows) == [3]
+    with pytest.raises(ValueError, match="different seed for parameter combination 5"):
+        checkpoint.get(5, 2)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[-1])["index"] == 5
+
+
+def test_checkpoint_different_sweep(tmp_path):
+    """Test that resuming a different sweep fails."""
+    path = tmp_path / "sweep.jsonl"
+    multi_param_ev_sim(*params, seed=3, checkpoint=path)
+    with pytest.raises(ValueError, match="belongs to a different sweep"):
+        multi_param_ev_sim(*params, seed=4, checkpoint=path, resume=True)
+    with pytest.raises(ValueError, match="belongs to a different sweep"):
+        multi_param_ev_sim(20, *params[1:], seed=3, checkpoint=path, resume=True)
+
+
+@pytest.mark.parametrize("engine, workers", [("loop", 1), ("vector", 1), ("vector", 2)])
+@pytest.mark.parametrize("seed", [3, None])
+def test_multi_param_ev_sim_resume(tmp_path, mocker, engine, workers, seed):
+    """Test that a resumed sweep has the same results as an uninterrupted one."""
+    path = tmp_path / "sweep.jsonl"
+
+    # Interrupt the sweep after a few simulations are completed
+    stop_event = Event()
+    put = Checkpoint.put
+
+    def put_and_stop(self, *args):
+        put(self, *args)
+        if len(self) == 3:
+            stop_event.set()
+
+    mocker.patch.object(Checkpoint, "put", put_and_stop)
+    df_part, _ = multi_param_ev_sim(
+        *params,
+        seed=seed,
+        engine=engine,
+        workers=workers,
+        checkpoint=path,
+        stop_event=stop_event,
+    )
+    mocker.stopall()
+    assert len(df_part) < 12
+
+    # Without a seed, the one recorded in the checkpoint is used when resuming
+    if seed is None:
+        seed = json.loads(path.read_text().splitlines()[0])["header"]["seed"]
+    spy = mocker.spy(simulation, "_combo_ev_sim")
+    df, perrs = multi_param_ev_sim(*params, seed=seed, engine=engine, workers=workers)
+    num_sims = spy.call_count
+
+    # Completed simulations are not performed again
+    spy.reset_mock()
+    df_resumed, perrs_resumed = multi_param_ev_sim(
+        *params, engine=engine, workers=workers, checkpoint=path, resume=True
+    )
+    if workers == 1:
+        assert spy.call_count == num_sims - 3
+    pd.testing.assert_frame_equal(df_resumed, df)
+    assert perrs_resumed == perrs
@@ -6,11 +6,13 @@ import subprocess
 import sys
 import time
 
-import pytest
 import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
 
 agenet_cmd = "agenet"
 elapsed_str = "Elapsed simulation time: "
+throughput_str = "combinations/second"
 
 
 @pytest.mark.parametrize("help_param", ["--help", "-h"])
@@ -45,12 +47,15 @@ def test_version(script_runner):
 
 
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Does not work on Windows")
-def test_keyboard_interrupt():
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_keyboard_interrupt(jobs):
     """Test a keyboard interrupt."""
     # Start the subprocess that runs the function in a separate Python interpreter
     process = subprocess.Popen(
         [
             agenet_cmd,
+            "--jobs",
+            jobs,
             "--distance",
             *[str(f) for f in range(10, 1000)],
         ],
@@ -109,6 +114,25 @@ def test_table(monkeypatch, script_runner, table_param):
         ["-r", "12"],
         ["-s", "12334"],
         ["--seed", "3546"],
+        ["--engine", "vector", "-r", "5"],
+        ["--engine", "slot", "-e", "100", "200"],
+        ["--engine", "skip", "-e", "100", "200", "--channel", "rician:2"],
+        ["--engine", "loop", "-e", "10", "20"],
+        ["-j", "2", "--power", "0.001", "0.002", "0.003"],
+        ["--jobs", "0", "-e", "10", "20"],
+        ["--independent-samples", "--power", "0.001", "0.002"],
+        ["--channel", "rician:3", "--power", "0.001", "0.002"],
+        ["--channel", "nakagami:2", "--engine", "vector", "-e", "100", "200"],
+        ["--bler-tol", "1e-6", "--engine", "vector", "-e", "100", "200"],
+        ["--importance-sampling", "-r", "20", "--power", "1", "10"],
+        ["--importance-sampling", "--is-bias", "0.05", "-e", "50", "100"],
+        ["--control-variate", "--engine", "skip", "-e", "50", "100"],
+        ["--common-random-numbers", "--engine", "vector", "--power", "1", "10"],
+        ["--antithetic", "--engine", "skip", "-r", "20", "-e", "50", "100"],
+        ["--engine", "vector", "--no-prefix-reuse", "-e", "10", "20"],
+        ["--ci-rel", "0.05", "-r", "50", "--power", "0.001", "0.002"],
+        ["--engine", "vector", "--ci-abs", "1e-5", "--min-runs", "5", "-r", "20"],
+        ["--ci-rel", "0.1", "--confidence", "0.9", "-r", "20"],
         ["--num-bits", "500"],
         ["--num-bits", "400", "500", "600"],
         ["--info-bits", "305"],
@@ -132,6 +156,7 @@ def test_valid_params(script_runner, valid_params):
     ret = script_runner.run([agenet_cmd, *valid_params])
     assert ret.success
     assert elapsed_str in ret.stdout
+    assert throughput_str in ret.stdout
 
 
 def test_invalid_param_combos(script_runner):
@@ -180,6 +205,110 @@ def test_save_csv(tmp_path, script_runner):
     assert elapsed_str in ret.stdout
 
 
+@pytest.mark.parametrize("extra_args", [[], ["--save-csv"], ["--theory-only"]])
+def test_stream_output(tmp_path, script_runner, extra_args):
+    """Test that results are streamed to a CSV file."""
+    stream_file = tmp_path / "stream.csv"
+    csv_file = tmp_path / "results.csv"
+    if extra_args == ["--save-csv"]:
+        extra_args = ["--save-csv", str(csv_file)]
+
+    ret = script_runner.run(
+        [
+            agenet_cmd,
+            "--distance-2",
+            *[str(f) for f in range(300, 310)],
+            "--stream-output",
+            str(stream_file),
+            "--chunk-size",
+            "3",
+            *extra_args,
+        ]
+    )
+
+    assert ret.success
+    assert "10 rows of results written to" in ret.stdout
+    df = pd.read_csv(stream_file)
+    assert len(df) == 10
+    if csv_file.exists():
+        pd.testing.assert_frame_equal(pd.read_csv(csv_file), df)
+
+
+def test_checkpoint_resume(tmp_path, script_runner):
+    """Test that a simulation is resumed from its checkpoint."""
+    checkpoint = tmp_path / "sweep.jsonl"
+    args = [agenet_cmd, "--power", "0.001", "0.002", "-r", "5"]
+
+    ret = script_runner.run(
+        [*args, "--checkpoint", str(checkpoint), "-o", str(tmp_path / "a.csv")]
+    )
+    assert ret.success
+    assert len(checkpoint.read_text().splitlines()) == 3
+
+    ret = script_runner.run(
+        [
+            *args,
+            "--checkpoint",
+            str(checkpoint),
+            "--resume",
+            "-o",
+            str(tmp_path / "b.csv"),
+        ]
+    )
+    assert ret.success
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "a.csv"), pd.read_csv(tmp_path / "b.csv")
+    )
+
+    ret = script_runner.run([*args, "--resume"])
+    assert not ret.success
+    assert "requires a --checkpoint file" in ret.stderr
+
+
+def test_shard_merge(tmp_path, script_runner):
+    """Test that the merged results of shards are those of a single run."""
+    args = [agenet_cmd, "--power", "0.001", "0.002", "0.003", "-e", "50", "100"]
+    args += ["--engine", "vector", "--seed", "5"]
+
+    ret = script_runner.run([*args, "-o", str(tmp_path / "whole.csv")])
+    assert ret.success
+
+    shard_files = []
+    for i in range(4):
+        shard_files.append(str(tmp_path / f"shard{i}.json"))
+        ret = script_runner.run(
+            [*args, "--shard", f"{i}/4", "--shard-file", shard_files[-1]]
+        )
+        assert ret.success
+        assert f"Results of shard {i}/4 saved to" in ret.stdout
+
+    ret = script_runner.run(
+        [agenet_cmd, "merge", *shard_files, "-t", "-o", str(tmp_path / "merged.csv")]
+    )
+    assert ret.success
+    assert "Merged the results of 4 shards" in ret.stdout
+    assert (tmp_path / "merged.csv").read_text() == (tmp_path / "whole.csv").read_text()
+
+    ret = script_runner.run([agenet_cmd, "merge", *shard_files[1:]])
+    assert not ret.success
+    assert "Missing shards of the sweep: 0/4" in ret.stderr
+
+
+@pytest.mark.parametrize(
+    "args, error_msg",
+    [
+        (["--shard", "0/2"], "A seed is required"),
+        (["--shard", "1-2", "-s", "1"], "Invalid shard `1-2`"),
+        (["--shard", "0/2", "-s", "1", "--theory-only"], "not available with"),
+    ],
+)
+def test_shard_invalid(script_runner, args, error_msg):
+    """Test that invalid shards are reported."""
+    ret = script_runner.run([agenet_cmd, "-r", "2", *args])
+    assert not ret.success
+    assert error_msg in ret.stderr
+
+
 def test_save_plot(tmp_path, script_runner):
     """Test if plot image was successfully saved."""
     img_file = tmp_path / "plot.png"
@@ -256,3 +385,117 @@ def test_debug_levels(script_runner, debug_level, match_str):
     assert match_str in ret.stderr
     assert "ValueError" in ret.stderr
     assert elapsed_str in ret.stdout
+
+
+def test_cache_dir(tmp_path, script_runner):
+    """Test that results are cached and reused when requested."""
+    cache_dir = tmp_path / "cache"
+    csv_files = [tmp_path / "results1.csv", tmp_path / "results2.csv"]
+
+    for csv_file in csv_files:
+        ret = script_runner.run(
+            [
+                agenet_cmd,
+                "--power",
+                "0.001",
+                "0.002",
+                "-s",
+                "123",
+                "--cache-dir",
+                str(cache_dir),
+                "--save-csv",
+                str(csv_file),
+            ]
+        )
+        assert ret.success
+        assert elapsed_str in ret.stdout
+
+    assert len(list(cache_dir.glob("*.json"))) == 2
+    assert csv_files[0].read_text() == csv_files[1].read_text()
+
+
+def test_theory_only(tmp_path, script_runner):
+    """Test that only theoretical results are computed with --theory-only."""
+    csv_file = tmp_path / "results.csv"
+    img_file = tmp_path / "plot.png"
+
+    ret = script_runner.run(
+        [
+            agenet_cmd,
+            "--theory-only",
+            "--power",
+            "0.001",
+            "0.002",
+            "0.003",
+            "--info-bits",
+            "350",
+            "500",
+            "--num-bits",
+            "400",
+            "--save-csv",
+            str(csv_file),
+        ]
+    )
+
+    assert ret.success
+    assert "Elapsed computation time: " in ret.stdout
+    assert "3 invalid parameter combinations due to:" in ret.stdout
+
+    df = pd.read_csv(csv_file)
+    assert len(df) == 3
+    assert "aaoi_theory" in df.columns
+    assert "aaoi_sim" not in df.columns
+
+    # The plot only shows the theoretical AAoI
+    ret = script_runner.run(
+        [agenet_cmd, "--theory-only", "-e", "10", "20", "--save-plot", str(img_file)]
+    )
+    assert ret.success
+    assert img_file.exists()
+
+
+def test_invalid_channel(script_runner):
+    """Test that unknown channel models are reported."""
+    ret = script_runner.run([agenet_cmd, "--channel", "foo", "-r", "2"])
+    assert not ret.success
+    assert "Unknown channel model `foo`" in ret.stderr
+
+
+def test_invalid_importance_sampling(script_runner):
+    """Test that importance sampling can't be combined with adaptive runs."""
+    ret = script_runner.run(
+        [agenet_cmd, "--importance-sampling", "--ci-rel", "0.1", "-r", "20"]
+    )
+    assert not ret.success
+    assert "can't be combined with an adaptive number of runs" in ret.stderr
+
+
+def test_invalid_control_variate(script_runner):
+    """Test that control variates require a batch engine."""
+    ret = script_runner.run([agenet_cmd, "--control-variate", "-r", "20"])
+    assert not ret.success
+    assert "Control variates require an engine" in ret.stderr
+
+
+def test_invalid_common_random_numbers(script_runner):
+    """Test that antithetic variates can't be combined with control variates."""
+    ret = script_runner.run(
+        [
+            agenet_cmd,
+            "--antithetic",
+            "--control-variate",
+            "--engine",
+            "vector",
+            "-r",
+            "20",
+        ]
+    )
+    assert not ret.success
+    assert "can't be combined with control variates" in ret.stderr
+
+
+def test_invalid_bler_tol(script_runner):
+    """Test that invalid tolerances of the tabulated BLER are reported."""
+    ret = script_runner.run([agenet_cmd, "--bler-tol", "0", "-r", "2"])
+    assert not ret.success
+    assert "`bler_tol` (0.0) must be greater than 0" in ret.stderr
@@ -0,0 +1,66 @@
+"""This file contains the test cases for the package __init__.py file."""
+
+import re
+import subprocess
+import sys
+
+import pytest
+
+import agenet
+
+# Heavy modules which should not be loaded just by importing agenet
+heavy_modules = ["matplotlib", "numpy", "pandas", "scipy"]
+
+# Maximum cumulative import time of agenet, in microseconds
+import_time_budget = 100_000
+
+
+def _loaded_heavy_modules(code: str) -> list[str]:
+    """Get the heavy modules loaded after running code in a new interpreter."""
+    ret = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; {code}; "
+            f"print(' '.join(m for m in {heavy_modules} if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return ret.stdout.split()
+
+
+@pytest.mark.parametrize("code", ["import agenet", "import agenet.cli"])
+def test_lazy_imports(code):
+    """Test that importing agenet does not load heavy modules."""
+    assert _loaded_heavy_modules(code) == []
+
+
+def test_lazy_attribute_imports():
+    """Test that exported names load their submodule on first access."""
+    assert _loaded_heavy_modules("from agenet import ResultCache") == []
+    assert _loaded_heavy_modules("from agenet import ResultWriter") == []
+    assert "numpy" in _loaded_heavy_modules("from agenet import ev_sim")
+
+
+def test_import_time_budget():
+    """Test that the cumulative import time of agenet is within the budget."""
+    ret = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agenet"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| agenet$", ret.stderr, re.M)
+    assert match is not None
+    assert int(match.group(1)) < import_time_budget
+
+
+def test_exports():
+    """Test that all exported names are available and listed."""
+    for name in agenet.__all__:
+        assert getattr(agenet, name) is not None
+        assert name in dir(agenet)
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        agenet.foo
@@ -0,0 +1,82 @@
+"""Tests for saving and merging the results of shards of a sweep."""
+
+import pandas as pd
+import pytest
+
+from agenet import merge_shards, multi_param_ev_sim, save_shard
+
+params = (5, [5e9], [50, 100], [300], [100, 200, 350], [1e-3, 2e-3], [700], [1e-13])
+
+
+@pytest.mark.parametrize(
+    "engine, merge_equivalent", [("loop", True), ("loop", False), ("vector", True)]
+)
+@pytest.mark.parametrize("num_shards", [1, 3, 5])
+def test_merge_shards(tmp_path, engine, merge_equivalent, num_shards):
+    """Test that merged shards have the same results as the whole sweep."""
+    opts = {"seed": 3, "engine": engine, "merge_equivalent": merge_equivalent}
+    df, perrs = multi_param_ev_sim(*params, **opts)
+
+    paths = []
+    for i in range(num_shards):
+        df_shard, perrs_shard = multi_param_ev_sim(
+            *params, **opts, shard=(i, num_shards)
+        )
+        assert len(df_shard) < len(df) or num_shards == 1
+        paths.append(tmp_path / f"shard{i}.json")
+        save_shard(paths[-1], df_shard, perrs_shard, (i, num_shards), opts)
+
+    df_merged, perrs_merged = merge_shards(paths[::-1])
+    pd.testing.assert_frame_equal(df_merged, df)
+    assert perrs_merged == perrs
+
+
+def test_merge_shards_job_window(tmp_path, monkeypatch):
+    """Test merged shards when jobs are evicted from the window of jobs."""
+    from agenet import simulation
+
+    monkeypatch.setattr(simulation, "_JOB_WINDOW", 2)
+    opts = {"seed": 3, "engine": "vector"}
+    df, perrs = multi_param_ev_sim(*params, **opts)
+
+    paths = []
+    for i in range(4):
+        df_shard, perrs_shard = multi_param_ev_sim(*params, **opts, shard=(i, 4))
+        paths.append(tmp_path / f"shard{i}.json")
+        save_shard(paths[-1], df_shard, perrs_shard, (i, 4), opts)
+
+    df_merged, _ = merge_shards(paths)
+    pd.testing.assert_frame_equal(df_merged, df)
+
+
+def test_merge_shards_invalid(tmp_path):
+    """Test that shards which don't make up a whole sweep are not merged."""
+    paths = []
+    for i in range(3):
+        df_shard, perrs_shard = multi_param_ev_sim(*params, seed=3, shard=(i, 3))
+        paths.append(tmp_path / f"shard{i}.json")
+        save_shard(paths[-1], df_shard, perrs_shard, (i, 3), {"seed": 3})
+    save_shard(tmp_path / "other.json", df_shard, perrs_shard, (2, 3), {"seed": 4})
+
+    with pytest.raises(ValueError, match=r"Missing shards of the sweep: 1/3"):
+        merge_shards([paths[0], paths[2]])
+    with pytest.raises(ValueError, match="given more than once"):
+        merge_shards([*paths, paths[1]])
+    with pytest.raises(ValueError, match="belongs to a different sweep"):
+        merge_shards([*paths[:2], tmp_path / "other.json"])
+    with pytest.raises(ValueError, match="No shard files given"):
+        merge_shards([])
+
+
+@pytest.mark.parametrize(
+    "shard, seed, error_msg",
+    [
+        ((0, 2), None, "A seed is required"),
+        ((2, 2), 1, r"must be between 0 and 1"),
+        ((0, 0), 1, "must be greater than 0"),
+    ],
+)
+def test_multi_param_ev_sim_invalid_shard(shard, seed, error_msg):
+    """Test that invalid shards are caught."""
+    with pytest.raises(ValueError, match=error_msg):
+        multi_param_ev_sim(*params, seed=seed, shard=shard)
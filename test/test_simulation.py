@@ -1,13 +1,24 @@
 """This file contains the test cases for the maincom.py file."""
 
+import itertools
 import re
 from multiprocessing import Value
 from threading import Event
 
 import numpy as np
+import pandas as pd
 import pytest
 
-from agenet import ev_sim, multi_param_ev_sim, sim
+from agenet import (
+    ev_sim,
+    ev_sim_adaptive,
+    ev_sim_cv,
+    ev_sim_is,
+    multi_param_ev_sim,
+    multi_param_th,
+    sim,
+    simulation,
+)
 
 # ############################ #
 # Tests for the sim() function #
@@ -462,6 +473,27 @@ def test_sim_error_handling(
         )
 
 
+def test_sim_vector_engine():
+    """Test the sim() function with the vectorized engine."""
+    params = (6 * (10**9), 1000, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result_loop = sim(*params, seed=42)
+    result_vec1 = sim(*params, seed=42, engine="vector")
+    result_vec2 = sim(*params, seed=42, engine="vector")
+    assert len(result_vec1) == 6
+    assert all(isinstance(x, float) and x > 0 for x in result_vec1)
+    assert result_vec1 == result_vec2
+    # Everything except the simulated AAoI is independent of the engine
+    assert result_vec1[0] == result_loop[0]
+    assert result_vec1[2:] == result_loop[2:]
+
+
+def test_sim_invalid_engine():
+    """Test that the sim() function does not accept unknown engines."""
+    params = (6 * (10**9), 1000, 300, 100, 10**-3, 700, 1 * (10**-13))
+    with pytest.raises(ValueError, match="Unknown simulation engine `foo`"):
+        sim(*params, seed=42, engine="foo")
+
+
 # ############################### #
 # Tests for the ev_sim() function #
 # ############################### #
@@ -498,20 +530,205 @@ def test_ev_sim_different_seeds():
     ), "Run_simulation results are the same with different seeds"
 
 
-def test_ev_sim_return_inf_aaoi_th():
+def test_ev_sim_engines_agree():
+    """Test that the loop and vector engines produce statistically similar AAoIs."""
+    params = (30, 6 * (10**9), 500, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result_loop = ev_sim(*params, seed=42, engine="loop")
+    result_vec = ev_sim(*params, seed=42, engine="vector")
+    assert np.isclose(result_vec[0], result_loop[0])
+    assert np.isclose(result_vec[1], result_loop[1], rtol=0.05)
+
+
+@pytest.mark.parametrize("num_events", [1, 30, 5000])
+def test_ev_sim_slot_engine(num_events):
+    """Test that the slot engine matches the vector engine up to rounding."""
+    params = (6 * (10**9), num_events, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result_vec = ev_sim(20, *params, seed=42, engine="vector")
+    result_slot = ev_sim(20, *params, seed=42, engine="slot")
+    assert result_slot[0] == result_vec[0]
+    assert np.isclose(result_slot[1], result_vec[1], rtol=1e-9)
+    assert result_slot[2:] == result_vec[2:]
+
+    result_slot = sim(*params, seed=1, engine="slot")
+    assert result_slot == pytest.approx(sim(*params, seed=1, engine="vector"))
+
+
+@pytest.mark.parametrize("channel", ["rayleigh", "nakagami:2"])
+def test_ev_sim_skip_engine(channel):
+    """Test that the skip engine follows the same distribution as the vector one."""
+    params = (6 * (10**9), 500, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result_vec = ev_sim(2000, *params, seed=42, engine="vector", channel=channel)
+    result_skip = ev_sim(2000, *params, seed=42, engine="skip", channel=channel)
+    assert result_skip[0] == result_vec[0]
+    assert np.isclose(result_skip[1], result_vec[1], rtol=0.02)
+    assert result_skip[2:] == result_vec[2:]
+
+    aaoi_th, aaoi_sim = sim(*params, seed=1, engine="skip", channel=channel)[:2]
+    assert aaoi_th == result_vec[0]
+    assert np.isclose(aaoi_sim, result_vec[1], rtol=0.3)
+
+
+def test_sim_skip_batch_horizons(monkeypatch):
+    """Test that the skip engine obtains the AAoI of run prefixes."""
+    params = simulation._param_validate(6e9, 400, 300, 100, 10**-3, 1000, 1e-13, seed=7)
+    kwargs = simulation._sim_kwargs(params)
+    horizons = [1, 10, 400]
+    _, aaoi_vec = simulation._sim_batch(**kwargs, num_runs=4000, horizons=horizons)
+
+    # Simulate the runs in several chunks
+    monkeypatch.setattr(simulation, "_BATCH_SIZE", 2000)
+    _, aaoi_skip = simulation._sim_skip_batch(
+        **kwargs, num_runs=4000, horizons=horizons
+    )
+    assert aaoi_skip.shape == (4000, 3)
+
+    # Prefixes of a single event only have an AAoI when it was delivered
+    assert np.isclose(
+        np.isinf(aaoi_skip[:, 0]).mean(), np.isinf(aaoi_vec[:, 0]).mean(), atol=0.03
+    )
+    finite = ~np.isinf(aaoi_skip)
+    assert (finite[:, 0] <= finite[:, 1]).all()
+    for j in range(1, 3):
+        assert np.isclose(
+            np.mean(aaoi_skip[finite[:, j], j]),
+            np.mean(aaoi_vec[~np.isinf(aaoi_vec[:, j]), j]),
+            rtol=0.02,
+        )
+
+
+def test_ev_sim_vector_chunks(monkeypatch):
+    """Test that ev_sim() with the vector engine works when runs are chunked."""
+    params = (40, 6 * (10**9), 300, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result_whole = ev_sim(*params, seed=42, engine="vector")
+    monkeypatch.setattr(simulation, "_BATCH_SIZE", 1000)
+    result_chunks1 = ev_sim(*params, seed=42, engine="vector")
+    result_chunks2 = ev_sim(*params, seed=42, engine="vector")
+    assert result_chunks1 == result_chunks2
+    assert result_chunks1[0] == result_whole[0]
+    assert np.isclose(result_chunks1[1], result_whole[1], rtol=0.05)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector", "skip"])
+def test_ev_sim_no_deliveries(engine):
+    """Test that ev_sim() returns infinite AAoIs if a run has no deliveries."""
+    ev_aaoi_th, ev_aaoi_sim, _, _, _, _ = ev_sim(
+        100, 6e9, 50, 300, 200, 1e-3, 1500, 1e-13, seed=3, engine=engine
+    )
+    assert np.isinf(ev_aaoi_th)
+    assert np.isinf(ev_aaoi_sim)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector", "skip"])
+def test_ev_sim_return_inf_aaoi_th(engine):
     """Test that ev_sim() returns infinite ev AAoI when one AAoI is infinite."""
     ev_aaoi_th, ev_aaoi_sim, _, _, _, _ = ev_sim(
-        20, 250000000000, 35, 400, 200, 0.005, 500, 1e-13
+        20, 250000000000, 35, 400, 200, 0.005, 500, 1e-13, engine=engine
     )
     assert np.isinf(ev_aaoi_th)
     assert np.isinf(ev_aaoi_sim)
 
 
+@pytest.mark.parametrize("engine", ["loop", "vector", "slot"])
+def test_ev_sim_bler_tol(engine):
+    """Test that the tabulated BLER gives nearly the same results as the exact one."""
+    params = (20, 6 * (10**9), 300, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result = ev_sim(*params, seed=42, engine=engine, bler_tol=1e-7)
+    result_exact = ev_sim(*params, seed=42, engine=engine)
+    assert result[0] == result_exact[0]
+    assert np.isclose(result[1], result_exact[1], rtol=1e-3)
+    assert result[2:] == result_exact[2:]
+
+    with pytest.raises(ValueError, match="`bler_tol` \\(0\\) must be greater than 0"):
+        ev_sim(*params, engine=engine, bler_tol=0)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector"])
+def test_sim_bler_tol(mocker, engine):
+    """Test that sim() uses the tabulated BLER if a tolerance is given."""
+    params = (6 * (10**9), 300, 300, 100, 10**-3, 700, 1 * (10**-13))
+    spy = mocker.spy(simulation, "block_error_tab")
+    result_exact = sim(*params, seed=42, engine=engine)
+    assert spy.call_count == 0
+    result = sim(*params, seed=42, engine=engine, bler_tol=1e-7)
+    assert spy.call_count > 0
+    assert result[0] == result_exact[0]
+    assert np.isclose(result[1], result_exact[1], rtol=1e-3)
+    assert result[2:] == result_exact[2:]
+
+
+def test_multi_param_ev_sim_bler_tol():
+    """Test multi_param_ev_sim() with the tabulated BLER."""
+    params = (5, [5e9], [50, 100], [300], [100, 350], [1e-3], [700], [1e-13])
+    df, _ = multi_param_ev_sim(*params, engine="vector", bler_tol=1e-7, seed=3)
+    df_exact, _ = multi_param_ev_sim(*params, engine="vector", seed=3)
+    assert np.allclose(df["aaoi_sim"], df_exact["aaoi_sim"], rtol=1e-3)
+
+    with pytest.raises(ValueError, match="must be greater than 0"):
+        multi_param_ev_sim(*params, bler_tol=-1.0)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector"])
+@pytest.mark.parametrize("channel", ["rician:3", "nakagami:2"])
+def test_ev_sim_channel(engine, channel):
+    """Test ev_sim() with other channel models than Rayleigh fading."""
+    params = (30, 6 * (10**9), 500, 300, 100, 10**-3, 700, 1 * (10**-13))
+    result = ev_sim(*params, seed=42, engine=engine, channel=channel)
+    result_rayleigh = ev_sim(*params, seed=42, engine=engine)
+    # Fading is less severe than Rayleigh fading, both in theory and simulation
+    assert result[0] < result_rayleigh[0]
+    assert result[1] < result_rayleigh[1]
+    assert np.isclose(
+        result[1] / result[0], result_rayleigh[1] / result_rayleigh[0], rtol=0.05
+    )
+
+    # The default channel model is Rayleigh fading
+    assert ev_sim(*params, seed=42, engine=engine, channel="rayleigh") == (
+        result_rayleigh
+    )
+
+
+def test_ev_sim_invalid_channel():
+    """Test that ev_sim() fails with an unknown channel model."""
+    params = (30, 6 * (10**9), 500, 300, 100, 10**-3, 700, 1 * (10**-13))
+    with pytest.raises(ValueError, match="Unknown channel model"):
+        ev_sim(*params, channel="foo")
+
+
 # ########################################### #
 # Tests for the multi_param_ev_sim() function #
 # ########################################### #
 
 
+def test_param_grid(monkeypatch):
+    """Test that the lazy grid of combinations is index-addressable."""
+    param_lists = [[5e9], [10, 20, 30], [300], [100, 200], [1e-3], [700, 800]]
+    param_lists += [[1e-13], [None], [None], [None, 2e-3], [None], [None]]
+    grid = simulation._ParamGrid(*param_lists)
+    combos = [simulation.ParamCombo._make(c) for c in itertools.product(*param_lists)]
+    assert len(grid) == len(combos) == 24
+    assert list(grid.combos()) == combos
+    assert [grid[i] for i in range(len(grid))] == combos
+    assert grid[-1] == combos[-1]
+    assert list(grid.combos(5, 11)) == combos[5:11]
+    with pytest.raises(IndexError):
+        grid[24]
+
+    # Seeds depend only on the seed of the sweep and the index of the combination
+    tasks = list(grid.tasks(3))
+    assert [index for index, _, _ in tasks] == list(range(len(combos)))
+    assert [combo for _, combo, _ in tasks] == combos
+    seeds = [seed for _, _, seed in tasks]
+    assert list(grid.tasks(3, 7, 9)) == tasks[7:9]
+    assert list(simulation._ParamGrid.seeds(3, 10, 15)) == seeds[10:15]
+    assert len(set(seeds)) == len(seeds)
+    assert all(seed >= 0 for seed in seeds)
+    assert list(grid.tasks(4))[0][2] != seeds[0]
+
+    # Seeds are the same when derived in chunks
+    monkeypatch.setattr(simulation._ParamGrid, "_SEED_CHUNK", 5)
+    assert list(grid.tasks(3)) == tasks
+
+
 @pytest.mark.parametrize(
     "num_runs, frequency, num_events, num_bits, info_bits, power, distance, N0, num_bits_2, info_bits_2, power_2, distance_2, N0_2, seed, counter, stop_event",
     [
@@ -680,3 +897,576 @@ def test_multi_param_ev_sim_stop():
 
     assert num_results < total_param_combos
     assert stop_event.is_set()
+
+
+def test_multi_param_ev_sim_vector_engine():
+    """Test multi_param_ev_sim() with the vectorized engine."""
+    df, perrs = multi_param_ev_sim(
+        5, [5e9], [50, 100], [300], [100, 350], [1e-3], [700], [1e-13], engine="vector"
+    )
+    assert len(df) == 2
+    assert sum(len(v) for v in perrs.values()) == 2
+    assert (df["aaoi_sim"] > 0).all()
+
+
+def test_multi_param_ev_sim_invalid_engine():
+    """Test that multi_param_ev_sim() fails early with an unknown engine."""
+    with pytest.raises(ValueError, match="Unknown simulation engine"):
+        multi_param_ev_sim(
+            5, [5e9], [50], [300], [100], [1e-3], [700], [1e-13], engine="foo"
+        )
+
+
+def test_multi_param_ev_sim_channel():
+    """Test multi_param_ev_sim() with other channel models than Rayleigh fading."""
+    params = (5, [5e9], [50, 100], [300], [100, 350], [1e-3], [700], [1e-13])
+    df, _ = multi_param_ev_sim(*params, channel="nakagami:2", seed=3)
+    df_rayleigh, _ = multi_param_ev_sim(*params, seed=3)
+    assert len(df) == 2
+    assert not np.allclose(df["aaoi_theory"], df_rayleigh["aaoi_theory"])
+
+    df_th, _ = multi_param_th(*params[1:], channel="nakagami:2")
+    assert np.allclose(df_th["aaoi_theory"], df["aaoi_theory"])
+
+    with pytest.raises(ValueError, match="Unknown channel model"):
+        multi_param_ev_sim(*params, channel="foo")
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector"])
+def test_multi_param_ev_sim_workers(engine):
+    """Test that results of multi_param_ev_sim() don't depend on the workers."""
+    params = (
+        3,
+        [5e9],
+        [20, 40],
+        [300, 400],
+        [100, 350],
+        [1e-3, 5e-3],
+        [700],
+        [1e-13],
+    )
+    df_1, perrs_1 = multi_param_ev_sim(*params, seed=11, engine=engine, workers=1)
+    counter = Value("i", 0)
+    df_3, perrs_3 = multi_param_ev_sim(
+        *params, seed=11, counter=counter, engine=engine, workers=3
+    )
+    pd.testing.assert_frame_equal(df_1, df_3)
+    assert perrs_1 == perrs_3
+    assert counter.value == 16
+
+
+def test_multi_param_ev_sim_workers_stop():
+    """Test that multi_param_ev_sim() stops ahead of time with several workers."""
+    stop_event = Event()
+    stop_event.set()
+    df, perrs = multi_param_ev_sim(
+        5,
+        [5e9],
+        [10],
+        [300],
+        [100],
+        [1e-3, 2e-3, 3e-3],
+        [700],
+        [1e-13],
+        stop_event=stop_event,
+        workers=2,
+    )
+    assert len(df) + sum(len(v) for v in perrs.values()) < 3
+
+
+def test_multi_param_ev_sim_invalid_workers():
+    """Test that multi_param_ev_sim() requires a positive number of workers."""
+    with pytest.raises(ValueError, match=re.escape("`workers` (0) must be")):
+        multi_param_ev_sim(
+            5, [5e9], [50], [300], [100], [1e-3], [700], [1e-13], workers=0
+        )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_param_ev_sim_merge_equivalent(mocker, workers):
+    """Test that equivalent parameter combinations are only simulated once."""
+    params = (3, [5e9], [30], [300], [100], [1e-3, 2e-3], [700], [1e-13, 2e-13])
+    spy = mocker.spy(simulation, "ev_sim")
+    df, _ = multi_param_ev_sim(*params, seed=7, workers=workers)
+    df_ind, _ = multi_param_ev_sim(
+        *params, seed=7, workers=workers, merge_equivalent=False
+    )
+
+    if workers == 1:
+        assert spy.call_count == 3 + 4
+
+    # Power 1e-3 with N0 1e-13 is equivalent to power 2e-3 with N0 2e-13
+    assert len(df) == len(df_ind) == 4
+    pd.testing.assert_frame_equal(
+        df[["frequency", "num_events", "power", "N0"]],
+        df_ind[["frequency", "num_events", "power", "N0"]],
+    )
+    assert df.loc[0, "aaoi_sim"] == df.loc[3, "aaoi_sim"]
+    assert df_ind.loc[0, "aaoi_sim"] != df_ind.loc[3, "aaoi_sim"]
+    assert df.loc[3, "power"] == 2e-3
+    assert df.loc[3, "N0_2"] == 2e-13
+    assert df.loc[1, "aaoi_sim"] != df.loc[2, "aaoi_sim"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_param_ev_sim_reuse_prefixes(mocker, workers):
+    """Test that sweeps over the number of events reuse event trace prefixes."""
+    params = (4, [5e9], [50, 200, 100], [300], [100], [1e-3], [700], [1e-13])
+    spy = mocker.spy(simulation, "_ev_sim_batch")
+    df, _ = multi_param_ev_sim(*params, seed=3, engine="vector", workers=workers)
+    df_sep, _ = multi_param_ev_sim(
+        *params, seed=3, engine="vector", workers=workers, reuse_prefixes=False
+    )
+
+    if workers == 1:
+        assert spy.call_count == 1 + 3
+
+    assert list(df["num_events"]) == list(df_sep["num_events"]) == [50, 200, 100]
+    pd.testing.assert_frame_equal(
+        df.drop(columns="aaoi_sim"), df_sep.drop(columns="aaoi_sim")
+    )
+
+    # The longest simulation uses the seed of the first combination
+    seed = simulation._ParamGrid.seeds(3, 0, 1)[0]
+    aaoi_th, aaoi_sim, *_ = ev_sim(
+        4, 5e9, 200, 300, 100, 1e-3, 700, 1e-13, seed=seed, engine="vector"
+    )
+    assert df.loc[1, "aaoi_sim"] == aaoi_sim
+    assert df.loc[1, "aaoi_theory"] == aaoi_th
+
+
+def test_multi_param_ev_sim_job_window(mocker, monkeypatch):
+    """Test that only the most recent jobs are shared by combinations."""
+    powers = [1e-3, 2e-3, 3e-3, 4e-3]
+    params = (4, [5e9], [50, 100], [300], [100], powers, [700], [1e-13])
+    df, _ = multi_param_ev_sim(*params, seed=3, engine="vector")
+
+    # Jobs of the combinations with 50 events are evicted before those with 100
+    # events are reached, so they are simulated again, with their own seeds
+    monkeypatch.setattr(simulation, "_JOB_WINDOW", 2)
+    spy = mocker.spy(simulation, "_ev_sim_batch")
+    df_window, _ = multi_param_ev_sim(*params, seed=3, engine="vector")
+    assert spy.call_count == 8
+    pd.testing.assert_frame_equal(
+        df.drop(columns="aaoi_sim"), df_window.drop(columns="aaoi_sim")
+    )
+    assert (df_window["aaoi_sim"][:4] == df["aaoi_sim"][:4]).all()
+    assert (df_window["aaoi_sim"][4:] != df["aaoi_sim"][4:]).all()
+
+    df_workers, _ = multi_param_ev_sim(*params, seed=3, engine="vector", workers=2)
+    pd.testing.assert_frame_equal(df_workers, df_window)
+
+    window = simulation._JobWindow()
+    rep = simulation._JobRep(0, None, 1)
+    assert window.visit(("a",), rep) is rep
+    window.outcomes[("a",)] = {}
+    window.visit(("b",), rep._replace(combo_index=1))
+    assert window.visit(("a",), rep._replace(combo_index=2)) is rep
+    window.visit(("c",), rep._replace(combo_index=3))
+    assert list(window.reps) == [("a",), ("c",)]
+    assert ("a",) in window.outcomes
+
+
+@pytest.mark.parametrize("engine", ["loop", "vector"])
+def test_ev_sim_adaptive(engine):
+    """Test that the adaptive number of runs stops once the target is met."""
+    params = (5e9, 100, 300, 100, 1e-3, 700, 1e-13)
+    aaoi_th, aaoi_sim, _, _, _, _, half_width, runs = ev_sim_adaptive(
+        500, *params, seed=4, engine=engine, rel_half_width=0.05, min_runs=5
+    )
+    assert 5 <= runs < 500
+    assert half_width <= 0.05 * aaoi_sim
+    assert aaoi_th == ev_sim(1, *params, seed=4, engine=engine)[0]
+
+    # Unreachable target, all runs are performed
+    _, _, _, _, _, _, half_width, runs = ev_sim_adaptive(
+        20, *params, seed=4, engine=engine, abs_half_width=1e-12, min_runs=5
+    )
+    assert runs == 20
+    assert half_width > 1e-12
+
+
+def test_ev_sim_adaptive_stats():
+    """Test that the streaming statistics match the batch mean and variance."""
+    values = np.random.default_rng(1).exponential(2.0, 57)
+    stats = simulation._RunStats(num_runs=0, mean=0.0, m2=0.0)
+    for chunk in np.array_split(values, [1, 2, 10, 30]):
+        stats = simulation._update_stats(stats, chunk)
+    assert stats.num_runs == 57
+    assert np.isclose(stats.mean, np.mean(values))
+    assert np.isclose(stats.m2 / 56, np.var(values, ddof=1))
+
+
+def test_ev_sim_adaptive_no_deliveries():
+    """Test the adaptive number of runs when no packets are delivered."""
+    result = ev_sim_adaptive(
+        100, 6e9, 50, 300, 200, 1e-3, 1500, 1e-13, seed=2, rel_half_width=0.1
+    )
+    assert np.isinf(result[0])
+    assert np.isinf(result[1])
+    assert np.isinf(result[6])
+
+
+@pytest.mark.parametrize(
+    "opts, error_msg",
+    [
+        ({}, "At least one of"),
+        ({"rel_half_width": -0.1}, "`rel_half_width` (-0.1) must be greater than 0"),
+        ({"abs_half_width": 0}, "`abs_half_width` (0) must be greater than 0"),
+        ({"rel_half_width": 0.1, "min_runs": 1}, "`min_runs` (1) must be at least 2"),
+        ({"rel_half_width": 0.1, "min_runs": 200}, "must be equal or greater than"),
+        ({"rel_half_width": 0.1, "confidence": 1}, "must be between 0 and 1"),
+    ],
+)
+def test_ev_sim_adaptive_invalid(opts, error_msg):
+    """Test that invalid options of the adaptive number of runs are caught."""
+    with pytest.raises(ValueError, match=re.escape(error_msg)):
+        ev_sim_adaptive(100, 5e9, 100, 300, 100, 1e-3, 700, 1e-13, **opts)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_param_ev_sim_adaptive(workers):
+    """Test multi_param_ev_sim() with an adaptive number of runs."""
+    df, _ = multi_param_ev_sim(
+        200,
+        [5e9],
+        [100],
+        [300],
+        [100],
+        [1e-3, 2e-3],
+        [700],
+        [1e-13],
+        seed=9,
+        workers=workers,
+        rel_half_width=0.05,
+        min_runs=4,
+    )
+    assert len(df) == 2
+    assert (df["num_runs"] >= 4).all()
+    assert (df["num_runs"] <= 200).all()
+    assert (df["aaoi_sim_ci"] <= 0.05 * df["aaoi_sim"]).all()
+
+
+def test_ev_sim_is():
+    """Test that importance sampling is unbiased, and precise for rare errors."""
+    # Block errors are rare, but still observed with plain simulation
+    params = (5e9, 200, 300, 100, 1, 700, 1e-13)
+    result = ev_sim_is(20000, *params, seed=3)
+    assert len(result) == 7
+    assert result[0] == ev_sim(1, *params)[0]
+    assert result[2:6] == ev_sim(1, *params)[2:]
+    _, aaoi_sim = simulation._sim_batch(
+        **simulation._sim_kwargs(simulation._param_validate(*params, seed=5)),
+        num_runs=20000,
+        slots=True,
+    )
+    var_mc = np.var(aaoi_sim, ddof=1) / 20000
+    assert abs(result[1] - np.mean(aaoi_sim)) < 4 * np.sqrt(result[6] + var_mc)
+
+    # Without bias, this is plain simulation
+    result_plain = ev_sim_is(2000, *params, seed=3, bias=0)
+    assert np.isclose(result_plain[1], result[1], rtol=1e-3)
+
+    # Block errors are too rare to be observed, but are still estimated with a
+    # relative standard error of a few percent
+    params = (5e9, 200, 300, 100, 1e5, 700, 1e-13)
+    result = ev_sim_is(5000, *params, seed=3)
+    result_plain = ev_sim_is(5000, *params, seed=3, bias=0)
+    assert result_plain[6] == pytest.approx(0, abs=1e-20)
+    aaoi_all = result_plain[1]
+    assert result[1] > aaoi_all
+    assert np.sqrt(result[6]) < 0.05 * (result[1] - aaoi_all)
+
+
+def test_ev_sim_is_invalid():
+    """Test importance sampling without deliveries and with an invalid bias."""
+    result = ev_sim_is(100, 6e9, 50, 300, 200, 1e-3, 1500, 1e-13, seed=2)
+    assert np.isinf(result[0])
+    assert np.isinf(result[1])
+    assert np.isinf(result[6])
+
+    with pytest.raises(ValueError, match=re.escape("`bias` (1) must be between")):
+        ev_sim_is(100, 5e9, 100, 300, 100, 1e-3, 700, 1e-13, bias=1)
+
+
+def test_multi_param_ev_sim_is():
+    """Test multi_param_ev_sim() with importance sampling."""
+    params = (50, [5e9], [50, 100], [300], [100], [1, 10], [700], [1e-13])
+    df, _ = multi_param_ev_sim(*params, seed=9, importance_sampling=True)
+    assert len(df) == 4
+    assert (df["aaoi_sim_var"] > 0).all()
+    row = df.iloc[3]
+    seed = simulation._ParamGrid.seeds(9, 3, 4)[0]
+    assert ev_sim_is(50, 5e9, 100, 300, 100, 10, 700, 1e-13, seed=seed)[1] == (
+        row["aaoi_sim"]
+    )
+
+    df_bias, _ = multi_param_ev_sim(
+        *params, seed=9, importance_sampling=True, is_bias=0.1
+    )
+    assert not np.allclose(df_bias["aaoi_sim"], df["aaoi_sim"])
+
+    with pytest.raises(ValueError, match="can't be combined"):
+        multi_param_ev_sim(*params, importance_sampling=True, rel_half_width=0.1)
+    with pytest.raises(ValueError, match="must be between 0 and 1"):
+        multi_param_ev_sim(*params, importance_sampling=True, is_bias=-0.5)
+
+
+@pytest.mark.parametrize("engine", ["vector", "slot", "skip"])
+def test_failure_rate(engine):
+    """Test the fraction of failed deliveries of each run of batch engines."""
+    params = simulation._param_validate(6e9, 200, 150, 100, 0.01, 100, 1e-13, seed=4)
+    kwargs = simulation._sim_kwargs(params)
+    failure_rate = np.empty((2000, 2))
+    simulation._batch_engines[engine](
+        **kwargs, num_runs=2000, horizons=[50, 200], failure_rate=failure_rate
+    )
+    assert ((failure_rate >= 0) & (failure_rate <= 1)).all()
+    assert np.allclose(failure_rate * [50, 200], np.round(failure_rate * [50, 200]))
+    er1 = params.channel.mean_block_error(params.snr1_avg, 150, 100)
+    er2 = params.channel.mean_block_error(params.snr2_avg, 150, 100)
+    assert np.isclose(np.mean(failure_rate[:, 1]), 1 - (1 - er1) * (1 - er2), rtol=0.1)
+
+
+@pytest.mark.parametrize("engine", ["vector", "slot", "skip"])
+def test_ev_sim_cv(engine):
+    """Test that the control variate is unbiased and reduces the variance."""
+    params = (6e9, 300, 150, 100, 0.01, 100, 1e-13)
+    result = ev_sim_cv(2000, *params, seed=1, engine=engine)
+    assert len(result) == 8
+    assert result[0] == ev_sim(1, *params)[0]
+    assert result[2:6] == ev_sim(1, *params)[2:]
+
+    # The same runs without the control variate
+    _, aaoi_sim = simulation._batch_engines[engine](
+        **simulation._sim_kwargs(simulation._param_validate(*params, seed=1)),
+        num_runs=2000,
+    )
+    var_mc = np.var(aaoi_sim, ddof=1) / 2000
+    assert np.isclose(result[6] * result[7], var_mc)
+    assert result[7] > 10
+    assert abs(result[1] - np.mean(aaoi_sim)) < 4 * np.sqrt(var_mc)
+
+
+def test_ev_sim_cv_invalid():
+    """Test the control variate without deliveries and with an invalid engine."""
+    result = ev_sim_cv(100, 6e9, 50, 300, 200, 1e-3, 1500, 1e-13, seed=2)
+    assert np.isinf(result[0])
+    assert np.isinf(result[1])
+    assert np.isinf(result[6])
+
+    with pytest.raises(ValueError, match="Control variates require an engine"):
+        ev_sim_cv(100, 5e9, 100, 300, 100, 1e-3, 700, 1e-13, engine="loop")
+    with pytest.raises(ValueError, match="Unknown simulation engine"):
+        ev_sim_cv(100, 5e9, 100, 300, 100, 1e-3, 700, 1e-13, engine="foo")
+
+
+def test_multi_param_ev_sim_cv():
+    """Test multi_param_ev_sim() with a control variate."""
+    params = (100, [6e9], [50, 100], [150], [100], [0.01, 0.1], [100], [1e-13])
+    df, _ = multi_param_ev_sim(
+        *params, seed=9, engine="vector", control_variate=True, reuse_prefixes=False
+    )
+    assert len(df) == 4
+    assert (df["aaoi_sim_var"] > 0).all()
+    assert (df["aaoi_sim_vrf"] > 1).all()
+    row = df.iloc[3]
+    seed = simulation._ParamGrid.seeds(9, 3, 4)[0]
+    result = ev_sim_cv(100, 6e9, 100, 150, 100, 0.1, 100, 1e-13, seed=seed)
+    assert (result[1], result[6], result[7]) == (
+        row["aaoi_sim"],
+        row["aaoi_sim_var"],
+        row["aaoi_sim_vrf"],
+    )
+
+    # Results for both numbers of events are obtained from the same runs
+    df_prefix, _ = multi_param_ev_sim(
+        *params, seed=9, engine="skip", control_variate=True
+    )
+    assert len(df_prefix) == 4
+    assert (df_prefix["aaoi_sim_vrf"] >= 1).all()
+    assert np.allclose(df_prefix["aaoi_sim"], df["aaoi_sim"], rtol=1e-3)
+
+    with pytest.raises(ValueError, match="can't be combined"):
+        multi_param_ev_sim(*params, control_variate=True, importance_sampling=True)
+    with pytest.raises(ValueError, match="Control variates require an engine"):
+        multi_param_ev_sim(*params, control_variate=True, engine="loop")
+
+
+@pytest.mark.parametrize("runs", [1, 6, 7])
+def test_uniforms(runs):
+    """Test uniform random numbers, with and without antithetic pairs."""
+    rng = np.random.default_rng(8)
+    u = simulation._uniforms(rng, (runs, 50), False)
+    assert u.shape == (runs, 50)
+    assert ((u > 0) & (u < 1)).all()
+
+    u = simulation._uniforms(np.random.default_rng(8), (runs, 50), True)
+    assert u.shape == (runs, 50)
+    half = (runs + 1) // 2
+    assert (u[half:] == 1 - u[: runs - half]).all()
+    assert ((u > 0) & (u < 1)).all()
+
+
+@pytest.mark.parametrize("engine", ["vector", "slot", "skip"])
+@pytest.mark.parametrize("antithetic", [False, True])
+def test_ev_sim_common_random_numbers(engine, antithetic):
+    """Test that common random numbers are reproducible and unbiased."""
+    params = (6e9, 200, 150, 100, 0.003, 100, 1e-13)
+    opts = {"engine": engine, "common_random_numbers": True, "antithetic": antithetic}
+    result = ev_sim(1000, *params, seed=2, **opts)
+    assert result == ev_sim(1000, *params, seed=2, **opts)
+    assert result[0] == ev_sim(1, *params)[0]
+    assert result[2:] == ev_sim(1, *params)[2:]
+
+    # Same distribution as without common random numbers
+    _, aaoi_sim = simulation._batch_engines[engine](
+        **simulation._sim_kwargs(simulation._param_validate(*params, seed=5)),
+        num_runs=4000,
+    )
+    sd = np.std(aaoi_sim) * np.sqrt(1 / 1000 + 1 / 4000)
+    assert abs(result[1] - np.mean(aaoi_sim)) < 4 * sd
+
+
+@pytest.mark.parametrize("engine", ["vector", "skip"])
+@pytest.mark.parametrize("antithetic", [False, True])
+def test_common_random_numbers_correlation(monkeypatch, engine, antithetic):
+    """Test that common random numbers correlate runs at a moderate BLER."""
+    # Several chunks of runs
+    monkeypatch.setattr(simulation, "_BATCH_SIZE", 1 << 14)
+    aaoi_sims = []
+    for power in [1e-3, 1.02e-3]:
+        params = simulation._param_validate(6e9, 2000, 150, 100, power, 100, 1e-13)
+        er1, er2 = params.blkerr1_th, params.blkerr2_th
+        assert 0.05 < er1 + er2 * (1 - er1) < 0.5
+        _, aaoi_sim = simulation._batch_engines[engine](
+            **{
+                **simulation._sim_kwargs(params),
+                "rng": np.random.Generator(np.random.PCG64DXSM(3)),
+            },
+            num_runs=300,
+            common_random_numbers=True,
+            antithetic=antithetic,
+        )
+        aaoi_sims.append(aaoi_sim[:, 0])
+    assert np.corrcoef(*aaoi_sims)[0, 1] > 0.9
+
+
+def test_ev_sim_common_random_numbers_invalid():
+    """Test that common random numbers require a batch engine."""
+    params = (100, 5e9, 100, 300, 100, 1e-3, 700, 1e-13)
+    with pytest.raises(ValueError, match="Common random numbers require an engine"):
+        ev_sim(*params, common_random_numbers=True)
+    with pytest.raises(ValueError, match="Antithetic variates require an engine"):
+        ev_sim(*params, engine="loop", antithetic=True)
+
+
+@pytest.mark.parametrize("engine", ["vector", "skip"])
+def test_multi_param_ev_sim_common_random_numbers(engine):
+    """Test that common random numbers give smooth results in a sweep."""
+    powers = list(np.linspace(0.01, 0.011, 6))
+    params = (50, [6e9], [100, 200], [150], [100], powers, [100], [1e-13])
+    df, _ = multi_param_ev_sim(
+        *params, seed=5, engine=engine, common_random_numbers=True
+    )
+    assert len(df) == 12
+
+    # The AAoI decreases with the power for the same runs
+    for _, group in df.groupby("num_events"):
+        assert (np.diff(group["aaoi_sim"]) <= 0).all()
+
+    # All combinations have the same seed
+    seed = simulation._ParamGrid.seeds(5, 0, 1)[0]
+    row = df.iloc[-1]
+    result = ev_sim(
+        50,
+        *(6e9, 200, 150, 100, powers[-1], 100, 1e-13),
+        seed=seed,
+        engine=engine,
+        common_random_numbers=True,
+    )
+    assert result[1] == pytest.approx(row["aaoi_sim"], rel=1e-12)
+
+    df_anti, _ = multi_param_ev_sim(*params, seed=5, engine=engine, antithetic=True)
+    assert not np.array_equal(df_anti["aaoi_sim"], df["aaoi_sim"])
+    df_cv, _ = multi_param_ev_sim(
+        *params, seed=5, engine=engine, common_random_numbers=True, control_variate=True
+    )
+    assert (df_cv["aaoi_sim_vrf"] >= 1).all()
+
+    with pytest.raises(ValueError, match="can't be combined"):
+        multi_param_ev_sim(*params, engine=engine, antithetic=True, rel_half_width=0.1)
+    with pytest.raises(ValueError, match="can't be combined with control variates"):
+        multi_param_ev_sim(
+            *params, engine=engine, antithetic=True, control_variate=True
+        )
+    with pytest.raises(ValueError, match="Common random numbers require an engine"):
+        multi_param_ev_sim(*params, common_random_numbers=True)
+
+
+def test_multi_param_th():
+    """Test that multi_param_th() matches the theory of multi_param_ev_sim()."""
+    params = (
+        [5e9, -6e9],
+        [100, 0],
+        [300, 400],
+        [100, 350],
+        [1e-3, 2e-3],
+        [700, 1000],
+        [1e-13],
+        [None, 200],
+    )
+    df_th, log_th = multi_param_th(*params)
+    df_sim, log_sim = multi_param_ev_sim(2, *params, seed=1, engine="vector")
+
+    assert log_th == log_sim
+    assert list(log_th) == list(log_sim)
+    assert list(df_th.columns) == [c for c in df_sim.columns if c != "aaoi_sim"]
+    pd.testing.assert_frame_equal(
+        df_th.drop(columns=["aaoi_theory", "snr1_avg", "snr2_avg"]),
+        df_sim.drop(columns=["aaoi_theory", "aaoi_sim", "snr1_avg", "snr2_avg"]),
+        check_dtype=False,
+        rtol=1e-12,
+    )
+    assert np.allclose(df_th["snr1_avg"], df_sim["snr1_avg"], rtol=1e-12)
+    assert np.allclose(df_th["snr2_avg"], df_sim["snr2_avg"], rtol=1e-12)
+
+    # The simulation reports an infinite AAoI if no packets were delivered
+    finite = np.isfinite(df_sim["aaoi_sim"])
+    assert finite.any()
+    assert np.allclose(df_th["aaoi_theory"][finite], df_sim["aaoi_theory"][finite])
+
+
+def test_multi_param_th_relay_types():
+    """Test that float relay values are kept when source values are ints."""
+    params = ([5e9], [50], [300], [100], [1], [700], [1e-13])
+    relay = {"power_2": [None, 0.5], "distance_2": [None, 650.5]}
+    df_th, log_th = multi_param_th(*params, **relay)
+    df_sim, _ = multi_param_ev_sim(2, *params, **relay, seed=1, engine="vector")
+
+    assert not log_th
+    assert list(df_th["power_2"]) == [1, 1, 0.5, 0.5]
+    assert list(df_th["distance_2"]) == [700, 650.5, 700, 650.5]
+    for col in ["power_2", "distance_2", "snr2_avg", "blkerr2_th", "aaoi_theory"]:
+        assert np.allclose(df_th[col], df_sim[col], rtol=1e-12)
+
+
+def test_multi_param_th_large():
+    """Test multi_param_th() on a large parameter grid."""
+    df, log = multi_param_th(
+        np.linspace(1e9, 6e9, 20),
+        [100],
+        [300, 400],
+        [100, 200],
+        np.linspace(1e-4, 1e-2, 50),
+        np.linspace(100, 1000, 50),
+        [1e-13],
+        [None],
+        [None],
+        [None],
+        [None],
+        [1e-13, 0],
+    )
+    assert len(df) == 20 * 4 * 50 * 50
+    assert len(log["`N0` (1e-13) and `N0_2` (0) must be greater than 0"]) == len(df)
+    assert np.isfinite(df["blkerr1_th"]).all()
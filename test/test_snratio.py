@@ -1,6 +1,8 @@
 """Tests for the snr module."""
 
+import numpy as np
 import pytest
+from scipy.stats import ks_2samp
 
 from agenet import snr, snr_avg
 
@@ -127,3 +129,46 @@ def test_snr_none_seed():
     result = snr(1e-13, 1000, 1e-3, 6e9, seed=None)
     assert isinstance(result, float)
     assert result >= 0
+
+
+def test_snr_avg_array():
+    """Test that snr_avg() on arrays matches the scalar version."""
+    N0 = np.array([1e-13, 2e-13])[:, None]
+    d = np.array([300, 700, 1000])
+    P = 1e-3
+    fr = 6e9
+    result = snr_avg(N0, d, P, fr)
+    assert result.shape == (2, 3)
+    for i in range(2):
+        for j in range(3):
+            assert np.isclose(result[i, j], snr_avg(float(N0[i, 0]), int(d[j]), P, fr))
+
+    # Invalid distances yield infinity or NaN element-wise
+    result = snr_avg(1e-13, np.array([0, -1, 500]), P, fr)
+    assert np.isinf(result[0])
+    assert np.isnan(result[1])
+    assert np.isclose(result[2], snr_avg(1e-13, 500, P, fr))
+
+
+def test_snr_size():
+    """Test that snr() returns an array of SNRs with the scalar distribution."""
+    N0, d, P, fr = 1e-13, 1000, 1e-3, 6e9
+    result = snr(N0, d, P, fr, seed=42, size=(200, 50))
+    assert isinstance(result, np.ndarray)
+    assert result.shape == (200, 50)
+    assert (result >= 0).all()
+    assert np.array_equal(result, snr(N0, d, P, fr, seed=42, size=(200, 50)))
+
+    # Same distribution as drawing one SNR at a time
+    rng = np.random.default_rng(3)
+    scalar = [snr(N0, d, P, fr, seed=rng) for _ in range(10000)]
+    assert ks_2samp(result.ravel(), scalar).pvalue > 1e-3
+    assert np.isclose(np.mean(result), snr_avg(N0, d, P, fr), rtol=0.05)
+
+    # Parameters broadcast against the given shape
+    result = snr(N0, np.array([[500], [1000]]), P, fr, seed=1, size=(2, 10000))
+    assert np.allclose(
+        result.mean(axis=1),
+        [snr_avg(N0, 500, P, fr), snr_avg(N0, 1000, P, fr)],
+        rtol=0.05,
+    )
@@ -0,0 +1,87 @@
+"""Tests for the incremental result writer."""
+
+import pandas as pd
+import pytest
+
+from agenet import ResultWriter, multi_param_ev_sim
+
+rows = [
+    {"num_events": i, "aaoi_theory": 0.1 * i, "aaoi_sim": 0.2 * i} for i in range(7)
+]
+
+
+def test_writer_csv(tmp_path):
+    """Test that rows are appended to a CSV file in chunks."""
+    path = tmp_path / "results.csv"
+    writer = ResultWriter(path, chunk_size=3)
+    for row in rows[:4]:
+        writer.write(row)
+
+    # Only full chunks have been written so far
+    assert pd.read_csv(path).to_dict("records") == rows[:3]
+
+    with writer:
+        for row in rows[4:]:
+            writer.write(row)
+    assert writer.num_rows == len(rows)
+    pd.testing.assert_frame_equal(pd.read_csv(path), pd.DataFrame(rows))
+
+    # Existing results are replaced
+    with ResultWriter(path) as writer:
+        writer.write(rows[0])
+    assert len(pd.read_csv(path)) == 1
+
+
+def test_writer_flush_on_error(tmp_path):
+    """Test that buffered rows are written if an exception is raised."""
+    path = tmp_path / "results.csv"
+
+    def interrupted_sweep():
+        with ResultWriter(path) as writer:
+            writer.write(rows[0])
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        interrupted_sweep()
+    assert pd.read_csv(path).to_dict("records") == rows[:1]
+
+
+def test_writer_parquet(tmp_path):
+    """Test that chunks are written to files in a Parquet folder."""
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "results.parquet"
+    with ResultWriter(path, chunk_size=3) as writer:
+        for row in rows:
+            writer.write(row)
+    assert len(list(path.glob("part-*.parquet"))) == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(path), pd.DataFrame(rows))
+
+
+@pytest.mark.parametrize(
+    "path, opts, error_msg",
+    [
+        ("results.txt", {}, "Unable to determine the output format"),
+        ("results", {"file_format": "json"}, "Unknown output format `json`"),
+        ("results.csv", {"chunk_size": 0}, "must be greater than 0"),
+    ],
+)
+def test_writer_invalid(tmp_path, path, opts, error_msg):
+    """Test that invalid writer options are caught."""
+    with pytest.raises(ValueError, match=error_msg):
+        ResultWriter(tmp_path / path, **opts)
+
+
+@pytest.mark.parametrize("keep_results", [True, False])
+def test_multi_param_ev_sim_output(tmp_path, keep_results):
+    """Test that multi_param_ev_sim() streams rows of results to the output."""
+    params = (5, [5e9], [50, 100], [300], [100, 200, 350], [1e-3], [700], [1e-13])
+    df, _ = multi_param_ev_sim(*params, seed=3)
+    path = tmp_path / "results.csv"
+    df_out, _ = multi_param_ev_sim(
+        *params, seed=3, output=path, keep_results=keep_results
+    )
+    pd.testing.assert_frame_equal(pd.read_csv(path), df)
+    if keep_results:
+        pd.testing.assert_frame_equal(df_out, df)
+    else:
+        assert len(df_out) == 0